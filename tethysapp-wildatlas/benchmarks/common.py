@@ -0,0 +1,208 @@
+"""
+Shared helpers for the Wild Atlas benchmark scripts.
+
+The benchmarks talk to the database directly through SQLAlchemy, so they need an installed app (for the models),
+the portal settings and a database URL, but not a running Tethys portal. Point them at a scratch database: they
+create tables and insert rows. PostGIS runs every case; a SQLite file (sqlite:///bench.sqlite3) stands in for the
+cases that don't need PostgreSQL.
+
+Django is set up from the portal settings (DJANGO_SETTINGS_MODULE, tethys_portal.settings by default) with an
+in-process channel layer, so live update messages never leave the process.
+"""
+from datetime import datetime, timedelta, timezone
+import io
+import json
+import math
+import os
+import platform
+import statistics
+import time
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tethys_portal.settings')
+django.setup()
+
+from django.test.utils import override_settings  # noqa: E402
+import numpy as np  # noqa: E402
+from sqlalchemy import create_engine, event, func, insert, select  # noqa: E402
+from sqlalchemy.dialects.postgresql import UUID  # noqa: E402
+from sqlalchemy.ext.compiler import compiles  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+from sqlalchemy.schema import CreateTable  # noqa: E402
+
+from tethysapp.wildatlas.models import (  # noqa: E402
+    Animal, Base, Sighting, SightingDailyStat, YELLOWSTONE_BBOX, _valid_animals
+)
+from tethysapp.wildatlas.synthetic import SyntheticSightings  # noqa: E402
+
+override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}).enable()
+
+
+@compiles(UUID, 'sqlite')
+def _compile_uuid_sqlite(element, compiler, **kwargs):
+    # SQLite has no UUID type; the column type converts UUIDs to and from text.
+    return 'CHAR(36)'
+
+
+def is_postgres(engine):
+    return engine.dialect.name == 'postgresql'
+
+
+def make_engine(db_url):
+    engine = create_engine(db_url)
+    if is_postgres(engine):
+        Base.metadata.create_all(engine)
+        return engine
+
+    @event.listens_for(engine, 'connect')
+    def add_functions(dbapi_connection, connection_record):
+        # Not every SQLite build has the math functions the grid queries use.
+        dbapi_connection.create_function(
+            'floor', 1, lambda value: None if value is None else math.floor(value), deterministic=True
+        )
+
+    # The geography index only exists in PostGIS, so give SQLite the tables and the plain indexes.
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            connection.execute(CreateTable(table, if_not_exists=True))
+            for index in table.indexes:
+                if not index.dialect_options['postgresql']['using']:
+                    index.create(connection, checkfirst=True)
+    return engine
+
+
+def seed_animals(engine):
+    with engine.begin() as connection:
+        if connection.execute(select(func.count(Animal.id))).scalar():
+            return
+        connection.execute(
+            insert(Animal.__table__),
+            [{'name': a.name, 'logo_path': a.logo_path, 'pin_path': a.pin_path} for a in _valid_animals()]
+        )
+
+
+def _copy_sightings(engine, columns):
+    """
+    Load generated sighting columns with COPY, which is several times faster than batched INSERTs.
+    """
+    hex_ids = columns['id'].tobytes().hex()
+    times = np.datetime_as_string((columns['epoch'] * 1e6).astype('datetime64[us]'), unit='us')
+    buffer = io.StringIO()
+    buffer.writelines(
+        f'{hex_ids[32 * index:32 * (index + 1)]},{animal_id},{date_time}+00,{latitude},{longitude}\n'
+        for index, (animal_id, date_time, latitude, longitude) in enumerate(zip(
+            columns['animal_id'].tolist(), times.tolist(), columns['latitude'].tolist(), columns['longitude'].tolist()
+        ))
+    )
+    buffer.seek(0)
+
+    connection = engine.raw_connection()
+    try:
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                'COPY sightings (id, animal_id, date_time, latitude, longitude) FROM STDIN WITH (FORMAT csv)', buffer
+            )
+        connection.commit()
+    finally:
+        connection.close()
+
+
+def seed_sightings(engine, rows, batch_size=100000, days=365, seed=0):
+    """
+    Top the sightings table up to the given number of rows of synthetic sightings, clustered in space and time like
+    real reports (see SyntheticSightings). The daily statistics are rebuilt to match on PostgreSQL.
+    """
+    with engine.begin() as connection:
+        animal_ids = connection.execute(select(Animal.id)).scalars().all()
+        existing = connection.execute(select(func.count(Sighting.id))).scalar()
+
+    if rows <= existing:
+        return
+
+    if is_postgres(engine):
+        # Load straight into the monthly partitions rather than through the default partition.
+        with Session(engine) as session:
+            Sighting.maintain_partitions(session, datetime.now(timezone.utc) - timedelta(days=days))
+            session.commit()
+
+    # Continue the stream where the last top-up stopped so the new rows don't repeat the old ones.
+    generator = SyntheticSightings(animal_ids, seed=seed, stream=existing, days=days)
+    remaining = rows - existing
+    while remaining > 0:
+        size = min(batch_size, remaining)
+        if is_postgres(engine):
+            _copy_sightings(engine, generator.columns(size))
+        else:
+            with engine.begin() as connection:
+                connection.execute(insert(Sighting.__table__), generator.rows(size))
+        remaining -= size
+
+    if is_postgres(engine):
+        with Session(engine) as session:
+            SightingDailyStat.rebuild(session)
+            session.commit()
+
+
+def analyze(engine):
+    with engine.begin() as connection:
+        connection.exec_driver_sql('ANALYZE sightings' if is_postgres(engine) else 'ANALYZE')
+
+
+def random_viewport(rng, span=0.1):
+    """
+    A random square viewport of the given span in degrees inside the park.
+    """
+    min_lon, min_lat, max_lon, max_lat = YELLOWSTONE_BBOX
+    lon = rng.uniform(min_lon, max_lon - span)
+    lat = rng.uniform(min_lat, max_lat - span)
+    return (lon, lat, lon + span, lat + span)
+
+
+def random_point(rng):
+    min_lon, min_lat, max_lon, max_lat = YELLOWSTONE_BBOX
+    return rng.uniform(min_lat, max_lat), rng.uniform(min_lon, max_lon)
+
+
+def time_call(fn, repeat=20):
+    """
+    Call fn repeatedly and summarize the wall-clock latency in milliseconds.
+    """
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        'repeat': repeat,
+        'min_ms': round(samples[0], 3),
+        'median_ms': round(statistics.median(samples), 3),
+        'p95_ms': round(samples[int(0.95 * (len(samples) - 1))], 3),
+        'max_ms': round(samples[-1], 3),
+    }
+
+
+def run_info(engine, **parameters):
+    """
+    Describe the run, so results from different machines, databases and data sets can be compared.
+    """
+    with engine.connect() as connection:
+        if is_postgres(engine):
+            server = connection.exec_driver_sql('SHOW server_version').scalar()
+        else:
+            server = connection.exec_driver_sql('SELECT sqlite_version()').scalar()
+    return {
+        'started_at': datetime.now(timezone.utc).isoformat(),
+        'database': f'{engine.dialect.name} {server}',
+        'python': platform.python_version(),
+        'machine': platform.platform(),
+        **parameters,
+    }
+
+
+def emit(results, output=None):
+    print(json.dumps(results, indent=2))
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
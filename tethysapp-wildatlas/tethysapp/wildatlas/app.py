@@ -1,5 +1,5 @@
 from tethys_sdk.base import TethysAppBase
-from tethys_sdk.app_settings import PersistentStoreDatabaseSetting
+from tethys_sdk.app_settings import CustomSetting, PersistentStoreDatabaseSetting
 
 
 class App(TethysAppBase):
@@ -26,8 +26,100 @@ class App(TethysAppBase):
                 name='primary_db',
                 description='primary database',
                 initializer='wildatlas.models.init_primary_db',
-                required=True
+                required=True,
+                spatial=True
             ),
         )
 
         return ps_settings
+
+    def custom_settings(self):
+        """
+        Define Custom Settings.
+        """
+        custom_settings = (
+            CustomSetting(
+                name='cluster_zoom_threshold',
+                type=CustomSetting.TYPE_INTEGER,
+                description='Zoom level below which the map shows aggregated sighting clusters instead of pins.',
+                required=False,
+                default=11
+            ),
+            CustomSetting(
+                name='playback_point_budget',
+                type=CustomSetting.TYPE_INTEGER,
+                description='Most sightings sent for one step of time slider playback; busier steps are sampled.',
+                required=False,
+                default=2000
+            ),
+            CustomSetting(
+                name='db_pool_size',
+                type=CustomSetting.TYPE_INTEGER,
+                description='Number of database connections kept open per process.',
+                required=False,
+                default=5
+            ),
+            CustomSetting(
+                name='db_max_overflow',
+                type=CustomSetting.TYPE_INTEGER,
+                description='Extra database connections a process may open when the pool is exhausted.',
+                required=False,
+                default=10
+            ),
+            CustomSetting(
+                name='db_pool_timeout',
+                type=CustomSetting.TYPE_INTEGER,
+                description='Seconds to wait for a free database connection before failing the request.',
+                required=False,
+                default=30
+            ),
+            CustomSetting(
+                name='db_statement_timeout',
+                type=CustomSetting.TYPE_INTEGER,
+                description='Milliseconds a SQL statement may run before the database cancels it. 0 disables it.',
+                required=False,
+                default=30000
+            ),
+            CustomSetting(
+                name='slow_request_threshold',
+                type=CustomSetting.TYPE_INTEGER,
+                description='Milliseconds after which a request is logged as slow with its SQL and timing breakdown. '
+                            '0 disables the log.',
+                required=False,
+                default=1000
+            ),
+            CustomSetting(
+                name='archive_deleted_sightings',
+                type=CustomSetting.TYPE_BOOLEAN,
+                description='Move deleted sightings to the archive table, where they can be restored, instead of '
+                            'removing them.',
+                required=False,
+                default=False
+            ),
+            CustomSetting(
+                name='sighting_retention_days',
+                type=CustomSetting.TYPE_INTEGER,
+                description='Age in days after which the apply_retention command archives sightings. 0 keeps them '
+                            'on the map forever.',
+                required=False,
+                default=0
+            ),
+            CustomSetting(
+                name='dedup_distance',
+                type=CustomSetting.TYPE_INTEGER,
+                description='Metres within which a new report of an animal is merged into an existing sighting of it '
+                            'made within dedup_window minutes. 0 keeps every report.',
+                required=False,
+                default=0
+            ),
+            CustomSetting(
+                name='dedup_window',
+                type=CustomSetting.TYPE_INTEGER,
+                description='Minutes either side of a sighting within which a nearby report of the same animal is '
+                            'merged into it.',
+                required=False,
+                default=10
+            ),
+        )
+
+        return custom_settings
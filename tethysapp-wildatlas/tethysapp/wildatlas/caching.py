@@ -0,0 +1,87 @@
+from collections import OrderedDict
+from datetime import datetime, timezone
+import hashlib
+import threading
+
+from .models import SIGHTINGS_DATA, DataVersion
+
+PAYLOAD_CACHE_SIZE = 256
+HEATMAP_CACHE_SIZE = 2048
+
+
+class PayloadCache:
+    """
+    Thread-safe, process-level LRU cache of rendered responses. Keys include the data version, so entries for old
+    versions are never served and simply age out.
+    """
+
+    def __init__(self, max_size=PAYLOAD_CACHE_SIZE):
+        self.max_size = max_size
+        self._payloads = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            payload = self._payloads.get(key)
+            if payload is not None:
+                self._payloads.move_to_end(key)
+            return payload
+
+    def set(self, key, payload):
+        with self._lock:
+            self._payloads[key] = payload
+            self._payloads.move_to_end(key)
+            while len(self._payloads) > self.max_size:
+                self._payloads.popitem(last=False)
+
+
+sighting_payloads = PayloadCache()
+heatmap_tiles = PayloadCache(max_size=HEATMAP_CACHE_SIZE)
+
+
+def sightings_version(request):
+    """
+    Get the (version, last modified) of the sightings data, read once per request.
+    Responses also depend on the clock through sighting ages and the default time window, so the version changes
+    at least every hour.
+    """
+    if not hasattr(request, '_wildatlas_sightings_version'):
+        version, updated_at = DataVersion.current(SIGHTINGS_DATA)
+        hour = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+        request._wildatlas_sightings_version = (f'{version}.{int(hour.timestamp())}', max(updated_at, hour))
+    return request._wildatlas_sightings_version
+
+
+def sightings_etag(request, *args, **kwargs):
+    version, _ = sightings_version(request)
+    query = hashlib.sha1(request.get_full_path().encode()).hexdigest()[:16]
+    # Rendered pages include the signed in user, so a browser shared between users must not reuse them.
+    return f'{version}-{request.user.pk or 0}-{query}'
+
+
+def sightings_page_etag(request, *args, **kwargs):
+    """
+    The sightings_etag of an HTML page. Pages embed the CSRF token their forms post with, so the ETag also changes
+    with the CSRF secret and the session, which are both replaced at login and logout; otherwise a 304 could leave
+    the browser posting a stale token.
+    """
+    session_key = request.session.session_key if hasattr(request, 'session') else None
+    secret = f"{request.META.get('CSRF_COOKIE', '')}:{session_key or ''}"
+    return f'{sightings_etag(request)}-{hashlib.sha1(secret.encode()).hexdigest()[:16]}'
+
+
+def sightings_last_modified(request, *args, **kwargs):
+    return sightings_version(request)[1]
+
+
+def cached_payload(request, build, cache=sighting_payloads):
+    """
+    Get the payload for this request's path, query and sightings version, calling build to render it on a miss.
+    """
+    version, _ = sightings_version(request)
+    key = (request.path, version, tuple(sorted((name, tuple(values)) for name, values in request.GET.lists())))
+    payload = cache.get(key)
+    if payload is None:
+        payload = build()
+        cache.set(key, payload)
+    return payload
@@ -0,0 +1,72 @@
+import base64
+
+import numpy as np
+
+# Compact payloads are JSON objects of base64 encoded little-endian typed arrays, one per column, plus a lookup table
+# of the animals they reference. The browser decodes each column straight into a typed array.
+
+
+def pack(values, dtype):
+    return base64.b64encode(np.asarray(values, dtype=dtype).tobytes()).decode('ascii')
+
+
+def pack_coordinates(longitudes, latitudes):
+    """
+    Pack coordinates as interleaved lon, lat float32 pairs (about a metre of precision in degrees).
+    """
+    coordinates = np.empty((len(longitudes), 2), dtype='<f4')
+    coordinates[:, 0] = longitudes
+    coordinates[:, 1] = latitudes
+    return base64.b64encode(coordinates.tobytes()).decode('ascii')
+
+
+def animal_lookup(animal_ids, animals):
+    """
+    Get the name and image paths of each distinct animal in animal_ids, keyed by id, from the animal catalog.
+    """
+    lookup = {}
+    for animal_id in np.unique(np.asarray(animal_ids, dtype=int)).tolist():
+        animal = animals.get(animal_id)
+        if animal is not None:
+            lookup[animal_id] = {'name': animal.name, 'logo_path': animal.logo_path, 'pin_path': animal.pin_path}
+    return lookup
+
+
+def compact_sightings(rows, animals):
+    """
+    Encode (id, epoch seconds, latitude, longitude, animal_id) rows as a compact columnar payload.
+    """
+    if rows:
+        ids, times, latitudes, longitudes, animal_ids = zip(*rows)
+    else:
+        ids, times, latitudes, longitudes, animal_ids = (), (), (), (), ()
+
+    return {
+        'count': len(rows),
+        'animals': animal_lookup(animal_ids, animals),
+        'coordinates': pack_coordinates(longitudes, latitudes),
+        'animal_ids': pack(animal_ids, '<u2'),
+        # Signed 64-bit, so sightings from before 1970 or after 2106 don't wrap.
+        'times': pack(times, '<i8'),
+        'ids': base64.b64encode(b''.join(sighting_id.bytes for sighting_id in ids)).decode('ascii'),
+    }
+
+
+def compact_clusters(rows, animals):
+    """
+    Encode (animal_id, cell_x, cell_y, count, latitude, longitude) cluster rows as a compact columnar payload.
+    """
+    if rows:
+        animal_ids, cell_xs, cell_ys, counts, latitudes, longitudes = zip(*rows)
+    else:
+        animal_ids, cell_xs, cell_ys, counts, latitudes, longitudes = (), (), (), (), (), ()
+
+    return {
+        'count': len(rows),
+        'animals': animal_lookup(animal_ids, animals),
+        'coordinates': pack_coordinates(longitudes, latitudes),
+        'animal_ids': pack(animal_ids, '<u2'),
+        'counts': pack(counts, '<u4'),
+        # Cell indices identify a cluster across overlapping bbox requests.
+        'cells': pack(np.column_stack([cell_xs, cell_ys]) if rows else (), '<i4'),
+    }
@@ -0,0 +1,24 @@
+from channels.generic.websocket import AsyncWebsocketConsumer
+from tethys_sdk.routing import consumer
+
+from .live import SIGHTINGS_GROUP
+
+
+@consumer(name='sighting_updates', url='sighting/updates')
+class SightingUpdatesConsumer(AsyncWebsocketConsumer):
+    """
+    Push sighting add and delete events to connected maps so they can patch their layers in place.
+    """
+
+    # The @consumer decorator checks the login in connect and then calls these.
+    async def authorized_connect(self):
+        await self.channel_layer.group_add(SIGHTINGS_GROUP, self.channel_name)
+
+    async def unauthorized_connect(self):
+        await self.close()
+
+    async def authorized_disconnect(self, close_code):
+        await self.channel_layer.group_discard(SIGHTINGS_GROUP, self.channel_name)
+
+    async def sighting_event(self, event):
+        await self.send(text_data=event['text'])
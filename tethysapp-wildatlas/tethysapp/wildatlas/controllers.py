@@ -1,16 +1,34 @@
-from datetime import datetime, timezone
-from dateutil import parser
+from asgiref.sync import sync_to_async
+from datetime import date, datetime, timedelta, timezone
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import condition
 from rest_framework.authentication import TokenAuthentication
 from rest_framework.decorators import api_view, authentication_classes
-from tethys_sdk.gizmos import MVView
+from tethys_sdk.gizmos import MVLayer, MVView
 from tethys_sdk.layouts import MapLayout
 from tethys_sdk.routing import controller
+import base64
+import copy
+import csv
+import io
 import json
 from pathlib import Path
+import uuid
 
 from .app import App
+from .caching import (
+    cached_payload, heatmap_tiles, sightings_etag, sightings_last_modified, sightings_page_etag, sightings_version
+)
+from .db import get_pool_status
+from .export import EXPORT_FORMATS
+from .ingest import clean_sighting, import_sightings, read_csv_rows, read_geojson_rows
+from .metrics import instrumented, render_metrics, span
 from .models import Animal
-from .models import Sighting
+from .models import PENDING, PendingSighting, Sighting, SightingDailyStat
+from .parks import BOUNDARY_LEVELS, NATIONAL_PARKS, get_park, get_park_boundary, level_for_zoom
+from .tiles import MAX_TILE_ZOOM, sighting_tiles
+from .writebehind import sighting_writer
 
 
 @controller(name="home", app_resources=True)
@@ -23,51 +41,78 @@ class HomeMap(MapLayout):
     basemaps = ['OpenStreetMap', 'ESRI']
     show_properties_popup = True
 
+    @instrumented(name='home')
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+    def get_context(self, request, context, *args, **kwargs):
+        # Everything in home outside this span is permission checks and template rendering.
+        with span('get_context'):
+            context = super().get_context(request, context, *args, **kwargs)
+            context['cluster_zoom_threshold'] = App.get_custom_setting('cluster_zoom_threshold')
+            context['cluster_cells_per_tile'] = CLUSTER_CELLS_PER_TILE
+            context['max_tile_zoom'] = MAX_TILE_ZOOM
+            context['national_parks'] = {
+                'levels': [min_zoom for min_zoom, _ in BOUNDARY_LEVELS],
+                'parks': [
+                    {'layer_id': park['name'], 'url': App.reverse('park_boundary', kwargs={'park_id': park['id']})}
+                    for park in NATIONAL_PARKS
+                ]
+            }
+        return context
+
     def build_geojson_layers(self, configs, selectable=True):
         layers = []
-        for config in configs:
-            with open(config['path'], 'r', encoding='utf-8') as f:
-                geojson = json.load(f)
-
-            layer = self.build_geojson_layer(
-                geojson=geojson,
-                layer_name=config['name'],
-                layer_title=config['title'],
-                layer_variable=config['variable'],
-                visible=True,
-                selectable=selectable
-            )
-            layers.append(layer)
+        with span('park_boundaries'):
+            for config in configs:
+                # Embed the coarsest cached boundary; the map fetches finer ones from park_boundary as it zooms in.
+                # build_geojson_layer modifies the features, so give it a copy of the cached boundary.
+                geojson = copy.deepcopy(get_park_boundary(config['path']).levels[0])
+
+                layer = self.build_geojson_layer(
+                    geojson=geojson,
+                    layer_name=config['name'],
+                    layer_title=config['title'],
+                    layer_variable=config['variable'],
+                    visible=True,
+                    selectable=selectable
+                )
+                layers.append(layer)
         return layers
 
-    def compose_layers(self, request, map_view, app_resources, *args, **kwargs):
-        sightings = Sighting.all()
-        features = []
-
-        for sighting in sightings:
-            feature = {
-                'type': 'Feature',
-                'geometry': {
-                    'type': 'Point',
-                    'coordinates': [sighting.longitude, sighting.latitude]
-                },
-                'properties': {
-                    'Animal': (
-                        f'{sighting.animal.name} '
-                        f'<img src="{sighting.animal.logo_path}" '
-                        f'alt="{sighting.animal.name}" width="30" height="30" border="0">'
-                    ),
-                    'Date': f'{sighting.date_time.isoformat()}',
-                    'Age': f'{datetime_to_age(sighting.date_time):.0f} hours',
-                    'Sighting Id': str(sighting.id),
-                    'pin_path': sighting.animal.pin_path
-                }
+    @classmethod
+    def build_density_layer(cls, layer_name, layer_title, url):
+        """
+        Build a hidden layer of heatmap_tile rasters. MapLayout only builds XYZ layers through its private
+        _build_mv_layer, so this gives the MVLayer the same layer data, popup exclusions included.
+        """
+        return MVLayer(
+            source='XYZ',
+            options={'url': url},
+            legend_title=layer_title,
+            layer_options={'visible': False, 'show_download': False},
+            legend_classes=[],
+            legend_extent=cls.map_extent,
+            feature_selection=False,
+            data={
+                'layer_id': layer_name,
+                'layer_name': layer_name,
+                'popup_title': layer_title,
+                'layer_variable': 'density',
+                'toggle_status': True,
+                'renamable': False,
+                'removable': False,
+                'show_legend': True,
+                'legend_url': None,
+                'excluded_properties': list(cls._default_popup_excluded_properties),
             }
-            features.append(feature)
+        )
 
+    def compose_layers(self, request, map_view, app_resources, *args, **kwargs):
+        # Features are loaded by the browser from the sighting_features endpoint for the visible extent only.
         sightings_collection = {
             'type': 'FeatureCollection',
-            'features': features,
+            'features': [],
             'crs': {
                 'type': 'name',
                 'properties': {
@@ -86,16 +131,19 @@ class HomeMap(MapLayout):
         )
 
         national_parks_configs = [
-            {
-                'path': Path(app_resources.path) / 'YellowstoneNationalPark.geojson',
-                'name': 'Yellowstone National Park',
-                'title': 'Yellowstone National Park',
-                'variable': 'Yellowstone National Park'
-            },
+            {**park, 'path': Path(app_resources.path) / park['file']} for park in NATIONAL_PARKS
         ]
 
         national_park_layers = self.build_geojson_layers(national_parks_configs, selectable=False)
 
+        # Density rasters rendered by heatmap_tile, one layer for all animals and one per animal, hidden by default.
+        heatmap_url = App.reverse('heatmap_tile', kwargs={'z': 0, 'x': 0, 'y': 0}).replace('/0/0/0/', '/{z}/{x}/{y}/')
+        density_layers = [self.build_density_layer('density-all', 'All Animals', heatmap_url)]
+        for animal in Animal.catalog().values():
+            density_layers.append(
+                self.build_density_layer(f'density-{animal.id}', animal.name, f'{heatmap_url}?animal_id={animal.id}')
+            )
+
         layer_groups = [
             self.build_layer_group(
                 id='Sightings',
@@ -103,6 +151,12 @@ class HomeMap(MapLayout):
                 layer_control='checkbox',
                 layers=[sightings_layer]
             ),
+            self.build_layer_group(
+                id='Density',
+                display_name='Sighting Density',
+                layer_control='checkbox',
+                layers=density_layers
+            ),
             self.build_layer_group(
                 id='all-layers',
                 display_name='National Parks',
@@ -111,15 +165,11 @@ class HomeMap(MapLayout):
             )
         ]
 
-        if len(sightings) < 2:
+        with span('sighting_extent'):
+            extent = cached_payload(request, lambda: Sighting.extent() or False)
+        if not extent:
             # No sightings, zoom all the way out.
             extent = [-180.0, -90.0, 180.0, 90.0]
-        else:
-            min_lat = min(s.latitude for s in sightings)
-            max_lat = max(s.latitude for s in sightings)
-            min_lon = min(s.longitude for s in sightings)
-            max_lon = max(s.longitude for s in sightings)
-            extent = [min_lon, max_lat, max_lon, min_lat]
 
         map_view.view = MVView(
             projection='EPSG:4326',
@@ -129,68 +179,148 @@ class HomeMap(MapLayout):
         return layer_groups
 
 
-# TODO add AnimalId validation
 def process_sighting_form(post_data):
     """
     Clean and validate form POST data.
     Returns bool is valid, dict of parsed data, string error message if invalid.
     """
-    cleaned_data = {}
-    error_messages = []
-    try:
-        dt = parser.isoparse(post_data.get('date_time', ''))
-        dt_utc = dt.astimezone(timezone.utc)
+    cleaned_data, errors = clean_sighting(
+        post_data.get('date_time', ''),
+        post_data.get('animalId', ''),
+        post_data.get('latitude', ''),
+        post_data.get('longitude', ''),
+        Animal.catalog()
+    )
+    error_messages = [{'category': "danger", 'text': error} for error in errors]
 
-        if dt_utc > datetime.now(timezone.utc):
-            error_messages.append({'category': "danger", 'text': 'Date/time cannot be in the future.'})
+    valid = len(error_messages) == 0
+    return valid, cleaned_data, error_messages
 
-        cleaned_data['date_time'] = dt_utc
-    except (ValueError, TypeError):
-        error_messages.append({'category': "danger", 'text': 'Invalid or missing date/time.'})
 
-    try:
-        cleaned_data['animal_id'] = int(post_data.get('animalId', ''))
-    except (TypeError, ValueError):
-        error_messages.append({'category': "danger", 'text': 'Invalid or missing animal ID.'})
+def datetime_to_age(date):
+    return (datetime.now(timezone.utc) - date).total_seconds() / 3600
+
+
+def sighting_to_feature(sighting, animals=None):
+    animal = (animals or Animal.catalog())[sighting.animal_id]
+    return {
+        'type': 'Feature',
+        'id': str(sighting.id),
+        'geometry': {
+            'type': 'Point',
+            'coordinates': [sighting.longitude, sighting.latitude]
+        },
+        'properties': {
+            'Animal': (
+                f'{animal.name} '
+                f'<img src="{animal.logo_path}" '
+                f'alt="{animal.name}" width="30" height="30" border="0">'
+            ),
+            'Date': f'{sighting.date_time.isoformat()}',
+            'Age': f'{datetime_to_age(sighting.date_time):.0f} hours',
+            'Sighting Id': str(sighting.id),
+            'pin_path': animal.pin_path,
+            'layer_name': 'Animal Sightings'
+        }
+    }
+
+
+SIGHTINGS_PAGE_SIZE = 50
+MAX_SIGHTINGS_PAGE_SIZE = 500
+
+# Number of cluster cells across one 256px map tile at any zoom level.
+CLUSTER_CELLS_PER_TILE = 4
+
+MAX_IDEMPOTENCY_KEY_LENGTH = 100
+
+NEAR_DEFAULT_RADIUS = 5000
+NEAR_MAX_RADIUS = 100000
+NEAR_DEFAULT_LIMIT = 100
+NEAR_MAX_LIMIT = 1000
+
+PLAYBACK_STEPS = {'hour': timedelta(hours=1), 'day': timedelta(days=1)}
+
+STATS_DEFAULT_DAYS = 30
+STATS_MAX_DAYS = 366
+
+
+def parse_filter_time(value, end=False):
+    """
+    Parse an ISO 8601 date/time filter as an aware UTC datetime. Dates and times without an offset are UTC; a date on
+    its own means the start of that day, or its last moment for an (inclusive) end.
+    """
+    # Imported on first use to keep app startup light.
+    from dateutil import parser
 
     try:
-        latitude = float(post_data.get('latitude', ''))
-        longitude = float(post_data.get('longitude', ''))
-    except (TypeError, ValueError):
-        error_messages.append({'category': "danger", 'text': 'Invalid or missing latitude/longitude.'})
+        day = date.fromisoformat(value)
+    except ValueError:
+        parsed = parser.isoparse(value)
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return parsed.astimezone(timezone.utc)
 
-    if not (-90 <= latitude <= 90):
-        error_messages.append({'category': "danger", 'text': 'Latitude must be between -90 and 90.'})
-    cleaned_data['latitude'] = latitude
+    parsed = datetime.combine(day, datetime.min.time(), tzinfo=timezone.utc)
+    if end:
+        parsed += timedelta(days=1) - timedelta(microseconds=1)
+    return parsed
 
-    if not (-180 <= longitude <= 180):
-        error_messages.append({'category': "danger", 'text': 'Longitude must be between -180 and 180.'})
-    cleaned_data['longitude'] = longitude
 
-    valid = len(error_messages) == 0
-    return valid, cleaned_data, error_messages
+def parse_sighting_ids(ids):
+    """
+    Parse a list, or comma separated string, of sighting ids.
+    Returns list of UUIDs, string error message if invalid.
+    """
+    if isinstance(ids, str):
+        ids = ids.split(',')
+    try:
+        return [uuid.UUID(str(sighting_id)) for sighting_id in ids], None
+    except (TypeError, ValueError):
+        return None, 'ids must be a list of sighting ids.'
 
 
-def datetime_to_age(date):
-    return (datetime.now(timezone.utc) - date).total_seconds() / 3600
+def parse_sighting_filters(query_data):
+    """
+    Parse the bbox, time window and animal filters shared by the sighting query endpoints.
+    Returns dict of filters, string error message if invalid.
+    """
+    filters = {'bbox': None, 'start': None, 'end': None, 'animal_id': None}
+
+    bbox = query_data.get('bbox')
+    if bbox:
+        # A query string gives a comma separated string, a JSON body may give a list.
+        if isinstance(bbox, str):
+            bbox = bbox.split(',')
+        try:
+            min_lon, min_lat, max_lon, max_lat = (float(value) for value in bbox)
+        except (TypeError, ValueError):
+            return filters, 'bbox must be min_lon,min_lat,max_lon,max_lat.'
+        filters['bbox'] = (min_lon, min_lat, max_lon, max_lat)
+
+    for key in ('start', 'end'):
+        value = query_data.get(key)
+        if not value:
+            continue
+        try:
+            filters[key] = parse_filter_time(value, end=key == 'end')
+        except (TypeError, ValueError):
+            return filters, f'Invalid {key} date/time.'
+
+    if query_data.get('animal_id'):
+        try:
+            filters['animal_id'] = int(query_data['animal_id'])
+        except (TypeError, ValueError):
+            return filters, 'animal_id must be an integer.'
+
+    return filters, None
 
 
 # Controller for adding a new animal sighting
 @controller(url='sighting/add')
+@instrumented
 def add_sighting(request):
-    registered_animals = Animal.all()
-
-    registered_animals.sort(key=lambda x: x.name)
-
-    selectable_animals = []
-    for animal in sorted(registered_animals, key=lambda x: x.name):
-        selectable_animals.append(
-            {
-                'id': animal.id,
-                'name': animal.name,
-                'logo_path': animal.logo_path
-            }
-        )
+    # The catalog is already sorted by name.
+    selectable_animals = list(Animal.catalog().values())
 
     if request.method == 'POST':
         valid, valid_data, flash_messages = process_sighting_form(request.POST)
@@ -209,42 +339,558 @@ def add_sighting(request):
         )
         return App.redirect(App.reverse('home'))
 
-    registered_animals.sort(key=lambda x: x.name)
-
     context = {
         'animals': selectable_animals,
     }
     return App.render(request, 'add_sighting.html', context)
 
 
+def cached_json_response(request, render):
+    """
+    Respond with the JSON encoded result of render, cached per path, query and sightings data version. Clients must
+    revalidate, which the condition decorator answers with 304 while the data is unchanged.
+    """
+    payload = cached_payload(request, lambda: json.dumps(render(), cls=DjangoJSONEncoder))
+    response = HttpResponse(payload, content_type='application/json')
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+@controller(url='sighting/submit', methods=['POST'], login_required=False)
+@instrumented
+async def submit_sighting(request):
+    """
+    Queue a sighting for the background writer and respond right away with its pending id. Send an Idempotency-Key
+    header (or idempotency_key field) so retried submissions return the original id instead of adding it again.
+    """
+    # Checked here rather than by the controller, whose login check can't wrap an async view.
+    if not await sync_to_async(lambda: request.user.is_authenticated)():
+        return JsonResponse({'error': 'Authentication required.'}, status=401)
+
+    animals = await sync_to_async(Animal.catalog)()
+    cleaned_data, errors = clean_sighting(
+        request.POST.get('date_time', ''),
+        request.POST.get('animalId', request.POST.get('animal_id', '')),
+        request.POST.get('latitude', ''),
+        request.POST.get('longitude', ''),
+        animals
+    )
+    if errors:
+        return JsonResponse({'errors': errors}, status=400)
+
+    idempotency_key = request.headers.get('Idempotency-Key') or request.POST.get('idempotency_key') or None
+    if idempotency_key is not None and len(idempotency_key) > MAX_IDEMPOTENCY_KEY_LENGTH:
+        return JsonResponse({'errors': ['Idempotency key is too long.']}, status=400)
+
+    pending_id, created = await sync_to_async(PendingSighting.enqueue)(idempotency_key=idempotency_key, **cleaned_data)
+    sighting_writer.notify()
+
+    return JsonResponse({
+        'id': str(pending_id),
+        'status_url': App.reverse('sighting_status', kwargs={'sighting_id': pending_id})
+    }, status=202 if created else 200)
+
+
+@controller(url='sighting/submit/{sighting_id}')
+@instrumented
+def sighting_status(request, sighting_id):
+    try:
+        sighting_id = uuid.UUID(sighting_id)
+    except ValueError:
+        raise Http404('Unknown sighting.')
+
+    found = PendingSighting.status_of(sighting_id)
+    if found is None:
+        raise Http404('Unknown sighting.')
+    status, written_as = found
+    if status == PENDING:
+        # It may have been queued before this process started, so make sure a writer is running.
+        sighting_writer.notify()
+    # A submission repeating a recorded sighting is merged into it, so the sighting has a different id.
+    return JsonResponse({'id': str(sighting_id), 'status': status, 'sighting_id': str(written_as)})
+
+
+@controller(url='sighting/features')
+@instrumented
+@condition(etag_func=sightings_etag, last_modified_func=sightings_last_modified)
+def sighting_features(request):
+    filters, error = parse_sighting_filters(request.GET)
+    if error:
+        return JsonResponse({'error': error}, status=400)
+
+    def render():
+        if request.GET.get('format') == 'compact':
+            from .compact import compact_sightings
+            return compact_sightings(Sighting.filter_rows(**filters), Animal.catalog())
+
+        sightings = Sighting.filter(**filters)
+        return {
+            'type': 'FeatureCollection',
+            'features': [sighting_to_feature(sighting) for sighting in sightings]
+        }
+
+    return cached_json_response(request, render)
+
+
+@controller(url='sighting/timeline')
+@instrumented
+@condition(etag_func=sightings_etag, last_modified_func=sightings_last_modified)
+def sighting_timeline(request):
+    """
+    Non-empty hour or day buckets of the sightings matching the filters, with their counts, for the time slider.
+    """
+    filters, error = parse_sighting_filters(request.GET)
+    step = request.GET.get('step', 'day')
+    if step not in PLAYBACK_STEPS:
+        error = error or f'step must be one of {", ".join(PLAYBACK_STEPS)}.'
+    if error:
+        return JsonResponse({'error': error}, status=400)
+
+    def render():
+        return {
+            'step': step,
+            'buckets': [
+                {'start': bucket.isoformat(), 'end': (bucket + PLAYBACK_STEPS[step]).isoformat(), 'count': count}
+                for bucket, count in Sighting.timeline(step, **filters)
+            ]
+        }
+
+    return cached_json_response(request, render)
+
+
+@controller(url='sighting/playback')
+@instrumented
+@condition(etag_func=sightings_etag, last_modified_func=sightings_last_modified)
+def sighting_playback(request):
+    """
+    Compact sightings for one time slider step, sampled down to the point budget when the step has more. Steps
+    are half-open, start <= date_time < end, since each one ends where the next begins.
+    """
+    filters, error = parse_sighting_filters(request.GET)
+    if not error and (filters['start'] is None or filters['end'] is None):
+        error = 'start and end are required.'
+    if not error:
+        # The filters include end; timestamps are stored to the microsecond, so stop one microsecond short of it.
+        filters['end'] -= timedelta(microseconds=1)
+    max_budget = App.get_custom_setting('playback_point_budget')
+    try:
+        budget = min(int(request.GET.get('budget', max_budget)), max_budget)
+        if budget < 1:
+            raise ValueError
+    except ValueError:
+        error = error or 'budget must be a positive integer.'
+    if error:
+        return JsonResponse({'error': error}, status=400)
+
+    def render():
+        from .compact import compact_sightings
+        rows, total = Sighting.sample_rows(budget, **filters)
+        return {**compact_sightings(rows, Animal.catalog()), 'total': total}
+
+    return cached_json_response(request, render)
+
+
+@controller(url='sighting/near')
+@instrumented
+def sighting_near(request):
+    """
+    Sightings within radius metres of lat/lon, nearest first, optionally filtered by start, end and animal_id.
+    """
+    filters, error = parse_sighting_filters(request.GET)
+    try:
+        latitude = float(request.GET.get('lat', ''))
+        longitude = float(request.GET.get('lon', ''))
+        radius = float(request.GET.get('radius', NEAR_DEFAULT_RADIUS))
+        limit = int(request.GET.get('limit', NEAR_DEFAULT_LIMIT))
+    except ValueError:
+        error = error or 'lat, lon and radius must be numbers and limit an integer.'
+    else:
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            error = error or 'lat/lon out of range.'
+        elif not 0 < radius <= NEAR_MAX_RADIUS:
+            error = error or f'radius must be between 0 and {NEAR_MAX_RADIUS} metres.'
+        elif not 1 <= limit <= NEAR_MAX_LIMIT:
+            error = error or f'limit must be between 1 and {NEAR_MAX_LIMIT}.'
+    if error:
+        return JsonResponse({'error': error}, status=400)
+
+    sightings = Sighting.near(
+        latitude, longitude, radius,
+        start=filters['start'], end=filters['end'], animal_id=filters['animal_id'], limit=limit
+    )
+    return JsonResponse({
+        'sightings': [
+            {**sighting_to_row(sighting), 'distance': round(sighting.distance, 1)} for sighting in sightings
+        ]
+    })
+
+
+@controller(url='sighting/clusters')
+@instrumented
+@condition(etag_func=sightings_etag, last_modified_func=sightings_last_modified)
+def sighting_clusters(request):
+    filters, error = parse_sighting_filters(request.GET)
+    try:
+        zoom = int(request.GET.get('zoom', ''))
+    except ValueError:
+        error = error or 'zoom must be an integer.'
+    else:
+        if not 0 <= zoom <= MAX_TILE_ZOOM:
+            error = error or f'zoom must be between 0 and {MAX_TILE_ZOOM}.'
+    if error:
+        return JsonResponse({'error': error}, status=400)
+
+    def render():
+        cell_size = 360 / (2 ** zoom * CLUSTER_CELLS_PER_TILE)
+        clusters = Sighting.clusters(cell_size, **filters)
+        animals = Animal.catalog()
+        if request.GET.get('format') == 'compact':
+            from .compact import compact_clusters
+            return compact_clusters(clusters, animals)
+
+        features = []
+        for cluster in clusters:
+            animal = animals[cluster.animal_id]
+            features.append({
+                'type': 'Feature',
+                'id': f'{zoom}/{cluster.animal_id}/{cluster.cell_x:.0f}/{cluster.cell_y:.0f}',
+                'geometry': {
+                    'type': 'Point',
+                    'coordinates': [cluster.longitude, cluster.latitude]
+                },
+                'properties': {
+                    'Animal': animal.name,
+                    'Sightings': cluster.count,
+                    'animal_id': cluster.animal_id,
+                    'pin_path': animal.pin_path,
+                    'layer_name': 'Animal Sightings'
+                }
+            })
+        return {'type': 'FeatureCollection', 'features': features}
+
+    return cached_json_response(request, render)
+
+
+@controller(url='tiles/{z}/{x}/{y}')
+@instrumented
+def sighting_tile(request, z, x, y):
+    try:
+        z, x, y = int(z), int(x), int(y)
+    except ValueError:
+        return JsonResponse({'error': 'z, x and y must be integers.'}, status=400)
+    if not (0 <= z <= MAX_TILE_ZOOM and 0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        return JsonResponse({'error': 'Tile out of range.'}, status=404)
+
+    # Other processes write too; their changes show up as a new data version.
+    version, _ = sightings_version(request)
+    tile = sighting_tiles.get((z, x, y), version)
+    if tile is None:
+        generation = sighting_tiles.generation
+        tile = Sighting.tile(z, x, y)
+        sighting_tiles.set((z, x, y), tile, generation=generation, version=version)
+
+    response = HttpResponse(tile, content_type='application/vnd.mapbox-vector-tile')
+    response['Cache-Control'] = 'private, max-age=60'
+    return response
+
+
+@controller(url='heatmap/{z}/{x}/{y}')
+@instrumented
+@condition(etag_func=sightings_etag, last_modified_func=sightings_last_modified)
+def heatmap_tile(request, z, x, y):
+    """
+    PNG sighting density tile, optionally for one animal_id and a start/end time window.
+    """
+    # The renderer pulls in NumPy, so it is imported on the first tile request rather than at startup.
+    from .heatmap import heatmap_bounds, render_heatmap_tile
+
+    try:
+        z, x, y = int(z), int(x), int(y)
+    except ValueError:
+        return JsonResponse({'error': 'z, x and y must be integers.'}, status=400)
+    if not (0 <= z <= MAX_TILE_ZOOM and 0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        return JsonResponse({'error': 'Tile out of range.'}, status=404)
+    filters, error = parse_sighting_filters(request.GET)
+    if error:
+        return JsonResponse({'error': error}, status=400)
+    filters['bbox'] = heatmap_bounds(z, x, y)
+
+    tile = cached_payload(
+        request, lambda: render_heatmap_tile(z, x, y, Sighting.locations(**filters)), cache=heatmap_tiles
+    )
+    response = HttpResponse(tile, content_type='image/png')
+    response['Cache-Control'] = 'private, max-age=60'
+    return response
+
+
+@controller(url='parks/{park_id}/boundary', app_resources=True)
+@instrumented
+def park_boundary(request, park_id, app_resources):
+    park = get_park(park_id)
+    if park is None:
+        raise Http404('Unknown national park.')
+    try:
+        zoom = int(request.GET.get('zoom', 0))
+    except ValueError:
+        return JsonResponse({'error': 'zoom must be an integer.'}, status=400)
+
+    boundary = get_park_boundary(Path(app_resources.path) / park['file'])
+    response = HttpResponse(boundary.encoded_levels[level_for_zoom(zoom)], content_type='application/json')
+    response['Cache-Control'] = 'private, max-age=86400'
+    return response
+
+
+def sighting_to_row(sighting):
+    animal = Animal.catalog()[sighting.animal_id]
+    return {
+        'id': str(sighting.id),
+        'date_time': sighting.date_time.isoformat(),
+        'age_in_hours': f'{datetime_to_age(sighting.date_time):.0f}',
+        'latitude': sighting.latitude,
+        'longitude': sighting.longitude,
+        'animal_id': sighting.animal_id,
+        'observations': sighting.observations,
+        'name': animal.name,
+        'logo_path': animal.logo_path
+    }
+
+
+def encode_cursor(cursor):
+    date_time, sighting_id = cursor
+    return base64.urlsafe_b64encode(f'{date_time.isoformat()}|{sighting_id}'.encode()).decode()
+
+
+def decode_cursor(value):
+    date_time, sighting_id = base64.urlsafe_b64decode(value.encode()).decode().split('|')
+    return datetime.fromisoformat(date_time), uuid.UUID(sighting_id)
+
+
+def parse_page_params(query_data):
+    """
+    Parse the keyset pagination and filter parameters of the sighting list endpoints.
+    Returns dict of Sighting.page arguments, string error message if invalid.
+    """
+    filters, error = parse_sighting_filters(query_data)
+    params = {
+        'limit': SIGHTINGS_PAGE_SIZE,
+        'cursor': None,
+        'animal_id': filters['animal_id'],
+        'start': filters['start'],
+        'end': filters['end']
+    }
+    if error:
+        return params, error
+
+    try:
+        if query_data.get('limit'):
+            params['limit'] = min(max(int(query_data['limit']), 1), MAX_SIGHTINGS_PAGE_SIZE)
+    except ValueError:
+        return params, 'limit must be an integer.'
+
+    if query_data.get('cursor'):
+        try:
+            params['cursor'] = decode_cursor(query_data['cursor'])
+        except (ValueError, UnicodeDecodeError):
+            return params, 'Invalid cursor.'
+
+    return params, None
+
+
+@controller(url='sighting/stats')
+@instrumented
+def sighting_stats(request):
+    try:
+        days = int(request.GET.get('days', STATS_DEFAULT_DAYS))
+    except ValueError:
+        return JsonResponse({'error': 'days must be an integer.'}, status=400)
+    if not 1 <= days <= STATS_MAX_DAYS:
+        return JsonResponse({'error': f'days must be between 1 and {STATS_MAX_DAYS}.'}, status=400)
+
+    per_animal, daily = SightingDailyStat.summary(days)
+    animals = Animal.catalog()
+    daily_counts = {}
+    for animal_id, day, count in daily:
+        daily_counts.setdefault(animal_id, {})[day.isoformat()] = count
+
+    return JsonResponse({
+        'days': days,
+        'total': sum(row.count for row in per_animal),
+        'animals': [
+            {
+                'animal_id': row.animal_id,
+                'animal': animals[row.animal_id].name if row.animal_id in animals else None,
+                'count': row.count,
+                'last_seen': row.last_seen.isoformat(),
+                'daily': daily_counts.get(row.animal_id, {})
+            }
+            for row in sorted(per_animal, key=lambda row: row.count, reverse=True)
+        ]
+    })
+
+
+@controller(url='db/pool')
+@instrumented
+def pool_status(request):
+    return JsonResponse(get_pool_status())
+
+
+@controller(url='metrics', login_required=False)
+def prometheus_metrics(request):
+    return HttpResponse(render_metrics(get_pool_status()), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
 @controller(url='sighting/list')
+@instrumented
+@condition(etag_func=sightings_page_etag, last_modified_func=sightings_last_modified)
 def list_sightings(request):
-    sightings = Sighting.all()
-    sightings_data = []
-    for sighting in sightings:
-        sighting_age = datetime_to_age(sighting.date_time)
-        sightings_data.append({
-            'id': sighting.id,
-            'date_time': sighting.date_time.isoformat(),
-            'age_in_hours': f'{sighting_age:.0f}',
-            'latitude': sighting.latitude,
-            'longitude': sighting.longitude,
-            'name': sighting.animal.name,
-            'logo_path': sighting.animal.logo_path
-        })
-    sightings_data.sort(key=lambda x: x['date_time'], reverse=True)
+    params, error = parse_page_params(request.GET)
+    if error:
+        params, _ = parse_page_params({})
+
+    sightings, next_cursor = Sighting.page(**params)
+
+    # Keep the filters, minus the cursor, on the pagination links.
+    query = request.GET.copy()
+    query.pop('cursor', None)
+    next_url = None
+    if next_cursor is not None:
+        query['cursor'] = encode_cursor(next_cursor)
+        next_url = f'?{query.urlencode()}'
+        query.pop('cursor')
+
+    # The stats above the first page count every sighting matching the filters, mostly from the daily statistics.
+    total = None
+    if params['cursor'] is None:
+        total = SightingDailyStat.total(params['animal_id'], params['start'], params['end'])
+
     context = {
-        'sightings': sightings_data
+        'sightings': [sighting_to_row(sighting) for sighting in sightings],
+        'animals': Animal.catalog().values(),
+        'filters': request.GET,
+        'is_first_page': params['cursor'] is None,
+        'total': total,
+        'first_url': f'?{query.urlencode()}',
+        'next_url': next_url,
+        'export_formats': list(EXPORT_FORMATS),
+        'export_query': query.urlencode(),
+        'messages': [{'category': 'danger', 'text': error}] if error else []
     }
-    return App.render(request, 'list_sightings.html', context)
+    response = App.render(request, 'list_sightings.html', context)
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+@controller(url='sighting/list/json')
+@instrumented
+@condition(etag_func=sightings_etag, last_modified_func=sightings_last_modified)
+def list_sightings_json(request):
+    params, error = parse_page_params(request.GET)
+    if error:
+        return JsonResponse({'error': error}, status=400)
+
+    def render():
+        sightings, next_cursor = Sighting.page(**params)
+        return {
+            'sightings': [sighting_to_row(sighting) for sighting in sightings],
+            'next_cursor': encode_cursor(next_cursor) if next_cursor is not None else None
+        }
+
+    return cached_json_response(request, render)
+
+
+@controller(url='sighting/export/{file_format}')
+@instrumented
+def export_sightings(request, file_format):
+    if file_format not in EXPORT_FORMATS:
+        raise Http404('Unknown export format.')
+    filters, error = parse_sighting_filters(request.GET)
+    if error:
+        return JsonResponse({'error': error}, status=400)
+
+    encode, content_type = EXPORT_FORMATS[file_format]
+    response = StreamingHttpResponse(encode(Sighting.stream(**filters)), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="sightings.{file_format}"'
+    return response
+
+
+@api_view(['POST'])
+@controller(url='sighting/import', methods=['POST'], name='wildatlas_sighting_import')
+@instrumented
+@authentication_classes((TokenAuthentication,))
+def import_sightings_view(request):
+    upload = request.FILES.get('file')
+    if upload is None:
+        return JsonResponse({'error': 'Upload a CSV or GeoJSON file in the "file" field.'}, status=400)
+
+    file_format = request.POST.get('format') or Path(upload.name).suffix.lstrip('.').lower()
+    readers = {'csv': read_csv_rows, 'geojson': read_geojson_rows, 'json': read_geojson_rows}
+    if file_format not in readers:
+        return JsonResponse({'error': 'format must be csv or geojson.'}, status=400)
+
+    with io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='') as text_file:
+        try:
+            report = import_sightings(readers[file_format](text_file))
+        except (ValueError, csv.Error) as e:
+            return JsonResponse({'error': f'Could not read file: {e}'}, status=400)
+
+    return JsonResponse(report)
 
 
 @api_view(['DELETE'])
 @controller(url='sighting/delete/{sighting_id}', methods=['POST'], name='wildatlas_sighting_delete')
+@instrumented
 @authentication_classes((TokenAuthentication,))
 def delete_sighting_view(request, sighting_id):
     if request.method == 'POST':
-        Sighting.delete(sighting_id)
+        Sighting.delete(sighting_id, archive=App.get_custom_setting('archive_deleted_sightings'))
         return App.redirect(App.reverse('list_sightings'))
 
     return App.redirect(App.reverse('list_sightings'))
+
+
+@api_view(['POST'])
+@controller(url='sighting/delete', methods=['POST'], name='wildatlas_sighting_bulk_delete')
+@instrumented
+@authentication_classes((TokenAuthentication,))
+def bulk_delete_sightings_view(request):
+    """
+    Delete the sightings listed in "ids" and/or matching the bbox, start, end and animal_id filters in one statement.
+    "archive" overrides the archive_deleted_sightings setting.
+    """
+    filters, error = parse_sighting_filters(request.data)
+    if error:
+        return JsonResponse({'error': error}, status=400)
+
+    ids = request.data.get('ids')
+    if ids is not None:
+        ids, error = parse_sighting_ids(ids)
+        if error:
+            return JsonResponse({'error': error}, status=400)
+
+    archive = request.data.get('archive')
+    if archive is None:
+        archive = App.get_custom_setting('archive_deleted_sightings')
+    elif isinstance(archive, str):
+        archive = archive.lower() in ('1', 'true', 'yes')
+
+    try:
+        deleted = Sighting.delete_many(ids=ids, archive=bool(archive), **filters)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    return JsonResponse({'deleted': deleted, 'archived': bool(archive)})
+
+
+@api_view(['POST'])
+@controller(url='sighting/restore', methods=['POST'], name='wildatlas_sighting_restore')
+@instrumented
+@authentication_classes((TokenAuthentication,))
+def restore_sightings_view(request):
+    """
+    Move the archived sightings listed in "ids" back onto the map.
+    """
+    ids, error = parse_sighting_ids(request.data.get('ids'))
+    if error:
+        return JsonResponse({'error': error}, status=400)
+
+    return JsonResponse({'restored': Sighting.restore(ids)})
@@ -0,0 +1,192 @@
+from contextlib import contextmanager
+import threading
+import time
+
+from django.core.signals import got_request_exception, request_finished
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy.pool import QueuePool
+
+from .app import App
+from .metrics import instrument_engine
+
+
+class PoolMetrics:
+    """
+    Running connection pool counters for one process.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.timeouts = 0
+        self.overflow_peak = 0
+
+    def record_checkout(self, waited, seconds, overflow):
+        with self._lock:
+            self.checkouts += 1
+            if waited:
+                self.waits += 1
+                self.wait_seconds += seconds
+            self.overflow_peak = max(self.overflow_peak, overflow)
+
+    def record_timeout(self, seconds):
+        with self._lock:
+            self.waits += 1
+            self.wait_seconds += seconds
+            self.timeouts += 1
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                'checkouts': self.checkouts,
+                'waits': self.waits,
+                'wait_seconds': round(self.wait_seconds, 6),
+                'timeouts': self.timeouts,
+                'overflow_peak': self.overflow_peak,
+            }
+
+
+pool_metrics = PoolMetrics()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool that counts checkouts and the checkouts that had to wait for a connection to be returned.
+    """
+
+    def __init__(self, creator, max_overflow=10, **kwargs):
+        self.max_overflow = max_overflow
+        super().__init__(creator, max_overflow=max_overflow, **kwargs)
+
+    def _do_get(self):
+        # No idle connection and no overflow left means this checkout blocks until another one is returned.
+        waited = self.checkedin() == 0 and 0 <= self.max_overflow <= self.overflow()
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            pool_metrics.record_timeout(time.perf_counter() - started)
+            raise
+        pool_metrics.record_checkout(waited, time.perf_counter() - started, self.overflow())
+        return connection
+
+
+_engine = None
+_session_factory = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    """
+    Get the process-wide engine for the primary database, creating it from the app settings on first use.
+    """
+    global _engine, _session_factory
+    if _engine is not None:
+        return _engine
+
+    with _engine_lock:
+        if _engine is None:
+            url = make_url(App.get_persistent_store_database('primary_db', as_url=True))
+            connect_args = {}
+            statement_timeout = App.get_custom_setting('db_statement_timeout')
+            if statement_timeout and url.get_backend_name() == 'postgresql':
+                connect_args['options'] = f'-c statement_timeout={int(statement_timeout)}'
+
+            _engine = create_engine(
+                url,
+                poolclass=InstrumentedQueuePool,
+                pool_size=App.get_custom_setting('db_pool_size'),
+                max_overflow=App.get_custom_setting('db_max_overflow'),
+                pool_timeout=App.get_custom_setting('db_pool_timeout'),
+                pool_pre_ping=True,
+                connect_args=connect_args
+            )
+            instrument_engine(_engine)
+            _session_factory = sessionmaker(bind=_engine)
+        return _engine
+
+
+def bind_engine(engine):
+    """
+    Use an existing engine instead of one created from the app settings, e.g. a scratch database for benchmarks.
+    """
+    global _engine, _session_factory
+    with _engine_lock:
+        instrument_engine(engine)
+        _engine = engine
+        _session_factory = sessionmaker(bind=engine)
+    request_session.remove()
+
+
+def new_session():
+    """
+    Open a session of its own on the shared engine, for work that outlives the request session (e.g. streaming).
+    """
+    get_engine()
+    return _session_factory()
+
+
+# One session per thread. Django serves each request on a single thread and the session is removed when it finishes.
+request_session = scoped_session(new_session)
+
+
+@contextmanager
+def session_scope():
+    """
+    Use the current request's session. The session stays open, holding one pooled connection, until the request
+    finishes; callers commit their own writes. The transaction is rolled back if the block raises.
+    """
+    session = request_session()
+    try:
+        yield session
+    except Exception:
+        session.rollback()
+        raise
+
+
+@contextmanager
+def unit_of_work():
+    """
+    Scope a session to a block of work outside a request, e.g. a management command or background thread.
+    """
+    try:
+        with session_scope() as session:
+            yield session
+    finally:
+        request_session.remove()
+
+
+def lift_statement_timeout(session):
+    """
+    Lift the db_statement_timeout for the rest of the session's current transaction, for maintenance that rewrites
+    whole tables or months of rows and would otherwise be cancelled part way.
+    """
+    session.execute(text('SET LOCAL statement_timeout = 0'))
+
+
+def get_pool_status():
+    """
+    Get the current state of the connection pool merged with the running checkout counters.
+    """
+    pool = get_engine().pool
+    return {
+        'size': pool.size(),
+        'checked_in': pool.checkedin(),
+        'checked_out': pool.checkedout(),
+        'overflow': max(pool.overflow(), 0),
+        'max_overflow': pool.max_overflow,
+        **pool_metrics.as_dict(),
+    }
+
+
+def _end_request(**kwargs):
+    request_session.remove()
+
+
+request_finished.connect(_end_request, dispatch_uid='wildatlas_end_request')
+got_request_exception.connect(_end_request, dispatch_uid='wildatlas_request_exception')
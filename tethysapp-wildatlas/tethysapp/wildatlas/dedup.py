@@ -0,0 +1,70 @@
+from collections import deque, namedtuple
+from datetime import timedelta
+import math
+
+from .app import App
+
+# Mean Earth radius in metres.
+EARTH_RADIUS = 6371008.8
+
+# How close two reports of the same animal must be to count as one sighting: distance in metres and window as a
+# timedelta either side.
+Tolerance = namedtuple('Tolerance', ['distance', 'window'])
+
+_tolerance = None
+
+
+def dedup_tolerance():
+    """
+    Get the Tolerance from the dedup_distance and dedup_window settings, read once per process, or None when
+    merging is turned off.
+    """
+    global _tolerance
+    if _tolerance is None:
+        distance = App.get_custom_setting('dedup_distance') or 0
+        minutes = App.get_custom_setting('dedup_window') or 0
+        _tolerance = Tolerance(distance, timedelta(minutes=minutes)) if distance > 0 and minutes > 0 else False
+    return _tolerance or None
+
+
+def distance(latitude1, longitude1, latitude2, longitude2):
+    """
+    Great-circle distance in metres between two points in degrees.
+    """
+    phi1, phi2 = math.radians(latitude1), math.radians(latitude2)
+    a = (
+        math.sin((phi2 - phi1) / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(longitude2 - longitude1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS * math.asin(math.sqrt(min(a, 1.0)))
+
+
+def merge_rows(rows, tolerance, merged=None):
+    """
+    Merge sighting dicts that repeat an earlier row of the same animal within the tolerance into that row. Returns
+    the surviving rows, oldest first, each with the number of reports it stands for in 'observations'. If merged is
+    given, it gets the id of each merged row mapped to the id of the row it was merged into.
+    """
+    survivors = []
+    recent = {}
+    for row in sorted(rows, key=lambda row: row['date_time']):
+        # Survivors of this animal still inside the time window, oldest first.
+        candidates = recent.setdefault(row['animal_id'], deque())
+        while candidates and row['date_time'] - candidates[0]['date_time'] > tolerance.window:
+            candidates.popleft()
+
+        observations = row.get('observations', 1)
+        match = next((
+            survivor for survivor in candidates
+            if distance(survivor['latitude'], survivor['longitude'], row['latitude'], row['longitude'])
+            <= tolerance.distance
+        ), None)
+        if match is not None:
+            match['observations'] += observations
+            if merged is not None:
+                merged[row.get('id')] = match.get('id')
+        else:
+            survivor = {**row, 'observations': observations}
+            candidates.append(survivor)
+            survivors.append(survivor)
+    return survivors
@@ -0,0 +1,73 @@
+import csv
+import json
+
+from .models import Animal
+
+CSV_COLUMNS = ['id', 'date_time', 'latitude', 'longitude', 'animal_id', 'animal']
+
+
+def _feature(row, animals):
+    return {
+        'type': 'Feature',
+        'id': str(row.id),
+        'geometry': {
+            'type': 'Point',
+            'coordinates': [row.longitude, row.latitude]
+        },
+        'properties': {
+            'date_time': row.date_time.isoformat(),
+            'animal_id': row.animal_id,
+            'animal': animals[row.animal_id].name
+        }
+    }
+
+
+def geojson_chunks(rows):
+    """
+    Encode streamed sighting rows as a GeoJSON FeatureCollection, one feature per chunk.
+    """
+    animals = Animal.catalog()
+    yield '{"type": "FeatureCollection", "features": ['
+    separator = ''
+    for row in rows:
+        yield separator + json.dumps(_feature(row, animals))
+        separator = ','
+    yield ']}\n'
+
+
+def ndjson_chunks(rows):
+    """
+    Encode streamed sighting rows as newline-delimited GeoJSON features.
+    """
+    animals = Animal.catalog()
+    for row in rows:
+        yield json.dumps(_feature(row, animals)) + '\n'
+
+
+class _Echo:
+    """
+    File-like object whose write returns the value instead of buffering it, so csv.writer can feed a generator.
+    """
+
+    def write(self, value):
+        return value
+
+
+def csv_chunks(rows):
+    """
+    Encode streamed sighting rows as CSV with a header row.
+    """
+    animals = Animal.catalog()
+    writer = csv.writer(_Echo())
+    yield writer.writerow(CSV_COLUMNS)
+    for row in rows:
+        yield writer.writerow([
+            row.id, row.date_time.isoformat(), row.latitude, row.longitude, row.animal_id, animals[row.animal_id].name
+        ])
+
+
+EXPORT_FORMATS = {
+    'geojson': (geojson_chunks, 'application/geo+json'),
+    'ndjson': (ndjson_chunks, 'application/x-ndjson'),
+    'csv': (csv_chunks, 'text/csv'),
+}
@@ -0,0 +1,115 @@
+import math
+import struct
+import zlib
+
+import numpy as np
+
+from .tiles import tile_bounds
+
+HEATMAP_TILE_SIZE = 256
+
+# Standard deviation of the Gaussian kernel in screen pixels, so the density reads the same at every zoom level.
+HEATMAP_SIGMA = 6
+
+# Kernel-weighted sighting count at which the colour ramp is close to saturated. A fixed scale, rather than one
+# normalized per tile, keeps neighbouring tiles seamless.
+HEATMAP_SATURATION = 8.0
+
+# (position, RGBA) stops of the colour ramp from no density to saturated.
+HEATMAP_RAMP = (
+    (0.0, (0, 0, 255, 0)),
+    (0.2, (0, 120, 255, 150)),
+    (0.45, (0, 220, 200, 190)),
+    (0.7, (255, 230, 0, 215)),
+    (1.0, (230, 20, 20, 235)),
+)
+
+
+def kernel_padding(sigma=HEATMAP_SIGMA):
+    return int(math.ceil(3 * sigma))
+
+
+def heatmap_bounds(z, x, y, size=HEATMAP_TILE_SIZE, sigma=HEATMAP_SIGMA):
+    """
+    Get the (min_lon, min_lat, max_lon, max_lat) of the sightings that contribute to a tile, i.e. the tile bounds
+    grown by the kernel's reach.
+    """
+    min_lon, min_lat, max_lon, max_lat = tile_bounds(z, x, y)
+    buffer = kernel_padding(sigma) / size
+    dx = (max_lon - min_lon) * buffer
+    dy = (max_lat - min_lat) * buffer
+    return min_lon - dx, max(min_lat - dy, -85.0511), max_lon + dx, min(max_lat + dy, 85.0511)
+
+
+def tile_pixels(z, x, y, longitudes, latitudes, size=HEATMAP_TILE_SIZE):
+    """
+    Project lon/lat arrays to pixel positions relative to the top left corner of an XYZ web mercator tile.
+    """
+    world = size * 2 ** z
+    latitudes = np.radians(np.clip(latitudes, -85.0511, 85.0511))
+    px = (longitudes + 180.0) / 360.0 * world - x * size
+    py = (1 - np.log(np.tan(np.pi / 4 + latitudes / 2)) / np.pi) / 2 * world - y * size
+    return px, py
+
+
+def density_grid(px, py, size=HEATMAP_TILE_SIZE, sigma=HEATMAP_SIGMA):
+    """
+    Bin pixel positions into a size x size grid (rows top to bottom) and smooth it with a Gaussian kernel whose peak
+    is 1, so a cell's value is roughly the number of sightings within a kernel's width of it.
+    """
+    pad = kernel_padding(sigma)
+    cells = size + 2 * pad
+    counts, _, _ = np.histogram2d(py, px, bins=cells, range=[[-pad, size + pad], [-pad, size + pad]])
+
+    # The kernel is separable, so blur rows and columns with one banded matrix each.
+    offsets = np.arange(cells)[:, None] - np.arange(cells)[None, :]
+    kernel = np.where(np.abs(offsets) <= pad, np.exp(-0.5 * (offsets / sigma) ** 2), 0.0)
+    blurred = kernel @ counts @ kernel
+    return blurred[pad:pad + size, pad:pad + size]
+
+
+def colorize(grid, saturation=HEATMAP_SATURATION):
+    """
+    Map a density grid onto HEATMAP_RAMP as an RGBA uint8 image.
+    """
+    intensity = 1 - np.exp(-grid / saturation)
+    positions = [position for position, _ in HEATMAP_RAMP]
+    rgba = np.empty(grid.shape + (4,), dtype=np.uint8)
+    for channel in range(4):
+        rgba[..., channel] = np.interp(intensity, positions, [color[channel] for _, color in HEATMAP_RAMP])
+    rgba[grid < 0.01, 3] = 0
+    return rgba
+
+
+def encode_png(rgba):
+    """
+    Encode an RGBA uint8 image as a PNG.
+    """
+    height, width, _ = rgba.shape
+    # Each scanline starts with its filter type, 0 (none).
+    scanlines = np.hstack([np.zeros((height, 1), dtype=np.uint8), rgba.reshape(height, width * 4)])
+
+    def chunk(tag, data):
+        return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff)
+
+    return b''.join((
+        b'\x89PNG\r\n\x1a\n',
+        chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0)),
+        chunk(b'IDAT', zlib.compress(scanlines.tobytes(), 6)),
+        chunk(b'IEND', b''),
+    ))
+
+
+EMPTY_TILE = encode_png(np.zeros((HEATMAP_TILE_SIZE, HEATMAP_TILE_SIZE, 4), dtype=np.uint8))
+
+
+def render_heatmap_tile(z, x, y, locations, size=HEATMAP_TILE_SIZE):
+    """
+    Render a PNG density tile from (longitude, latitude) rows of the sightings within heatmap_bounds.
+    """
+    if not locations:
+        return EMPTY_TILE
+
+    coordinates = np.asarray(locations, dtype=float)
+    px, py = tile_pixels(z, x, y, coordinates[:, 0], coordinates[:, 1], size)
+    return encode_png(colorize(density_grid(px, py, size)))
@@ -0,0 +1,144 @@
+from datetime import datetime, timezone
+from itertools import islice
+import csv
+import json
+
+from .models import Animal, Sighting
+
+IMPORT_CHUNK_SIZE = 5000
+
+# Error reports stop listing rejected rows past this many, so a bad file can't produce an unbounded response.
+MAX_REPORTED_ERRORS = 1000
+
+
+def clean_sighting(date_time, animal_id, latitude, longitude, animals, now=None):
+    """
+    Clean and validate the fields of one sighting.
+    Returns dict of parsed data, list of error message strings (empty if valid).
+    """
+    # Imported on first use to keep app startup light.
+    from dateutil import parser
+
+    now = now or datetime.now(timezone.utc)
+    cleaned_data = {}
+    errors = []
+
+    try:
+        dt_utc = parser.isoparse(date_time).astimezone(timezone.utc)
+        if dt_utc > now:
+            errors.append('Date/time cannot be in the future.')
+        cleaned_data['date_time'] = dt_utc
+    except (ValueError, TypeError):
+        errors.append('Invalid or missing date/time.')
+
+    try:
+        cleaned_data['animal_id'] = int(animal_id)
+        if cleaned_data['animal_id'] not in animals:
+            errors.append('Unknown animal ID.')
+    except (TypeError, ValueError):
+        errors.append('Invalid or missing animal ID.')
+
+    try:
+        latitude = float(latitude)
+        longitude = float(longitude)
+    except (TypeError, ValueError):
+        errors.append('Invalid or missing latitude/longitude.')
+        return cleaned_data, errors
+
+    if not (-90 <= latitude <= 90):
+        errors.append('Latitude must be between -90 and 90.')
+    cleaned_data['latitude'] = latitude
+
+    if not (-180 <= longitude <= 180):
+        errors.append('Longitude must be between -180 and 180.')
+    cleaned_data['longitude'] = longitude
+
+    return cleaned_data, errors
+
+
+def read_csv_rows(text_file):
+    """
+    Stream sightings from a CSV file with date_time, latitude, longitude and animal_id (or animal name) columns.
+    """
+    for row in csv.DictReader(text_file):
+        yield row
+
+
+def read_geojson_rows(text_file):
+    """
+    Read sightings from a GeoJSON FeatureCollection of Points, or stream them from newline-delimited GeoJSON features.
+    Feature properties provide date_time and animal_id (or animal name).
+    """
+    first_line = text_file.readline()
+    try:
+        first = json.loads(first_line)
+    except ValueError:
+        first = None
+
+    if isinstance(first, dict) and first.get('type') == 'Feature':
+        features = _iter_feature_lines(first, text_file)
+    else:
+        # A regular FeatureCollection has to be parsed as a whole.
+        collection = json.loads(first_line + text_file.read())
+        if not isinstance(collection, dict) or not isinstance(collection.get('features', []), list):
+            raise ValueError('Expected a GeoJSON FeatureCollection or newline-delimited Features.')
+        features = collection.get('features', [])
+
+    for feature in features:
+        if not isinstance(feature, dict):
+            raise ValueError('Each GeoJSON feature must be an object.')
+        properties = feature.get('properties') or {}
+        geometry = feature.get('geometry') or {}
+        coordinates = geometry.get('coordinates') if isinstance(geometry, dict) else None
+        if not isinstance(coordinates, list) or len(coordinates) < 2:
+            # Left for clean_sighting to report as a missing latitude/longitude.
+            coordinates = [None, None]
+        yield {
+            **(properties if isinstance(properties, dict) else {}),
+            'longitude': coordinates[0], 'latitude': coordinates[1]
+        }
+
+
+def _iter_feature_lines(first, text_file):
+    yield first
+    for line in text_file:
+        if line.strip():
+            yield json.loads(line)
+
+
+def import_sightings(rows, chunk_size=IMPORT_CHUNK_SIZE):
+    """
+    Validate and insert an iterable of raw sighting dicts in chunks. Invalid rows are skipped and reported.
+    Returns dict report with the number of rows read and inserted and a list of per-row errors (1-based row numbers).
+    """
+    animals = Animal.catalog()
+    animal_ids_by_name = {animal.name.lower(): animal.id for animal in animals.values()}
+    report = {'rows': 0, 'inserted': 0, 'rejected': 0, 'errors': []}
+
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+
+        now = datetime.now(timezone.utc)
+        valid_rows = []
+        for row in chunk:
+            report['rows'] += 1
+            animal_id = row.get('animal_id')
+            if animal_id in (None, '') and row.get('animal'):
+                animal_id = animal_ids_by_name.get(str(row['animal']).strip().lower())
+
+            cleaned_data, errors = clean_sighting(
+                row.get('date_time'), animal_id, row.get('latitude'), row.get('longitude'), animals, now
+            )
+            if errors:
+                report['rejected'] += 1
+                if len(report['errors']) < MAX_REPORTED_ERRORS:
+                    report['errors'].append({'row': report['rows'], 'errors': errors})
+                continue
+            valid_rows.append(cleaned_data)
+
+        report['inserted'] += Sighting.bulk_add(valid_rows)
+
+    return report
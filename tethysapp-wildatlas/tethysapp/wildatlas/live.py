@@ -0,0 +1,45 @@
+import json
+import logging
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+
+log = logging.getLogger(__name__)
+
+# Channel layer group every connected map subscribes to.
+SIGHTINGS_GROUP = 'wildatlas_sightings'
+
+
+def sighting_message(event, sighting_id, animal, date_time, latitude, longitude):
+    """
+    Build the message sent to maps when a sighting is added or deleted. animal is the sighting's AnimalInfo.
+    """
+    return {
+        'event': event,
+        'sighting': {
+            'id': str(sighting_id),
+            'animal_id': animal.id,
+            'animal': animal.name,
+            'pin_path': animal.pin_path,
+            'date_time': date_time.isoformat(),
+            'latitude': latitude,
+            'longitude': longitude,
+        }
+    }
+
+
+def publish(message):
+    """
+    Send a message to every connected map. Serialized once here so fan-out doesn't re-encode it per subscriber.
+    A missing or failing channel layer never fails the write that triggered the message.
+    """
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+
+    try:
+        async_to_sync(channel_layer.group_send)(
+            SIGHTINGS_GROUP, {'type': 'sighting.event', 'text': json.dumps(message)}
+        )
+    except Exception:
+        log.warning('Could not publish sighting update.', exc_info=True)
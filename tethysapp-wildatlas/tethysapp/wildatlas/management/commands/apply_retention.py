@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ...app import App
+from ...db import unit_of_work
+from ...models import Sighting
+
+
+class Command(BaseCommand):
+    help = 'Archive or delete sightings older than the retention period. Safe to run from cron; overlapping runs skip.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='Defaults to the sighting_retention_days setting.')
+        parser.add_argument(
+            '--drop', action='store_true',
+            help='Delete instead of archiving, dropping the partitions of whole months past the retention period.'
+        )
+
+    def handle(self, *args, **options):
+        days = options['days']
+        if days is None:
+            days = App.get_custom_setting('sighting_retention_days')
+        if days is None or days <= 0:
+            raise CommandError('No retention period: pass --days or set sighting_retention_days.')
+
+        if not options['drop']:
+            with unit_of_work():
+                archived = Sighting.archive_older_than(days)
+            self.stdout.write(self.style.SUCCESS(f'Archived {archived} sightings older than {days} days.'))
+            return
+
+        with unit_of_work():
+            result = Sighting.delete_older_than(days)
+        if result is None:
+            raise CommandError('Another retention run is in progress.')
+        months, deleted = result
+        self.stdout.write(self.style.SUCCESS(
+            f'Dropped {months} monthly partitions and deleted {deleted} more sightings older than {days} days.'
+        ))
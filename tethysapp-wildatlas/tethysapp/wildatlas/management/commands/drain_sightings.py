@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from ...writebehind import SightingWriter
+
+
+class Command(BaseCommand):
+    help = (
+        'Write the sightings waiting in the quick submission queue, e.g. left over from a restart. Safe to run from '
+        'cron alongside the portal; writers skip each other\'s rows.'
+    )
+
+    def handle(self, *args, **options):
+        written = SightingWriter().drain()
+        self.stdout.write(self.style.SUCCESS(f'Wrote {written} queued sightings.'))
@@ -0,0 +1,38 @@
+from pathlib import Path
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...db import unit_of_work
+from ...ingest import IMPORT_CHUNK_SIZE, import_sightings, read_csv_rows, read_geojson_rows
+
+
+class Command(BaseCommand):
+    help = 'Bulk import animal sightings from a CSV or GeoJSON file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV, GeoJSON or newline-delimited GeoJSON file of sightings.')
+        parser.add_argument('--format', choices=['csv', 'geojson'], help='Defaults to the file extension.')
+        parser.add_argument('--chunk-size', type=int, default=IMPORT_CHUNK_SIZE)
+        parser.add_argument('--report', help='Write the full per-row error report to this JSON file.')
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        file_format = options['format'] or ('csv' if path.suffix.lower() == '.csv' else 'geojson')
+        reader = read_csv_rows if file_format == 'csv' else read_geojson_rows
+
+        try:
+            with open(path, 'r', encoding='utf-8-sig', newline='') as text_file, unit_of_work():
+                report = import_sightings(reader(text_file), chunk_size=options['chunk_size'])
+        except (OSError, ValueError) as e:
+            raise CommandError(f'Could not import {path}: {e}')
+
+        if options['report']:
+            with open(options['report'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Read {report['rows']} rows: inserted {report['inserted']}, rejected {report['rejected']}."
+        ))
+        for error in report['errors'][:10]:
+            self.stdout.write(f"Row {error['row']}: {' '.join(error['errors'])}")
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from ...db import unit_of_work
+from ...models import Sighting
+from ...partitions import is_partitioned
+
+
+class Command(BaseCommand):
+    help = (
+        'Create the coming months\' sighting partitions and move sightings out of the default partition. Converts a '
+        'sightings table created before partitioning first. Safe to run from cron.'
+    )
+
+    def handle(self, *args, **options):
+        with unit_of_work() as session:
+            if not is_partitioned(session, Sighting.__tablename__):
+                self.stdout.write('Converting the sightings table to monthly partitions...')
+                Sighting.partition_table(session)
+            else:
+                Sighting.maintain_partitions(session)
+            session.commit()
+
+        self.stdout.write(self.style.SUCCESS('Sighting partitions are up to date.'))
@@ -0,0 +1,352 @@
+from collections import Counter as StatementCounter
+from contextlib import contextmanager
+from contextvars import ContextVar
+import functools
+import inspect
+import logging
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from sqlalchemy import event
+
+from .app import App
+
+log = logging.getLogger(__name__)
+
+# Upper bounds of the histogram buckets.
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (1024, 10 * 1024, 100 * 1024, 512 * 1024, 1024 ** 2, 5 * 1024 ** 2, 20 * 1024 ** 2)
+STATEMENT_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250)
+
+# A request that runs the same SQL statement this many times is most likely loading rows one at a time in a loop.
+N_PLUS_ONE_THRESHOLD = 10
+
+# Controller label for SQL run outside a traced request, e.g. by the write-behind thread or a management command.
+UNTRACED = 'background'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value):
+    return str(value) if isinstance(value, int) else repr(float(value))
+
+
+def _sample_name(name, label_names, label_values, extra=''):
+    pairs = [f'{label}="{_escape(value)}"' for label, value in zip(label_names, label_values)]
+    if extra:
+        pairs.append(extra)
+    return f'{name}{{{",".join(pairs)}}}' if pairs else name
+
+
+class Counter:
+    """
+    Monotonic Prometheus counter with a fixed set of label names.
+    """
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        with self._lock:
+            return self._values.get(labels, 0)
+
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            yield _sample_name(self.name, self.labels, labels), value
+
+
+class Histogram:
+    """
+    Cumulative Prometheus histogram with a fixed set of label names.
+    """
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=DURATION_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        # Label values -> [count per bucket..., observations, sum].
+        self._values = {}
+
+    def observe(self, value, *labels):
+        with self._lock:
+            series = self._values.setdefault(labels, [0] * len(self.buckets) + [0, 0.0])
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[index] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def count(self, *labels):
+        with self._lock:
+            series = self._values.get(labels)
+            return series[-2] if series else 0
+
+    def samples(self):
+        with self._lock:
+            values = sorted((labels, list(series)) for labels, series in self._values.items())
+        for labels, series in values:
+            for bound, count in zip(self.buckets, series):
+                yield _sample_name(f'{self.name}_bucket', self.labels, labels, f'le="{_format_value(bound)}"'), count
+            yield _sample_name(f'{self.name}_bucket', self.labels, labels, 'le="+Inf"'), series[-2]
+            yield _sample_name(f'{self.name}_sum', self.labels, labels), round(series[-1], 6)
+            yield _sample_name(f'{self.name}_count', self.labels, labels), series[-2]
+
+
+REQUESTS = Counter(
+    'wildatlas_requests_total', 'Requests handled, by controller and status code.', ('controller', 'status')
+)
+REQUEST_DURATION = Histogram('wildatlas_request_duration_seconds', 'Time spent in a controller.', ('controller',))
+RESPONSE_SIZE = Histogram(
+    'wildatlas_response_size_bytes', 'Size of non-streaming response bodies.', ('controller',), SIZE_BUCKETS
+)
+SPAN_DURATION = Histogram(
+    'wildatlas_span_duration_seconds', 'Time spent in a named step of a controller.', ('controller', 'span')
+)
+REQUEST_STATEMENTS = Histogram(
+    'wildatlas_request_sql_statements', 'SQL statements run by one request.', ('controller',), STATEMENT_BUCKETS
+)
+SQL_STATEMENTS = Counter('wildatlas_sql_statements_total', 'SQL statements run, by controller.', ('controller',))
+SQL_SECONDS = Counter('wildatlas_sql_duration_seconds_total', 'Time spent running SQL, by controller.', ('controller',))
+N_PLUS_ONE = Counter(
+    'wildatlas_n_plus_one_requests_total',
+    f'Requests that ran one SQL statement {N_PLUS_ONE_THRESHOLD} or more times.', ('controller',)
+)
+SLOW_REQUESTS = Counter(
+    'wildatlas_slow_requests_total', 'Requests slower than the slow_request_threshold setting.', ('controller',)
+)
+
+REGISTRY = (
+    REQUESTS, REQUEST_DURATION, RESPONSE_SIZE, SPAN_DURATION, REQUEST_STATEMENTS, SQL_STATEMENTS, SQL_SECONDS,
+    N_PLUS_ONE, SLOW_REQUESTS,
+)
+
+# (get_pool_status key, type, help) of the connection pool metrics.
+POOL_METRICS = (
+    ('size', 'gauge', 'Connections the pool keeps open.'),
+    ('checked_out', 'gauge', 'Connections currently in use.'),
+    ('overflow', 'gauge', 'Connections open beyond the pool size.'),
+    ('checkouts', 'counter', 'Connections handed out by the pool.'),
+    ('waits', 'counter', 'Checkouts that waited for a connection to be returned.'),
+    ('wait_seconds', 'counter', 'Time spent waiting for a connection.'),
+    ('timeouts', 'counter', 'Checkouts that gave up waiting for a connection.'),
+)
+
+
+class RequestTrace:
+    """
+    SQL and timing spans collected while one controller handles a request.
+    """
+
+    def __init__(self, controller, request=None):
+        self.controller = controller
+        self.method = request.method if request is not None else ''
+        self.path = request.get_full_path() if request is not None else ''
+        self.started = time.perf_counter()
+        self.response = None
+        self.sql_count = 0
+        self.sql_seconds = 0.0
+        self.statements = StatementCounter()
+        self.spans = {}
+
+    def record_sql(self, statement, seconds):
+        self.sql_count += 1
+        self.sql_seconds += seconds
+        self.statements[statement] += 1
+
+    def record_span(self, name, seconds):
+        self.spans[name] = self.spans.get(name, 0.0) + seconds
+        SPAN_DURATION.observe(seconds, self.controller, name)
+
+    def repeated_statements(self, threshold=N_PLUS_ONE_THRESHOLD):
+        """
+        Get (statement, executions) of the statements run at least threshold times.
+        """
+        return [(statement, count) for statement, count in self.statements.most_common() if count >= threshold]
+
+    def finish(self, threshold):
+        elapsed = time.perf_counter() - self.started
+        response = self.response
+        status = response.status_code if response is not None else 500
+        size = response_size(response)
+
+        REQUESTS.inc(self.controller, status)
+        REQUEST_DURATION.observe(elapsed, self.controller)
+        REQUEST_STATEMENTS.observe(self.sql_count, self.controller)
+        if size is not None:
+            RESPONSE_SIZE.observe(size, self.controller)
+
+        repeated = self.repeated_statements()
+        if repeated:
+            N_PLUS_ONE.inc(self.controller)
+            for statement, count in repeated:
+                log.warning(
+                    'Possible N+1 query in %s %s: ran %d times: %s',
+                    self.method, self.path, count, ' '.join(statement.split())[:300]
+                )
+
+        if threshold and elapsed * 1000 >= threshold:
+            SLOW_REQUESTS.inc(self.controller)
+            spans = ', '.join(f'{name}={seconds * 1000:.0f}ms' for name, seconds in self.spans.items()) or 'none'
+            log.warning(
+                'Slow request to %s (%s %s): %.0f ms, status %s, %d SQL statements in %.0f ms, %s bytes, spans: %s',
+                self.controller, self.method, self.path, elapsed * 1000, status, self.sql_count,
+                self.sql_seconds * 1000, '?' if size is None else size, spans
+            )
+
+
+_current_trace = ContextVar('wildatlas_request_trace', default=None)
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+def response_size(response):
+    """
+    Get the size of a response body, or None if it isn't known before it is sent (streaming or not yet rendered).
+    """
+    if response is None or getattr(response, 'streaming', False) or not getattr(response, 'is_rendered', True):
+        return None
+    return len(response.content)
+
+
+_slow_request_threshold = None
+
+
+def slow_request_threshold():
+    """
+    Get the slow_request_threshold setting in milliseconds, read once per process.
+    """
+    global _slow_request_threshold
+    if _slow_request_threshold is None:
+        _slow_request_threshold = App.get_custom_setting('slow_request_threshold') or 0
+    return _slow_request_threshold
+
+
+@contextmanager
+def trace_request(controller, request=None, threshold=None):
+    """
+    Collect SQL and spans run in the block as one request to controller. Set the trace's response before leaving the
+    block; a block that raises is recorded as a 500.
+    """
+    trace = RequestTrace(controller, request)
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+        trace.finish(slow_request_threshold() if threshold is None else threshold)
+
+
+@contextmanager
+def span(name):
+    """
+    Time a named step of the current request.
+    """
+    trace = _current_trace.get()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if trace is not None:
+            trace.record_span(name, time.perf_counter() - started)
+
+
+def _find_request(args):
+    # Django or DRF request, after self for a class-based view.
+    return next((arg for arg in args if hasattr(arg, 'get_full_path')), None)
+
+
+def instrumented(view=None, *, name=None):
+    """
+    Record timing, SQL, and payload metrics for every call to a controller. Place it directly under @controller.
+    """
+    if view is None:
+        return functools.partial(instrumented, name=name)
+    controller = name or view.__name__
+
+    if inspect.iscoroutinefunction(view):
+        @functools.wraps(view)
+        async def async_wrapper(*args, **kwargs):
+            # Reading the setting queries the database, which can't be done from the event loop.
+            threshold = await sync_to_async(slow_request_threshold)()
+            with trace_request(controller, _find_request(args), threshold) as trace:
+                trace.response = await view(*args, **kwargs)
+            return trace.response
+        return async_wrapper
+
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        with trace_request(controller, _find_request(args)) as trace:
+            trace.response = view(*args, **kwargs)
+        return trace.response
+    return wrapper
+
+
+def record_sql(statement, seconds):
+    trace = _current_trace.get()
+    controller = trace.controller if trace is not None else UNTRACED
+    SQL_STATEMENTS.inc(controller)
+    SQL_SECONDS.inc(controller, amount=seconds)
+    if trace is not None:
+        trace.record_sql(statement, seconds)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('wildatlas_query_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    record_sql(statement, time.perf_counter() - conn.info['wildatlas_query_started'].pop())
+
+
+def _handle_error(exception_context):
+    connection = exception_context.connection
+    if connection is not None and connection.info.get('wildatlas_query_started'):
+        started = connection.info['wildatlas_query_started'].pop()
+        record_sql(exception_context.statement or '', time.perf_counter() - started)
+
+
+def instrument_engine(engine):
+    """
+    Count and time every statement the engine runs.
+    """
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    event.listen(engine, 'handle_error', _handle_error)
+
+
+def render_metrics(pool_status=None):
+    """
+    Render the registry, and the connection pool status if given, in the Prometheus text exposition format.
+    """
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f'# HELP {metric.name} {metric.documentation}')
+        lines.append(f'# TYPE {metric.name} {metric.kind}')
+        lines.extend(f'{sample} {_format_value(value)}' for sample, value in metric.samples())
+
+    for key, kind, documentation in POOL_METRICS if pool_status else ():
+        name = f'wildatlas_db_pool_{key}' + ('_total' if kind == 'counter' else '')
+        lines.append(f'# HELP {name} {documentation}')
+        lines.append(f'# TYPE {name} {kind}')
+        lines.append(f'{name} {_format_value(pool_status[key])}')
+
+    return '\n'.join(lines) + '\n'
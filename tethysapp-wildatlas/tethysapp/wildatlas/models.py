@@ -1,18 +1,79 @@
 from datetime import datetime, timedelta, timezone
-from sqlalchemy import Column, Integer, Float, String, ForeignKey, DateTime, select
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import (
+    BigInteger, Column, Integer, Float, String, ForeignKey, Date, DateTime, Index, and_, bindparam, cast, delete, func,
+    insert, inspect, literal, or_, select, text, update
+)
+from sqlalchemy.dialects.postgresql import UUID, insert as pg_insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship, joinedload
+from collections import Counter, namedtuple
+import math
 import random
+import threading
 import uuid
 
-from .app import App
+from .db import lift_statement_timeout, new_session, session_scope, unit_of_work
+from .dedup import dedup_tolerance, merge_rows
+from .live import publish, sighting_message
+from .partitions import (
+    drop_monthly_partitions, ensure_default_partition, ensure_monthly_partitions, is_partitioned, month_start,
+    next_month, split_default_partition
+)
+from .tiles import buffered_tile_bounds, sighting_tiles
 
 Base = declarative_base()
 
+# Sightings older than this are not shown on the map unless a time window is requested explicitly.
+DEFAULT_SIGHTING_WINDOW = timedelta(days=90)
+
+# Rows fetched per round trip when streaming sightings out of the database.
+STREAM_BATCH_SIZE = 1000
+
+# Bulk writes touching more points than this clear the whole tile cache instead of invalidating tile by tile.
+TILE_INVALIDATION_LIMIT = 100
+
+# Name of the data_versions row bumped by every write to the sightings table.
+SIGHTINGS_DATA = 'sightings'
+
+# Sighting location as a PostGIS geography, matching the expression index on the sightings table.
+SIGHTING_GEOGRAPHY = '(ST_SetSRID(ST_MakePoint(longitude, latitude), 4326)::geography)'
+
+# Statuses of queued sightings.
+PENDING = 'pending'
+WRITTEN = 'written'
+FAILED = 'failed'
+
+# Why a sighting was moved to the archive.
+ARCHIVE_DELETED = 'deleted'
+ARCHIVE_RETENTION = 'retention'
+
+# Monthly sighting partitions kept ready ahead of the current month.
+PARTITION_MONTHS_AHEAD = 3
+
+# Advisory lock namespace (with the animal id as key) held while merging reports of one animal.
+DEDUP_LOCK = 72002
+
+# Transaction-level advisory lock held while the retention job archives a month, so overlapping runs skip it.
+RETENTION_LOCK = 72001
+
+# Approximate bounding box for Yellowstone National Park as (min_lon, min_lat, max_lon, max_lat).
+YELLOWSTONE_BBOX = (-110.75, 44.15, -110.25, 45.05)
+
+
+# Lightweight, immutable animal metadata served from the in-process catalog.
+AnimalInfo = namedtuple('AnimalInfo', ['id', 'name', 'logo_path', 'pin_path'])
+
+_animal_catalog = None
+_animal_catalog_lock = threading.Lock()
+
 
 class Animal(Base):
     __tablename__ = 'animals'
+    __table_args__ = (
+        # Lets animals be registered with a single upsert.
+        Index('ix_animals_name', 'name', unique=True),
+    )
 
     # Columns
     id = Column(Integer, primary_key=True)
@@ -33,14 +94,38 @@ class Animal(Base):
 
     @classmethod
     def all(cls):
-        Session = App.get_persistent_store_database('primary_db', as_sessionmaker=True)
-        with Session() as session:
+        with session_scope() as session:
             return session.query(cls).options(joinedload(cls.sightings)).all()
 
+    @classmethod
+    def catalog(cls):
+        """
+        Get the registered animals as AnimalInfo tuples sorted by name, keyed by id.
+        Loaded once per process; call invalidate_catalog after changing the animals table.
+        """
+        global _animal_catalog
+        catalog = _animal_catalog
+        if catalog is not None:
+            return catalog
+
+        with _animal_catalog_lock:
+            if _animal_catalog is None:
+                with session_scope() as session:
+                    rows = session.execute(
+                        select(cls.id, cls.name, cls.logo_path, cls.pin_path).order_by(cls.name)
+                    ).all()
+                _animal_catalog = {row.id: AnimalInfo(*row) for row in rows}
+            return _animal_catalog
+
+    @classmethod
+    def invalidate_catalog(cls):
+        global _animal_catalog
+        with _animal_catalog_lock:
+            _animal_catalog = None
+
     @classmethod
     def get_by_id(cls, animal_id):
-        Session = App.get_persistent_store_database('primary_db', as_sessionmaker=True)
-        with Session() as session:
+        with session_scope() as session:
             stmt = select(cls).options(joinedload(cls.sightings)).filter_by(id=animal_id)
             result = session.execute(stmt).scalars().first()
             return result
@@ -48,13 +133,26 @@ class Animal(Base):
 
 class Sighting(Base):
     __tablename__ = 'sightings'
+    __table_args__ = (
+        Index('ix_sightings_date_time', 'date_time'),
+        Index('ix_sightings_lat_lon', 'latitude', 'longitude'),
+        Index('ix_sightings_animal_id_date_time', 'animal_id', 'date_time'),
+        # Serves distance queries; they must use this exact expression for the planner to match it.
+        Index('ix_sightings_geography', text(SIGHTING_GEOGRAPHY), postgresql_using='gist'),
+        # Monthly partitions keep each month's indexes small and let time-windowed queries skip other months.
+        {'postgresql_partition_by': 'RANGE (date_time)'},
+    )
 
-    # Columns
+    # Columns; the primary key of a partitioned table has to include the partition key.
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    date_time = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
+    date_time = Column(
+        DateTime(timezone=True), primary_key=True, nullable=False, default=lambda: datetime.now(timezone.utc)
+    )
     latitude = Column(Float, nullable=False)
     longitude = Column(Float, nullable=False)
     animal_id = Column(Integer, ForeignKey('animals.id'), nullable=False)
+    # Number of reports merged into this sighting.
+    observations = Column(Integer, nullable=False, default=1, server_default='1')
 
     # Relationships
     animal = relationship('Animal', back_populates='sightings')
@@ -68,43 +166,1019 @@ class Sighting(Base):
             f"animal={self.animal})>")
 
     @classmethod
-    def add(cls, animal_id, date_time, latitude, longitude):
+    def add(cls, animal_id, date_time, latitude, longitude, dedup=True):
         if not isinstance(date_time, datetime):
             raise ValueError("date_time must be a datetime object")
 
-        new_sighting = Sighting(
+        cls.bulk_add(
+            [{'animal_id': animal_id, 'date_time': date_time, 'latitude': latitude, 'longitude': longitude}],
+            dedup=dedup
+        )
+
+    @classmethod
+    def bulk_add(cls, rows, dedup=True, merged=None):
+        """
+        Insert already validated sighting dicts (animal_id, date_time, latitude, longitude and optionally id) in one
+        batched statement. Unless dedup is off, reports repeating a sighting of the same animal within the configured
+        tolerance (see dedup_tolerance) are merged into it rather than inserted; if merged is given, it gets the id of
+        each merged row mapped to the id of the sighting it was merged into. Returns the number of rows accepted.
+        """
+        if not rows:
+            return 0
+
+        with session_scope() as session:
+            inserted = cls.insert_rows(session, rows, dedup, merged)
+            session.commit()
+
+        cls.publish_added(inserted)
+        return len(rows)
+
+    @classmethod
+    def insert_rows(cls, session, rows, dedup=True, merged=None):
+        """
+        The writes of bulk_add, in the caller's transaction, which must call publish_added with the returned rows
+        once it commits. Returns the sighting dicts inserted.
+        """
+        tolerance = dedup_tolerance() if dedup else None
+        rows = [{**row, 'id': row.get('id') or uuid.uuid4()} for row in rows]
+        if tolerance:
+            rows = cls._merge_reports(session, rows, tolerance, {} if merged is None else merged)
+        if rows:
+            # Core executemany lets the driver batch the rows instead of flushing one ORM object at a time.
+            session.execute(insert(cls.__table__), rows)
+            SightingDailyStat.record(session, [(row['animal_id'], row['date_time']) for row in rows])
+        DataVersion.bump(session, SIGHTINGS_DATA)
+        return rows
+
+    @classmethod
+    def publish_added(cls, rows):
+        """
+        Invalidate the cached tiles under committed sighting dicts and tell the live maps about them.
+        """
+        if len(rows) > TILE_INVALIDATION_LIMIT:
+            sighting_tiles.clear()
+            # Too many changes to patch in place; maps reload their layers instead.
+            publish({'event': 'refresh'})
+        else:
+            animals = Animal.catalog()
+            for row in rows:
+                sighting_tiles.invalidate_point(row['longitude'], row['latitude'])
+                publish(sighting_message(
+                    'added', row['id'], animals[row['animal_id']], row['date_time'], row['latitude'], row['longitude']
+                ))
+
+    @classmethod
+    def _merge_reports(cls, session, rows, tolerance, merged):
+        """
+        Merge rows repeating each other or a stored sighting within the tolerance, in the caller's transaction.
+        Matches get their observations raised and merged gets the id of each merged row mapped to the id of the
+        sighting it was merged into; returns the rows still to insert.
+        """
+        rows = merge_rows(rows, tolerance, merged)
+
+        # Reports of the same animal are merged one transaction at a time, so concurrent duplicates see each other.
+        session.execute(
+            text('SELECT pg_advisory_xact_lock(:namespace, animal_id) FROM unnest(:animal_ids) AS animal_id'),
+            {'namespace': DEDUP_LOCK, 'animal_ids': sorted({row['animal_id'] for row in rows})}
+        )
+
+        # One round trip: each report looks up its nearest match in time through the (animal_id, date_time) index,
+        # and the time bounds let the planner skip partitions outside the window.
+        matches = session.execute(
+            text(f"""
+                SELECT report.idx, match.id, match.date_time
+                FROM unnest(:animal_ids, :date_times, :latitudes, :longitudes)
+                    WITH ORDINALITY AS report(animal_id, date_time, latitude, longitude, idx)
+                CROSS JOIN LATERAL (
+                    SELECT id, date_time
+                    FROM sightings
+                    WHERE animal_id = report.animal_id
+                      AND date_time BETWEEN report.date_time - :window AND report.date_time + :window
+                      AND ST_DWithin(
+                          {SIGHTING_GEOGRAPHY},
+                          ST_SetSRID(ST_MakePoint(report.longitude, report.latitude), 4326)::geography,
+                          :distance
+                      )
+                    ORDER BY abs(extract(epoch FROM date_time - report.date_time))
+                    LIMIT 1
+                ) AS match
+            """),
+            {
+                'animal_ids': [row['animal_id'] for row in rows],
+                'date_times': [row['date_time'] for row in rows],
+                'latitudes': [float(row['latitude']) for row in rows],
+                'longitudes': [float(row['longitude']) for row in rows],
+                'window': tolerance.window,
+                'distance': tolerance.distance,
+            }
+        ).all()
+        if not matches:
+            return rows
+
+        # Several reports may match one sighting, so total them before updating it.
+        increments = {}
+        for idx, sighting_id, date_time in matches:
+            key = (sighting_id, date_time)
+            increments[key] = increments.get(key, 0) + rows[idx - 1]['observations']
+
+        sightings = cls.__table__
+        session.execute(
+            update(sightings)
+            .where(sightings.c.id == bindparam('b_id'), sightings.c.date_time == bindparam('b_date_time'))
+            .values(observations=sightings.c.observations + bindparam('b_observations')),
+            [
+                {'b_id': sighting_id, 'b_date_time': date_time, 'b_observations': observations}
+                for (sighting_id, date_time), observations in increments.items()
+            ]
+        )
+
+        # Rows merged earlier in this batch follow their survivor into the stored sighting.
+        stored = {rows[idx - 1]['id']: sighting_id for idx, sighting_id, _ in matches}
+        for row_id, survivor_id in merged.items():
+            merged[row_id] = stored.get(survivor_id, survivor_id)
+        merged.update(stored)
+        return [row for row in rows if row['id'] not in stored]
+
+    @classmethod
+    def delete(cls, sighting_id, archive=False):
+        return cls.delete_many(ids=[sighting_id], archive=archive) > 0
+
+    @classmethod
+    def delete_many(cls, ids=None, bbox=None, start=None, end=None, animal_id=None, archive=False):
+        """
+        Delete the sightings with the given ids and/or matching the filters in one statement, or move them to the
+        archive if archive is set. Ids or at least one filter are required. Returns the number removed.
+        """
+        conditions = cls._filter_conditions(bbox, start, end, animal_id)
+        if ids is not None:
+            conditions.append(cls.id.in_(ids))
+        if not conditions:
+            raise ValueError('Give sighting ids or a filter to delete by.')
+
+        return cls._remove(conditions, ARCHIVE_DELETED if archive else None)
+
+    @classmethod
+    def archive_older_than(cls, days):
+        """
+        Move sightings older than the given number of days into the archive, a month at a time, oldest first. Returns
+        the number archived; stops early if another retention run is busy.
+        """
+        cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+        archived = 0
+        while True:
+            with session_scope() as session:
+                oldest = session.execute(select(func.min(cls.date_time)).where(cls.date_time < cutoff)).scalar()
+            if oldest is None:
+                return archived
+
+            month = month_start(oldest)
+            count = cls._remove(
+                [cls.date_time >= month, cls.date_time < min(next_month(month), cutoff)], ARCHIVE_RETENTION,
+                lock=RETENTION_LOCK
+            )
+            if count is None:
+                return archived
+            archived += count
+
+    @classmethod
+    def delete_older_than(cls, days):
+        """
+        Delete sightings older than the given number of days for good: whole months by dropping their partitions,
+        the rest of the way to the cutoff row by row. Returns the number of months dropped and rows deleted, or None
+        if another retention run is busy.
+        """
+        cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+        with session_scope() as session:
+            if not session.execute(select(func.pg_try_advisory_xact_lock(RETENTION_LOCK))).scalar():
+                session.rollback()
+                return None
+            lift_statement_timeout(session)
+
+            dropped = drop_monthly_partitions(session, cls.__tablename__, cutoff)
+            if dropped:
+                boundary = next_month(dropped[-1])
+                # Sightings of the dropped months that were caught by the default partition.
+                session.execute(delete(cls.__table__).where(cls.date_time < boundary))
+                session.execute(
+                    delete(SightingDailyStat).where(SightingDailyStat.day < boundary.date())
+                    .execution_options(synchronize_session=False)
+                )
+                DataVersion.bump(session, SIGHTINGS_DATA)
+            session.commit()
+
+        if dropped:
+            sighting_tiles.clear()
+            publish({'event': 'refresh'})
+
+        # None if another run took the lock in between; it deletes these rows itself.
+        deleted = cls._remove([cls.date_time < cutoff], lock=RETENTION_LOCK)
+        return len(dropped), deleted or 0
+
+    @classmethod
+    def maintain_partitions(cls, session, start=None):
+        """
+        Make sure the sightings table has monthly partitions from the month of start (default now) through
+        PARTITION_MONTHS_AHEAD months ahead, and a default partition for anything else, in the caller's transaction.
+        Sightings caught by the default partition are moved into monthly partitions of their own.
+        """
+        now = datetime.now(timezone.utc)
+        end = month_start(now)
+        for _ in range(PARTITION_MONTHS_AHEAD):
+            end = next_month(end)
+
+        # Moving rows out of the default partition and attaching scans them, so don't hold it to the timeout.
+        lift_statement_timeout(session)
+        ensure_default_partition(session, cls.__tablename__)
+        ensure_monthly_partitions(session, cls.__tablename__, start or now, end)
+        split_default_partition(session, cls.__tablename__)
+
+    @classmethod
+    def partition_table(cls, session):
+        """
+        Rebuild a sightings table created before partitioning as a partitioned table, in the caller's transaction.
+        Rewrites every row and blocks access to the table until the transaction commits.
+        """
+        legacy = f'{cls.__tablename__}_unpartitioned'
+        lift_statement_timeout(session)
+        # Index names are unique per schema, so move the old ones out of the way of the new table's.
+        session.execute(text(f'ALTER TABLE {cls.__tablename__} RENAME TO {legacy}'))
+        session.execute(text(f'ALTER INDEX IF EXISTS {cls.__tablename__}_pkey RENAME TO {legacy}_pkey'))
+        for index in cls.__table__.indexes:
+            session.execute(text(f'ALTER INDEX IF EXISTS {index.name} RENAME TO {index.name}_unpartitioned'))
+
+        cls.__table__.create(session.connection())
+        first = session.execute(text(f'SELECT min(date_time) FROM {legacy}')).scalar()
+        cls.maintain_partitions(session, first)
+
+        columns = ', '.join(column.name for column in cls.__table__.columns)
+        session.execute(text(f'INSERT INTO {cls.__tablename__} ({columns}) SELECT {columns} FROM {legacy}'))
+        session.execute(text(f'DROP TABLE {legacy}'))
+
+    @classmethod
+    def _remove(cls, conditions, archive_reason=None, lock=None):
+        """
+        Delete, or archive with the given reason, the sightings matching conditions in one statement, keeping the
+        statistics, data version, tile cache and live maps in step. A lock key marks a retention run: it isn't held to
+        the statement timeout, and returns None without removing anything if another transaction holds that advisory
+        lock.
+        """
+        sightings = cls.__table__
+        with session_scope() as session:
+            if lock is not None:
+                if not session.execute(select(func.pg_try_advisory_xact_lock(lock))).scalar():
+                    session.rollback()
+                    return None
+                lift_statement_timeout(session)
+
+            if archive_reason is None:
+                rows = session.execute(
+                    delete(sightings).where(*conditions).returning(
+                        sightings.c.id, sightings.c.animal_id, sightings.c.date_time, sightings.c.latitude,
+                        sightings.c.longitude
+                    )
+                ).all()
+            else:
+                rows = SightingArchive.move_in(session, conditions, archive_reason)
+
+            if rows:
+                SightingDailyStat.remove(session, [(row.animal_id, row.date_time) for row in rows])
+                DataVersion.bump(session, SIGHTINGS_DATA)
+            session.commit()
+
+        cls._publish_changes('deleted', rows)
+        return len(rows)
+
+    @classmethod
+    def restore(cls, ids):
+        """
+        Move archived sightings back onto the map. Returns the number restored.
+        """
+        with session_scope() as session:
+            rows = SightingArchive.move_out(session, ids)
+            if rows:
+                SightingDailyStat.record(session, [(row.animal_id, row.date_time) for row in rows])
+                DataVersion.bump(session, SIGHTINGS_DATA)
+            session.commit()
+
+        cls._publish_changes('added', rows)
+        return len(rows)
+
+    @classmethod
+    def _publish_changes(cls, event, rows):
+        """
+        Invalidate the cached tiles under committed (id, animal_id, date_time, latitude, longitude) rows and tell the
+        live maps about them.
+        """
+        if len(rows) > TILE_INVALIDATION_LIMIT:
+            sighting_tiles.clear()
+            publish({'event': 'refresh'})
+            return
+
+        animals = Animal.catalog()
+        for row in rows:
+            sighting_tiles.invalidate_point(row.longitude, row.latitude)
+            publish(sighting_message(
+                event, row.id, animals[row.animal_id], row.date_time, row.latitude, row.longitude
+            ))
+
+    @classmethod
+    def all(cls):
+        with session_scope() as session:
+            return session.query(cls).options(joinedload(cls.animal)).all()
+
+    @classmethod
+    def _filter_conditions(cls, bbox=None, start=None, end=None, animal_id=None):
+        conditions = []
+        if start is not None:
+            conditions.append(cls.date_time >= start)
+        if end is not None:
+            conditions.append(cls.date_time <= end)
+        if animal_id is not None:
+            conditions.append(cls.animal_id == animal_id)
+        if bbox is not None:
+            min_lon, min_lat, max_lon, max_lat = bbox
+            conditions.append(cls.latitude.between(min_lat, max_lat))
+            conditions.append(cls.longitude.between(min_lon, max_lon))
+        return conditions
+
+    @classmethod
+    def filtered_select(cls, bbox=None, start=None, end=None, animal_id=None):
+        """
+        Build a select statement for sightings inside a bounding box and time window.
+        bbox is (min_lon, min_lat, max_lon, max_lat) in EPSG:4326. start defaults to DEFAULT_SIGHTING_WINDOW ago.
+        """
+        if start is None:
+            start = datetime.now(timezone.utc) - DEFAULT_SIGHTING_WINDOW
+
+        return select(cls).where(*cls._filter_conditions(bbox, start, end, animal_id))
+
+    @classmethod
+    def filter(cls, bbox=None, start=None, end=None, animal_id=None):
+        with session_scope() as session:
+            return session.execute(cls.filtered_select(bbox, start, end, animal_id)).scalars().all()
+
+    @classmethod
+    def rows_select(cls, bbox=None, start=None, end=None, animal_id=None):
+        """
+        Build a select statement for plain (id, epoch seconds, latitude, longitude, animal_id) rows of the sightings
+        filtered_select would return.
+        """
+        if start is None:
+            start = datetime.now(timezone.utc) - DEFAULT_SIGHTING_WINDOW
+
+        epoch = cast(func.floor(func.extract('epoch', cls.date_time)), BigInteger)
+        return select(
+            cls.id, epoch.label('epoch'), cls.latitude, cls.longitude, cls.animal_id
+        ).where(*cls._filter_conditions(bbox, start, end, animal_id))
+
+    @classmethod
+    def filter_rows(cls, bbox=None, start=None, end=None, animal_id=None):
+        with session_scope() as session:
+            return session.execute(cls.rows_select(bbox, start, end, animal_id)).all()
+
+    @classmethod
+    def sample_rows(cls, limit, bbox=None, start=None, end=None, animal_id=None):
+        """
+        Get at most limit rows_select rows and the number of sightings matching the filters. Ids are random UUIDs,
+        so taking the lowest ones is a uniform sample that stays the same across requests.
+        """
+        stmt = cls.rows_select(bbox, start, end, animal_id)
+        with session_scope() as session:
+            total = session.execute(select(func.count()).select_from(stmt.subquery())).scalar()
+            rows = session.execute(stmt.order_by(cls.id).limit(limit)).all() if total else []
+        return rows, total
+
+    @classmethod
+    def timeline(cls, step, bbox=None, start=None, end=None, animal_id=None):
+        """
+        Count sightings per UTC hour or day ('hour' or 'day' step). Returns rows of (bucket, count), oldest first,
+        where bucket is the aware start of the bucket. Empty buckets are left out.
+        """
+        if start is None:
+            start = datetime.now(timezone.utc) - DEFAULT_SIGHTING_WINDOW
+
+        bucket = func.date_trunc(step, func.timezone('UTC', cls.date_time)).label('bucket')
+        stmt = select(bucket, func.count(cls.id).label('count')).where(
+            *cls._filter_conditions(bbox, start, end, animal_id)
+        ).group_by(bucket).order_by(bucket)
+
+        with session_scope() as session:
+            rows = session.execute(stmt).all()
+        return [(row.bucket.replace(tzinfo=timezone.utc), row.count) for row in rows]
+
+    @classmethod
+    def locations(cls, bbox=None, start=None, end=None, animal_id=None):
+        """
+        Get (longitude, latitude) rows of the sightings filter would return, for bulk numeric processing.
+        """
+        if start is None:
+            start = datetime.now(timezone.utc) - DEFAULT_SIGHTING_WINDOW
+
+        stmt = select(cls.longitude, cls.latitude).where(*cls._filter_conditions(bbox, start, end, animal_id))
+        with session_scope() as session:
+            return session.execute(stmt).all()
+
+    @classmethod
+    def stream(cls, bbox=None, start=None, end=None, animal_id=None, batch_size=STREAM_BATCH_SIZE):
+        """
+        Stream (id, date_time, latitude, longitude, animal_id) rows matching the filters, oldest first, through a
+        server-side cursor so only batch_size rows are held in memory at a time. Unlike filter, there is no default
+        time window.
+        """
+        stmt = select(
+            cls.id, cls.date_time, cls.latitude, cls.longitude, cls.animal_id
+        ).where(*cls._filter_conditions(bbox, start, end, animal_id)).order_by(cls.date_time)
+
+        # A session of its own, since the response body is iterated after the request session may be gone.
+        with new_session() as session:
+            result = session.execute(stmt.execution_options(stream_results=True)).yield_per(batch_size)
+            for partition in result.partitions():
+                yield from partition
+
+    @classmethod
+    def tile(cls, z, x, y, start=None, end=None):
+        """
+        Encode the sightings in an XYZ web mercator tile as a Mapbox Vector Tile using PostGIS.
+        """
+        if start is None:
+            start = datetime.now(timezone.utc) - DEFAULT_SIGHTING_WINDOW
+
+        min_lon, min_lat, max_lon, max_lat = buffered_tile_bounds(z, x, y)
+        stmt = text("""
+            WITH mvt AS (
+                SELECT
+                    ST_AsMVTGeom(
+                        ST_Transform(ST_SetSRID(ST_MakePoint(s.longitude, s.latitude), 4326), 3857),
+                        ST_TileEnvelope(:z, :x, :y)
+                    ) AS geom,
+                    s.id::text AS sighting_id,
+                    a.name AS animal,
+                    a.pin_path AS pin_path,
+                    to_json(s.date_time) #>> '{}' AS date
+                FROM sightings s
+                JOIN animals a ON a.id = s.animal_id
+                WHERE s.latitude BETWEEN :min_lat AND :max_lat
+                    AND s.longitude BETWEEN :min_lon AND :max_lon
+                    AND s.date_time >= :start
+                    AND (CAST(:end AS timestamptz) IS NULL OR s.date_time <= :end)
+            )
+            SELECT ST_AsMVT(mvt, 'sightings', 4096, 'geom') FROM mvt
+        """)
+
+        with session_scope() as session:
+            tile = session.execute(stmt, {
+                'z': z, 'x': x, 'y': y,
+                'min_lon': min_lon, 'min_lat': min_lat, 'max_lon': max_lon, 'max_lat': max_lat,
+                'start': start, 'end': end
+            }).scalar()
+        return bytes(tile) if tile is not None else b''
+
+    @classmethod
+    def near_select(cls, latitude, longitude, radius, start=None, end=None, animal_id=None, limit=100):
+        """
+        Build a statement selecting sightings within radius metres of a point, nearest first, as rows of
+        (id, date_time, latitude, longitude, animal_id, observations, distance) with distance in metres.
+        """
+        if start is None:
+            start = datetime.now(timezone.utc) - DEFAULT_SIGHTING_WINDOW
+
+        return text(f"""
+            SELECT id, date_time, latitude, longitude, animal_id, observations,
+                ST_Distance({SIGHTING_GEOGRAPHY}, origin.geog) AS distance
+            FROM sightings,
+                (SELECT ST_SetSRID(ST_MakePoint(:longitude, :latitude), 4326)::geography AS geog) AS origin
+            WHERE ST_DWithin({SIGHTING_GEOGRAPHY}, origin.geog, :radius)
+                AND date_time >= :start
+                AND (CAST(:end AS timestamptz) IS NULL OR date_time <= :end)
+                AND (CAST(:animal_id AS integer) IS NULL OR animal_id = :animal_id)
+            ORDER BY {SIGHTING_GEOGRAPHY} <-> origin.geog
+            LIMIT :limit
+        """).bindparams(
+            latitude=latitude, longitude=longitude, radius=radius, start=start, end=end, animal_id=animal_id,
+            limit=limit
+        )
+
+    @classmethod
+    def near(cls, latitude, longitude, radius, start=None, end=None, animal_id=None, limit=100):
+        with session_scope() as session:
+            return session.execute(
+                cls.near_select(latitude, longitude, radius, start, end, animal_id, limit)
+            ).all()
+
+    @classmethod
+    def clusters(cls, cell_size, bbox=None, start=None, end=None, animal_id=None):
+        """
+        Aggregate sightings into a grid of square cells cell_size degrees wide, per animal, in the database.
+        Returns rows of (animal_id, cell_x, cell_y, count, latitude, longitude), latitude/longitude being the centroid.
+        """
+        if start is None:
+            start = datetime.now(timezone.utc) - DEFAULT_SIGHTING_WINDOW
+
+        cell_x = func.floor(cls.longitude / cell_size).label('cell_x')
+        cell_y = func.floor(cls.latitude / cell_size).label('cell_y')
+        stmt = select(
+            cls.animal_id,
+            cell_x,
+            cell_y,
+            func.count(cls.id).label('count'),
+            func.avg(cls.latitude).label('latitude'),
+            func.avg(cls.longitude).label('longitude')
+        ).where(cls.date_time >= start).group_by(cls.animal_id, cell_x, cell_y)
+
+        if end is not None:
+            stmt = stmt.where(cls.date_time <= end)
+        if animal_id is not None:
+            stmt = stmt.where(cls.animal_id == animal_id)
+        if bbox is not None:
+            # Snap the bbox out to whole cells so a cell is never split between neighbouring requests.
+            min_lon, min_lat, max_lon, max_lat = bbox
+            stmt = stmt.where(
+                cls.latitude.between(math.floor(min_lat / cell_size) * cell_size,
+                                     math.ceil(max_lat / cell_size) * cell_size),
+                cls.longitude.between(math.floor(min_lon / cell_size) * cell_size,
+                                      math.ceil(max_lon / cell_size) * cell_size)
+            )
+
+        with session_scope() as session:
+            return session.execute(stmt).all()
+
+    @classmethod
+    def page_select(cls, limit, cursor=None, animal_id=None, start=None, end=None):
+        """
+        Build a select statement for one page of sightings, newest first, using keyset pagination on (date_time, id).
+        cursor is the (date_time, id) of the last sighting on the previous page. Selects limit + 1 rows so the caller
+        can tell whether there is a next page.
+        """
+        stmt = select(cls).order_by(cls.date_time.desc(), cls.id.desc())
+
+        if cursor is not None:
+            cursor_date_time, cursor_id = cursor
+            stmt = stmt.where(
+                # The redundant bound lets the planner walk the date_time index to the cursor.
+                cls.date_time <= cursor_date_time,
+                or_(
+                    cls.date_time < cursor_date_time,
+                    and_(cls.date_time == cursor_date_time, cls.id < cursor_id)
+                )
+            )
+        if animal_id is not None:
+            stmt = stmt.where(cls.animal_id == animal_id)
+        if start is not None:
+            stmt = stmt.where(cls.date_time >= start)
+        if end is not None:
+            stmt = stmt.where(cls.date_time <= end)
+        return stmt.limit(limit + 1)
+
+    @classmethod
+    def page(cls, limit, cursor=None, animal_id=None, start=None, end=None):
+        """
+        Get one page of sightings, newest first.
+        Returns list of sightings, cursor for the next page or None if this is the last page.
+        """
+        stmt = cls.page_select(limit, cursor, animal_id, start, end)
+        with session_scope() as session:
+            sightings = session.execute(stmt).scalars().all()
+
+        if len(sightings) <= limit:
+            return sightings, None
+        sightings = sightings[:limit]
+        return sightings, (sightings[-1].date_time, sightings[-1].id)
+
+    @classmethod
+    def count(cls, animal_id=None, start=None, end=None):
+        """
+        Count the sightings of one animal, or all of them, from start to end inclusive.
+        """
+        if start is not None and end is not None and start > end:
+            return 0
+        stmt = select(func.count(cls.id)).where(*cls._filter_conditions(start=start, end=end, animal_id=animal_id))
+        with session_scope() as session:
+            return session.execute(stmt).scalar()
+
+    @classmethod
+    def extent(cls, start=None, end=None):
+        """
+        Get the [min_lon, max_lat, max_lon, min_lat] extent of sightings in the time window, or None if fewer than two.
+        """
+        if start is None:
+            start = datetime.now(timezone.utc) - DEFAULT_SIGHTING_WINDOW
+
+        stmt = select(
+            func.count(cls.id),
+            func.min(cls.longitude),
+            func.max(cls.latitude),
+            func.max(cls.longitude),
+            func.min(cls.latitude)
+        ).where(cls.date_time >= start)
+        if end is not None:
+            stmt = stmt.where(cls.date_time <= end)
+
+        with session_scope() as session:
+            count, *extent = session.execute(stmt).one()
+
+        if count < 2:
+            return None
+        return extent
+
+
+def _utc_day(date_time):
+    return date_time.astimezone(timezone.utc).date()
+
+
+def _day_start(day):
+    return datetime.combine(day, datetime.min.time(), tzinfo=timezone.utc)
+
+
+class SightingDailyStat(Base):
+    """
+    Number of sightings and the latest sighting time per animal per UTC day, maintained alongside the sightings table
+    so dashboard statistics never scan it.
+    """
+    __tablename__ = 'sighting_daily_stats'
+
+    # Columns
+    animal_id = Column(Integer, ForeignKey('animals.id'), primary_key=True)
+    day = Column(Date, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+    last_seen = Column(DateTime(timezone=True), nullable=False)
+
+    def __repr__(self):
+        return (
+            f"<SightingDailyStat(animal_id={self.animal_id}, "
+            f"day={self.day}, "
+            f"count={self.count}, "
+            f"last_seen={self.last_seen})>"
+        )
+
+    @classmethod
+    def record(cls, session, sightings):
+        """
+        Count new sightings, given as (animal_id, date_time) pairs, in the caller's transaction.
+        """
+        totals = {}
+        for animal_id, date_time in sightings:
+            key = (animal_id, _utc_day(date_time))
+            count, last_seen = totals.get(key, (0, date_time))
+            totals[key] = (count + 1, max(last_seen, date_time))
+
+        stmt = pg_insert(cls.__table__)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[cls.animal_id, cls.day],
+            set_={
+                'count': cls.__table__.c.count + stmt.excluded.count,
+                'last_seen': func.greatest(cls.__table__.c.last_seen, stmt.excluded.last_seen)
+            }
+        )
+        session.execute(stmt, [
+            {'animal_id': animal_id, 'day': day, 'count': count, 'last_seen': last_seen}
+            for (animal_id, day), (count, last_seen) in totals.items()
+        ])
+
+    @classmethod
+    def remove(cls, session, sightings):
+        """
+        Uncount removed sightings, given as (animal_id, date_time) pairs, in the caller's transaction, after the
+        sighting rows have been deleted.
+        """
+        totals = Counter((animal_id, _utc_day(date_time)) for animal_id, date_time in sightings)
+        if not totals:
+            return
+
+        stats = cls.__table__
+        # Served by the (animal_id, date_time) index on sightings.
+        last_seen = select(func.max(Sighting.date_time)).where(
+            Sighting.animal_id == bindparam('b_animal_id'),
+            Sighting.date_time >= bindparam('b_day_start'),
+            Sighting.date_time < bindparam('b_day_end')
+        ).scalar_subquery()
+
+        # One executemany for every affected day rather than a statement pair per sighting.
+        session.execute(
+            update(stats).where(stats.c.animal_id == bindparam('b_animal_id'), stats.c.day == bindparam('b_day'))
+            .values(
+                count=stats.c.count - bindparam('b_removed'), last_seen=func.coalesce(last_seen, stats.c.last_seen)
+            ),
+            [
+                {
+                    'b_animal_id': animal_id,
+                    'b_day': day,
+                    'b_day_start': _day_start(day),
+                    'b_day_end': _day_start(day + timedelta(days=1)),
+                    'b_removed': removed,
+                }
+                for (animal_id, day), removed in totals.items()
+            ]
+        )
+        session.execute(delete(cls).where(cls.count <= 0).execution_options(synchronize_session=False))
+
+    @classmethod
+    def rebuild(cls, session):
+        """
+        Recompute every statistic from the sightings table in the caller's transaction.
+        """
+        day = cast(func.timezone('UTC', Sighting.date_time), Date)
+        session.execute(delete(cls).execution_options(synchronize_session=False))
+        session.execute(insert(cls.__table__).from_select(
+            ['animal_id', 'day', 'count', 'last_seen'],
+            select(Sighting.animal_id, day, func.count(Sighting.id), func.max(Sighting.date_time))
+            .group_by(Sighting.animal_id, day)
+        ))
+
+    @classmethod
+    def summary(cls, days):
+        """
+        Summarize sightings per animal (total and last seen) plus per animal per day counts for the last N days.
+        Only reads the statistics table, so the cost grows with animals x days rather than sightings.
+        """
+        since = datetime.now(timezone.utc).date() - timedelta(days=days - 1)
+
+        with session_scope() as session:
+            per_animal = session.execute(
+                select(cls.animal_id, func.sum(cls.count).label('count'), func.max(cls.last_seen).label('last_seen'))
+                .group_by(cls.animal_id)
+            ).all()
+            daily = session.execute(
+                select(cls.animal_id, cls.day, cls.count).where(cls.day >= since).order_by(cls.day)
+            ).all()
+
+        return per_animal, daily
+
+    @classmethod
+    def total(cls, animal_id=None, start=None, end=None):
+        """
+        Count the sightings of one animal, or all of them, from start to end inclusive. Whole UTC days come from the
+        statistics table; only the partial days at either end are counted in the sightings table.
+        """
+        first_day = start and (start + timedelta(days=1) - timedelta(microseconds=1)).astimezone(timezone.utc).date()
+        last_day = end and (end + timedelta(microseconds=1) - timedelta(days=1)).astimezone(timezone.utc).date()
+        if first_day and last_day and first_day > last_day:
+            return Sighting.count(animal_id, start, end)
+
+        stmt = select(func.coalesce(func.sum(cls.count), 0))
+        if animal_id is not None:
+            stmt = stmt.where(cls.animal_id == animal_id)
+        if first_day:
+            stmt = stmt.where(cls.day >= first_day)
+        if last_day:
+            stmt = stmt.where(cls.day <= last_day)
+        with session_scope() as session:
+            total = session.execute(stmt).scalar()
+
+        if first_day:
+            total += Sighting.count(animal_id, start, _day_start(first_day) - timedelta(microseconds=1))
+        if last_day:
+            total += Sighting.count(animal_id, _day_start(last_day + timedelta(days=1)), end)
+        return total
+
+
+class SightingArchive(Base):
+    """
+    Sightings taken off the map, either soft deleted or moved out of the sightings table by the retention job.
+    Partitioned by month of date_time so it can grow without bound and old months can be dropped whole.
+    """
+    __tablename__ = 'sightings_archive'
+    __table_args__ = (
+        Index('ix_sightings_archive_animal_id_date_time', 'animal_id', 'date_time'),
+        {'postgresql_partition_by': 'RANGE (date_time)'},
+    )
+
+    # Columns; the primary key of a partitioned table has to include the partition key.
+    id = Column(UUID(as_uuid=True), primary_key=True)
+    date_time = Column(DateTime(timezone=True), primary_key=True)
+    latitude = Column(Float, nullable=False)
+    longitude = Column(Float, nullable=False)
+    animal_id = Column(Integer, ForeignKey('animals.id'), nullable=False)
+    observations = Column(Integer, nullable=False, default=1, server_default='1')
+    reason = Column(String(20), nullable=False)
+    archived_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+    def __repr__(self):
+        return (
+            f"<SightingArchive(id={self.id}, "
+            f"date_time={self.date_time}, "
+            f"reason={self.reason}, "
+            f"archived_at={self.archived_at})>"
+        )
+
+    @classmethod
+    def move_in(cls, session, conditions, reason):
+        """
+        Move the sightings matching conditions into the archive in one statement in the caller's transaction, creating
+        the monthly partitions they need first. Returns (id, animal_id, date_time, latitude, longitude) rows.
+        """
+        first, last = session.execute(
+            select(func.min(Sighting.date_time), func.max(Sighting.date_time)).where(*conditions)
+        ).one()
+        if first is None:
+            return []
+        ensure_monthly_partitions(session, cls.__tablename__, first, last)
+
+        sightings = Sighting.__table__
+        archive = cls.__table__
+        # Bounded by the partitions just created; a sighting added since the lookup waits for the next call.
+        moved = delete(sightings).where(
+            *conditions,
+            sightings.c.date_time >= month_start(first),
+            sightings.c.date_time < next_month(month_start(last))
+        ).returning(*sightings.c).cte('moved')
+        return session.execute(
+            insert(archive).from_select(
+                ['id', 'date_time', 'latitude', 'longitude', 'animal_id', 'observations', 'reason'],
+                select(moved.c.id, moved.c.date_time, moved.c.latitude, moved.c.longitude, moved.c.animal_id,
+                       moved.c.observations, literal(reason))
+            ).returning(archive.c.id, archive.c.animal_id, archive.c.date_time, archive.c.latitude, archive.c.longitude)
+        ).all()
+
+    @classmethod
+    def move_out(cls, session, ids):
+        """
+        Move archived sightings back into the sightings table in one statement in the caller's transaction. Returns
+        rows like move_in.
+        """
+        sightings = Sighting.__table__
+        archive = cls.__table__
+        moved = delete(archive).where(archive.c.id.in_(ids)).returning(*archive.c).cte('moved')
+        return session.execute(
+            insert(sightings).from_select(
+                ['id', 'date_time', 'latitude', 'longitude', 'animal_id', 'observations'],
+                select(moved.c.id, moved.c.date_time, moved.c.latitude, moved.c.longitude, moved.c.animal_id,
+                       moved.c.observations)
+            ).returning(
+                sightings.c.id, sightings.c.animal_id, sightings.c.date_time, sightings.c.latitude,
+                sightings.c.longitude
+            )
+        ).all()
+
+
+class PendingSighting(Base):
+    """
+    Write-behind queue of submitted sightings waiting to be inserted in batches. A queued sighting keeps its id when
+    it is written, unless it repeats a sighting already recorded and is merged into it instead (see merged_into).
+    Rows are kept for a while after they are written so retried submissions with the same idempotency key are
+    recognized.
+    """
+    __tablename__ = 'pending_sightings'
+    __table_args__ = (
+        Index('ix_pending_sightings_status_created_at', 'status', 'created_at'),
+    )
+
+    # Columns
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    idempotency_key = Column(String(100), unique=True)
+    status = Column(String(10), nullable=False, default=PENDING)
+    created_at = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
+    date_time = Column(DateTime(timezone=True), nullable=False)
+    latitude = Column(Float, nullable=False)
+    longitude = Column(Float, nullable=False)
+    animal_id = Column(Integer, ForeignKey('animals.id'), nullable=False)
+    # The sighting a written submission was merged into, when it wasn't written as a sighting of its own.
+    merged_into = Column(UUID(as_uuid=True))
+
+    def __repr__(self):
+        return (
+            f"<PendingSighting(id={self.id}, "
+            f"idempotency_key={self.idempotency_key}, "
+            f"status={self.status})>"
+        )
+
+    @classmethod
+    def enqueue(cls, animal_id, date_time, latitude, longitude, idempotency_key=None):
+        """
+        Queue a validated sighting. Returns (id, created); a retry with a known idempotency key gets the id of the
+        original submission and created False.
+        """
+        stmt = pg_insert(cls.__table__).values(
+            id=uuid.uuid4(),
+            idempotency_key=idempotency_key,
+            status=PENDING,
+            created_at=datetime.now(timezone.utc),
             animal_id=animal_id,
             date_time=date_time,
             latitude=latitude,
             longitude=longitude
-        )
+        ).on_conflict_do_nothing(index_elements=[cls.idempotency_key]).returning(cls.id)
 
-        Session = App.get_persistent_store_database('primary_db', as_sessionmaker=True)
-        with Session() as session:
-            session.add(new_sighting)
+        with unit_of_work() as session:
+            pending_id = session.execute(stmt).scalar()
+            if pending_id is None:
+                pending_id = session.execute(select(cls.id).filter_by(idempotency_key=idempotency_key)).scalar_one()
+                return pending_id, False
             session.commit()
+            return pending_id, True
 
     @classmethod
-    def delete(cls, sighting_id):
-        Session = App.get_persistent_store_database('primary_db', as_sessionmaker=True)
-        with Session() as session:
-            sighting = session.query(Sighting).filter(Sighting.id == sighting_id).first()
-            if sighting:
-                session.delete(sighting)
+    def status_of(cls, pending_id):
+        """
+        Get the (status, sighting id) of a queued sighting, or None if it is unknown. The sighting id is its own id
+        unless it was merged into another sighting.
+        """
+        with session_scope() as session:
+            row = session.execute(select(cls.status, cls.merged_into).filter_by(id=pending_id)).one_or_none()
+        if row is None:
+            return None
+        return row.status, row.merged_into or pending_id
+
+    @classmethod
+    def write_batch(cls, limit):
+        """
+        Move up to limit queued sightings into the sightings table in one transaction. Rows locked by another worker
+        are skipped. Returns the number written.
+        """
+        with unit_of_work() as session:
+            pending = session.execute(
+                select(cls.id, cls.animal_id, cls.date_time, cls.latitude, cls.longitude)
+                .where(cls.status == PENDING).order_by(cls.created_at).limit(limit)
+                .with_for_update(skip_locked=True)
+            ).all()
+            if not pending:
+                return 0
+
+            session.execute(
+                update(cls).where(cls.id.in_([row.id for row in pending])).values(status=WRITTEN)
+                .execution_options(synchronize_session=False)
+            )
+            merged = {}
+            try:
+                inserted = Sighting.insert_rows(session, [row._asdict() for row in pending], merged=merged)
+                if merged:
+                    pending_sightings = cls.__table__
+                    session.execute(
+                        update(pending_sightings).where(pending_sightings.c.id == bindparam('b_id'))
+                        .values(merged_into=bindparam('b_merged_into')),
+                        [
+                            {'b_id': pending_id, 'b_merged_into': sighting_id}
+                            for pending_id, sighting_id in merged.items()
+                        ]
+                    )
+                # The status changes, the sightings and the merge records commit together.
                 session.commit()
-                return True
-        return False
+            except IntegrityError:
+                session.rollback()
+            else:
+                Sighting.publish_added(inserted)
+                return len(pending)
+
+        if limit > 1:
+            # Isolate the row that can't be written by retrying this batch one sighting at a time.
+            return sum(cls.write_batch(1) for _ in pending)
+
+        # Mark it failed (e.g. its animal no longer exists) so it doesn't block the queue.
+        with unit_of_work() as session:
+            session.execute(
+                update(cls).where(cls.id == pending[0].id).values(status=FAILED)
+                .execution_options(synchronize_session=False)
+            )
+            session.commit()
+        return 0
 
     @classmethod
-    def all(cls):
-        Session = App.get_persistent_store_database('primary_db', as_sessionmaker=True)
-        with Session() as session:
-            return session.query(cls).options(joinedload(cls.animal)).all()
+    def purge_written(cls, older_than):
+        with unit_of_work() as session:
+            session.execute(
+                delete(cls).where(cls.status == WRITTEN, cls.created_at < older_than)
+                .execution_options(synchronize_session=False)
+            )
+            session.commit()
 
 
-def _register_valid_animals():
+class DataVersion(Base):
+    """
+    Change counter for a set of data, bumped in the same transaction as every write to it. Lets responses be
+    validated and cached without querying the data itself.
+    """
+    __tablename__ = 'data_versions'
+
+    # Columns
+    name = Column(String(50), primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
+
+    def __repr__(self):
+        return (
+            f"<DataVersion(name={self.name}, "
+            f"version={self.version}, "
+            f"updated_at={self.updated_at})>"
+        )
+
+    @classmethod
+    def bump(cls, session, name):
+        session.execute(
+            update(cls).where(cls.name == name).values(version=cls.version + 1, updated_at=func.now())
+            .execution_options(synchronize_session=False)
+        )
+
+    @classmethod
+    def current(cls, name):
+        """
+        Get the (version, updated_at) of the named data.
+        """
+        with session_scope() as session:
+            return session.execute(select(cls.version, cls.updated_at).where(cls.name == name)).one()
+
+
+def _valid_animals():
     images_path = '/static/wildatlas/images'
-    registered_animals = [
+    return [
         Animal(name='Bear', logo_path=f'{images_path}/bear_logo.svg', pin_path=f'{images_path}/bear_pin.svg'),
         Animal(name='Beaver', logo_path=f'{images_path}/beaver_logo.svg', pin_path=f'{images_path}/beaver_pin.svg'),
         Animal(name='Bison', logo_path=f'{images_path}/bison_logo.svg', pin_path=f'{images_path}/bison_pin.svg'),
@@ -118,39 +1192,46 @@ def _register_valid_animals():
         Animal(name='Wolf', logo_path=f'{images_path}/wolf_logo.svg', pin_path=f'{images_path}/wolf_pin.svg')
     ]
 
-    Session = App.get_persistent_store_database('primary_db', as_sessionmaker=True)
-    with Session() as session:
-        # Ensure no duplicate animals are registered here. From this point on animal ID's can and should be used.
-        for animal_to_add in registered_animals:
-            if not session.query(Animal).filter(Animal.name == animal_to_add.name).first():
-                session.add(animal_to_add)
-                print(f"Registered animal: {animal_to_add}")
 
+def _register_valid_animals():
+    animals = Animal.__table__
+    stmt = pg_insert(animals).values([
+        {'name': animal.name, 'logo_path': animal.logo_path, 'pin_path': animal.pin_path}
+        for animal in _valid_animals()
+    ])
+    # Idempotent: registered animals are left alone unless their assets moved. From this point on animal ID's can and
+    # should be used.
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[animals.c.name],
+        set_={'logo_path': stmt.excluded.logo_path, 'pin_path': stmt.excluded.pin_path},
+        where=(animals.c.logo_path != stmt.excluded.logo_path) | (animals.c.pin_path != stmt.excluded.pin_path)
+    ).returning(animals.c.name)
+
+    with unit_of_work() as session:
+        registered = session.execute(stmt).scalars().all()
         session.commit()
 
+    if registered:
+        print(f"Registered animals: {', '.join(registered)}")
+    Animal.invalidate_catalog()
+
 
 def _generate_random_sightings():
-    registered_animals = Animal.all()
-
-    # Approximate bounding box for Yellowstone National Park
-    max_lat, max_lon = 45.05, -110.25
-    min_lat, min_lon = 44.15, -110.75
-
-    for animal in registered_animals:
-        days_ago = random.randint(0, 15)
-        starting_date = datetime.now()
-        # starting_date = datetime(2025, 7, 14, 14, 30, 0)
-        start_date = starting_date - timedelta(days=30)
-        sighting_date = start_date - timedelta(days=days_ago)
-        latitude = round(random.uniform(min_lat, max_lat), 6)
-        longitude = round(random.uniform(min_lon, max_lon), 6)
-        Sighting.add(
-            animal.id,
-            date_time=sighting_date,
-            latitude=latitude,
-            longitude=longitude
-        )
-    print(f'Generated {len(registered_animals)} random sightings.')
+    min_lon, min_lat, max_lon, max_lat = YELLOWSTONE_BBOX
+    start_date = datetime.now(timezone.utc) - timedelta(days=30)
+
+    rows = [
+        {
+            'animal_id': animal_id,
+            'date_time': start_date - timedelta(days=random.randint(0, 15)),
+            'latitude': round(random.uniform(min_lat, max_lat), 6),
+            'longitude': round(random.uniform(min_lon, max_lon), 6),
+        }
+        for animal_id in Animal.catalog()
+    ]
+    # One transaction for all of them; they are spread out on purpose, so don't merge any.
+    Sighting.bulk_add(rows, dedup=False)
+    print(f'Generated {len(rows)} random sightings.')
 
 
 def init_primary_db(engine, first_time):
@@ -158,7 +1239,33 @@ def init_primary_db(engine, first_time):
     Initialize the primary database.
     """
     Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        # create_all skips tables that already exist, so add any indexes and columns introduced since they were
+        # created. Columns are checked first because ALTER TABLE locks the table even when it has nothing to do.
+        for index in (*Animal.__table__.indexes, *Sighting.__table__.indexes):
+            index.create(connection, checkfirst=True)
+        inspector = inspect(connection)
+        for table in (Sighting.__tablename__, SightingArchive.__tablename__):
+            if 'observations' not in {column['name'] for column in inspector.get_columns(table)}:
+                connection.execute(text(f'ALTER TABLE {table} ADD COLUMN observations INTEGER NOT NULL DEFAULT 1'))
+        if 'merged_into' not in {column['name'] for column in inspector.get_columns(PendingSighting.__tablename__)}:
+            connection.execute(text(f'ALTER TABLE {PendingSighting.__tablename__} ADD COLUMN merged_into UUID'))
     _register_valid_animals()
 
+    with unit_of_work() as session:
+        if is_partitioned(session, Sighting.__tablename__):
+            Sighting.maintain_partitions(session)
+        else:
+            print('The sightings table predates partitioning; run the partition_sightings command to convert it.')
+
+        # Backfill statistics for sightings recorded before the statistics table existed.
+        if session.query(Sighting.id).first() and not session.query(SightingDailyStat.animal_id).first():
+            lift_statement_timeout(session)
+            SightingDailyStat.rebuild(session)
+        if session.get(DataVersion, SIGHTINGS_DATA) is None:
+            session.add(DataVersion(name=SIGHTINGS_DATA, version=0))
+        session.commit()
+
     if first_time:
-        _generate_random_sightings()
+        with unit_of_work():
+            _generate_random_sightings()
@@ -0,0 +1,135 @@
+from pathlib import Path
+import copy
+import json
+import threading
+
+NATIONAL_PARKS = (
+    {
+        'id': 'yellowstone',
+        'file': 'YellowstoneNationalPark.geojson',
+        'name': 'Yellowstone National Park',
+        'title': 'Yellowstone National Park',
+        'variable': 'Yellowstone National Park'
+    },
+)
+
+# (minimum zoom level, Douglas-Peucker tolerance in degrees). A tolerance of None serves the full resolution boundary.
+BOUNDARY_LEVELS = (
+    (0, 0.005),
+    (9, 0.001),
+    (12, 0.0002),
+    (15, None),
+)
+
+
+def get_park(park_id):
+    return next((park for park in NATIONAL_PARKS if park['id'] == park_id), None)
+
+
+def level_for_zoom(zoom):
+    """
+    Get the index into BOUNDARY_LEVELS to serve at the given zoom level.
+    """
+    level = 0
+    for index, (min_zoom, _) in enumerate(BOUNDARY_LEVELS):
+        if zoom >= min_zoom:
+            level = index
+    return level
+
+
+def simplify_ring(coordinates, tolerance):
+    """
+    Simplify a line or closed ring of [lon, lat] coordinates with the Douglas-Peucker algorithm.
+    """
+    import numpy as np
+
+    points = np.asarray(coordinates, dtype=float)[:, :2]
+    if len(points) < 3:
+        return coordinates
+
+    keep = np.zeros(len(points), dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end <= start + 1:
+            continue
+
+        a, b = points[start], points[end]
+        segment = points[start + 1:end]
+        ab = b - a
+        length = np.hypot(*ab)
+        if length == 0:
+            # Closed ring: measure from the shared start/end point instead of a line.
+            distances = np.hypot(*(segment - a).T)
+        else:
+            distances = np.abs(ab[0] * (segment[:, 1] - a[1]) - ab[1] * (segment[:, 0] - a[0])) / length
+
+        farthest = int(np.argmax(distances))
+        if distances[farthest] > tolerance:
+            index = start + 1 + farthest
+            keep[index] = True
+            stack.append((start, index))
+            stack.append((index, end))
+
+    simplified = points[keep]
+    # Rings must keep at least four positions to stay valid polygons.
+    if len(simplified) < 4:
+        return coordinates
+    return simplified.tolist()
+
+
+def simplify_geojson(geojson, tolerance):
+    """
+    Return a copy of a GeoJSON FeatureCollection of (Multi)Polygons with every ring simplified.
+    """
+    simplified = copy.deepcopy(geojson)
+    for feature in simplified['features']:
+        geometry = feature['geometry']
+        if geometry['type'] == 'Polygon':
+            geometry['coordinates'] = [simplify_ring(ring, tolerance) for ring in geometry['coordinates']]
+        elif geometry['type'] == 'MultiPolygon':
+            geometry['coordinates'] = [
+                [simplify_ring(ring, tolerance) for ring in polygon] for polygon in geometry['coordinates']
+            ]
+    return simplified
+
+
+class ParkBoundary:
+    """
+    A parsed park boundary and its precomputed simplified versions, one per entry in BOUNDARY_LEVELS.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.mtime = self.path.stat().st_mtime
+        with open(self.path, 'r', encoding='utf-8') as f:
+            geojson = json.load(f)
+
+        self.levels = []
+        for _, tolerance in BOUNDARY_LEVELS:
+            self.levels.append(geojson if tolerance is None else simplify_geojson(geojson, tolerance))
+        # Serialized once so responses don't re-encode the boundary on every request.
+        self.encoded_levels = [json.dumps(level) for level in self.levels]
+
+
+_boundaries = {}
+_boundaries_lock = threading.Lock()
+
+
+def get_park_boundary(path):
+    """
+    Get the cached ParkBoundary for a GeoJSON file, re-reading it only when the file has been modified.
+    """
+    path = Path(path)
+    mtime = path.stat().st_mtime
+    boundary = _boundaries.get(path)
+    if boundary is not None and boundary.mtime == mtime:
+        return boundary
+
+    with _boundaries_lock:
+        boundary = _boundaries.get(path)
+        if boundary is None or boundary.mtime != mtime:
+            boundary = ParkBoundary(path)
+            _boundaries[path] = boundary
+        return boundary
@@ -0,0 +1,116 @@
+from datetime import datetime, timezone
+import re
+
+from sqlalchemy import func, select, text
+
+
+def month_start(value):
+    """
+    Get the start of the UTC month containing an aware datetime.
+    """
+    value = value.astimezone(timezone.utc)
+    return datetime(value.year, value.month, 1, tzinfo=timezone.utc)
+
+
+def next_month(month):
+    return month.replace(year=month.year + month.month // 12, month=month.month % 12 + 1)
+
+
+def partition_name(table, month):
+    return f'{table}_{month:%Y_%m}'
+
+
+def default_partition_name(table):
+    return f'{table}_default'
+
+
+def is_partitioned(session, table):
+    return session.execute(
+        text('SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table))'),
+        {'table': table}
+    ).scalar()
+
+
+def _has_table(session, name):
+    return session.execute(select(func.to_regclass(name))).scalar() is not None
+
+
+def monthly_partitions(session, table):
+    """
+    Get the months of the monthly partitions of a table, oldest first.
+    """
+    names = session.execute(
+        text(
+            'SELECT child.relname FROM pg_inherits '
+            'JOIN pg_class child ON child.oid = pg_inherits.inhrelid '
+            'WHERE pg_inherits.inhparent = to_regclass(:table)'
+        ),
+        {'table': table}
+    ).scalars().all()
+    pattern = re.compile(rf'{re.escape(table)}_(\d{{4}})_(\d{{2}})')
+    return sorted(
+        datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=timezone.utc)
+        for match in map(pattern.fullmatch, names) if match
+    )
+
+
+def ensure_default_partition(session, table):
+    """
+    Create the partition that catches rows outside every monthly partition, so writes never fail for want of one.
+    """
+    session.execute(text(f'CREATE TABLE IF NOT EXISTS {default_partition_name(table)} PARTITION OF {table} DEFAULT'))
+
+
+def ensure_monthly_partitions(session, table, start, end):
+    """
+    Create the monthly partitions of a table partitioned by RANGE (date_time) that cover start to end, in the
+    caller's transaction. Rows already caught by the default partition are moved into the new partitions. Concurrent
+    callers wait for each other instead of racing to create the same partition.
+    """
+    session.execute(select(func.pg_advisory_xact_lock(func.hashtext(table))))
+    default = default_partition_name(table)
+    has_default = _has_table(session, default)
+
+    month = month_start(start)
+    while month <= end:
+        following = next_month(month)
+        name = partition_name(table, month)
+        bounds = f"FROM ('{month.isoformat()}') TO ('{following.isoformat()}')"
+        if not has_default:
+            session.execute(text(f'CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} FOR VALUES {bounds}'))
+        elif not _has_table(session, name):
+            # A new partition can't overlap rows in the default partition, so build it beside the table, move the
+            # month's rows across and attach it; attaching only takes a SHARE UPDATE EXCLUSIVE lock on the parent.
+            session.execute(text(f'CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'))
+            session.execute(
+                text(
+                    f'WITH moved AS (DELETE FROM {default} WHERE date_time >= :start AND date_time < :end '
+                    f'RETURNING *) INSERT INTO {name} SELECT * FROM moved'
+                ),
+                {'start': month, 'end': following}
+            )
+            session.execute(text(f'ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES {bounds}'))
+        month = following
+
+
+def split_default_partition(session, table):
+    """
+    Move any rows caught by the default partition into monthly partitions of their own.
+    """
+    default = default_partition_name(table)
+    if not _has_table(session, default):
+        return
+    first, last = session.execute(text(f'SELECT min(date_time), max(date_time) FROM {default}')).one()
+    if first is not None:
+        ensure_monthly_partitions(session, table, first, last)
+
+
+def drop_monthly_partitions(session, table, before):
+    """
+    Drop the monthly partitions of a table that end on or before the given time, in the caller's transaction.
+    Returns the months dropped, oldest first.
+    """
+    dropped = [month for month in monthly_partitions(session, table) if next_month(month) <= before]
+    for month in dropped:
+        session.execute(text(f'DROP TABLE {partition_name(table, month)}'))
+    return dropped
@@ -6,23 +6,446 @@ $(document).ready(function() {
     let layer = layers.find(layer => layer.tethys_data !== undefined && layer.tethys_data.layer_id === "Animal Sightings" );
     if (layer) {
         const svgStyleFunct = function(feature) {
-            const iconPath = feature.A.pin_path || '/static/wildatlas/images/default_icon.svg';
-            feature.A.Date = formatDateToLocal(feature.A.Date)
+            const iconPath = feature.get('pin_path') || '/static/wildatlas/images/default_icon.svg';
+            const count = feature.get('Sightings');
             return new ol.style.Style({
                 image: new ol.style.Icon({
                     src: iconPath,
-                    scale: 0.08, // Adjust the scale as needed
+                    scale: count ? 0.08 + Math.min(Math.log10(count), 3) * 0.02 : 0.08, // Adjust the scale as needed
                     anchor: [0.5, 0.5], // Adjust the anchor point as needed
                     anchorXUnits: 'fraction',
                     anchorYUnits: 'fraction'
-                })
+                }),
+                text: count ? new ol.style.Text({
+                    text: String(count),
+                    offsetY: 22,
+                    font: 'bold 12px sans-serif',
+                    fill: new ol.style.Fill({color: '#000'}),
+                    stroke: new ol.style.Stroke({color: '#fff', width: 3})
+                }) : undefined
             });
         };
         layer.setStyle(svgStyleFunct);
 
+        // Below the cluster zoom threshold show per-animal clusters aggregated by the server.
+        const view = map.getView();
+        const clusterSource = new ol.source.Vector({
+            strategy: ol.loadingstrategy.tile(ol.tilegrid.createXYZ({tileSize: 512})),
+            loader: compactLoader(resolution => {
+                const zoom = Math.floor(view.getZoomForResolution(resolution));
+                return `${WILDATLAS_URLS.sightingClusters}?format=compact&zoom=${zoom}`;
+            }, readCompactClusters)
+        });
+        layer.setSource(clusterSource);
+        layer.setMaxZoom(WILDATLAS_CLUSTER_ZOOM_THRESHOLD);
+
+        let clusterZoom = Math.floor(view.getZoom());
+        map.on('moveend', function() {
+            const zoom = Math.floor(view.getZoom());
+            if (zoom !== clusterZoom) {
+                clusterSource.clear(true);
+                clusterZoom = zoom;
+            }
+        });
+
+        // Above it show individual pins from cached vector tiles.
+        const tileLayer = new ol.layer.VectorTile({
+            source: new ol.source.VectorTile({
+                format: new ol.format.MVT(),
+                url: WILDATLAS_URLS.sightingTile,
+                maxZoom: WILDATLAS_MAX_TILE_ZOOM
+            }),
+            style: svgStyleFunct,
+            minZoom: WILDATLAS_CLUSTER_ZOOM_THRESHOLD,
+            visible: layer.getVisible()
+        });
+        map.addLayer(tileLayer);
+
+        // Pins added since the tiles were loaded, and tile pins hidden because they have since been deleted.
+        const liveLayer = new ol.layer.Vector({
+            source: new ol.source.Vector(),
+            style: svgStyleFunct,
+            minZoom: WILDATLAS_CLUSTER_ZOOM_THRESHOLD,
+            visible: layer.getVisible()
+        });
+        map.addLayer(liveLayer);
+        const deletedIds = new Set();
+        tileLayer.setStyle(feature => deletedIds.has(feature.get('sighting_id')) ? null : svgStyleFunct(feature));
+
+        layer.on('change:visible', () => {
+            tileLayer.setVisible(layer.getVisible());
+            liveLayer.setVisible(layer.getVisible());
+        });
+
+        addPlaybackControl(map, layer, svgStyleFunct, [tileLayer, liveLayer]);
+
+        subscribeToUpdates(function(message) {
+            if (message.event === 'refresh') {
+                deletedIds.clear();
+                liveLayer.getSource().clear();
+                tileLayer.getSource().refresh();
+                clusterSource.refresh();
+                return;
+            }
+            const sighting = message.sighting;
+            const added = message.event === 'added';
+            patchClusters(map, clusterSource, clusterZoom, sighting, added ? 1 : -1);
+
+            const liveFeature = liveLayer.getSource().getFeatureById(sighting.id);
+            if (added) {
+                deletedIds.delete(sighting.id);
+                const feature = new ol.Feature({
+                    geometry: new ol.geom.Point(
+                        ol.proj.fromLonLat([sighting.longitude, sighting.latitude], view.getProjection())
+                    ),
+                    sighting_id: sighting.id,
+                    animal: sighting.animal,
+                    pin_path: sighting.pin_path,
+                    date: sighting.date_time
+                });
+                feature.setId(sighting.id);
+                liveLayer.getSource().addFeature(feature);
+            } else if (liveFeature) {
+                liveLayer.getSource().removeFeature(liveFeature);
+            } else {
+                deletedIds.add(sighting.id);
+                tileLayer.changed();
+            }
+        });
     }
+
+    loadParkBoundariesOnZoom(map, layers);
 });
 
+function loadParkBoundariesOnZoom(map, layers) {
+    // Parks are embedded at the coarsest level; swap in the finer boundary for the current zoom level as it changes.
+    const config = JSON.parse(document.getElementById('wildatlas-national-parks').textContent);
+    const format = new ol.format.GeoJSON();
+    const levelForZoom = zoom => config.levels.filter(minZoom => zoom >= minZoom).length - 1;
+    const loadedLevels = {};
+    let currentLevel = 0;
+
+    const updateParks = function() {
+        const level = levelForZoom(map.getView().getZoom());
+        if (level === currentLevel) {
+            return;
+        }
+        currentLevel = level;
+
+        config.parks.forEach(park => {
+            const parkLayer = layers.find(l => l.tethys_data !== undefined && l.tethys_data.layer_id === park.layer_id);
+            if (!parkLayer) {
+                return;
+            }
+            const key = `${park.layer_id}/${level}`;
+            const setFeatures = geojson => {
+                if (currentLevel !== level) {
+                    return;
+                }
+                const features = format.readFeatures(geojson, {
+                    dataProjection: 'EPSG:4326',
+                    featureProjection: map.getView().getProjection()
+                });
+                features.forEach(feature => feature.set('layer_name', park.layer_id));
+                parkLayer.getSource().clear(true);
+                parkLayer.getSource().addFeatures(features);
+            };
+
+            if (loadedLevels[key]) {
+                setFeatures(loadedLevels[key]);
+            } else {
+                fetch(`${park.url}?zoom=${config.levels[level]}`)
+                    .then(response => response.json())
+                    .then(geojson => {
+                        loadedLevels[key] = geojson;
+                        setFeatures(geojson);
+                    });
+            }
+        });
+    };
+    map.on('moveend', updateParks);
+    updateParks();
+}
+
+function compactLoader(urlFunction, readFeatures) {
+    return function(extent, resolution, projection, success, failure) {
+        const source = this;
+        const bbox = ol.proj.transformExtent(extent, projection, 'EPSG:4326');
+        const url = urlFunction(resolution);
+        fetch(`${url}&bbox=${bbox.join(',')}`)
+            .then(response => response.json())
+            .then(payload => {
+                const features = readFeatures(payload, url, projection);
+                source.addFeatures(features);
+                success(features);
+            })
+            .catch(() => {
+                source.removeLoadedExtent(extent);
+                failure();
+            });
+    };
+}
+
+function decodeColumn(base64, ArrayType) {
+    // Columns are little-endian, as are typed arrays on every platform browsers run on.
+    const binary = atob(base64);
+    const bytes = new Uint8Array(binary.length);
+    for (let i = 0; i < binary.length; i++) {
+        bytes[i] = binary.charCodeAt(i);
+    }
+    return new ArrayType(bytes.buffer);
+}
+
+function compactPoint(coordinates, i, projection) {
+    return new ol.geom.Point(
+        ol.proj.fromLonLat([coordinates[2 * i], coordinates[2 * i + 1]], projection)
+    );
+}
+
+function readCompactClusters(payload, url, projection) {
+    const zoom = new URL(url, window.location.href).searchParams.get('zoom');
+    const coordinates = decodeColumn(payload.coordinates, Float32Array);
+    const animalIds = decodeColumn(payload.animal_ids, Uint16Array);
+    const counts = decodeColumn(payload.counts, Uint32Array);
+    const cells = decodeColumn(payload.cells, Int32Array);
+
+    const features = [];
+    for (let i = 0; i < payload.count; i++) {
+        const animal = payload.animals[animalIds[i]];
+        const feature = new ol.Feature({
+            geometry: compactPoint(coordinates, i, projection),
+            'Animal': animal.name,
+            'Sightings': counts[i],
+            'animal_id': animalIds[i],
+            'pin_path': animal.pin_path,
+            'layer_name': 'Animal Sightings'
+        });
+        feature.setId(`${zoom}/${animalIds[i]}/${cells[2 * i]}/${cells[2 * i + 1]}`);
+        features.push(feature);
+    }
+    return features;
+}
+
+function subscribeToUpdates(onMessage) {
+    const scheme = window.location.protocol === 'https:' ? 'wss' : 'ws';
+    const socket = new WebSocket(`${scheme}://${window.location.host}${WILDATLAS_URLS.sightingUpdates}`);
+    socket.onmessage = event => onMessage(JSON.parse(event.data));
+    // Reconnect after the server restarts or the connection drops.
+    socket.onclose = () => setTimeout(() => subscribeToUpdates(onMessage), 5000);
+}
+
+function patchClusters(map, clusterSource, zoom, sighting, delta) {
+    // Same cell arithmetic as the sighting_clusters endpoint, so the feature id matches the loaded cluster.
+    const cellSize = 360 / (2 ** zoom * WILDATLAS_CLUSTER_CELLS_PER_TILE);
+    const cellX = Math.floor(sighting.longitude / cellSize);
+    const cellY = Math.floor(sighting.latitude / cellSize);
+    const cluster = clusterSource.getFeatureById(`${zoom}/${sighting.animal_id}/${cellX}/${cellY}`);
+    if (cluster) {
+        const count = cluster.get('Sightings') + delta;
+        if (count > 0) {
+            cluster.set('Sightings', count);
+        } else {
+            clusterSource.removeFeature(cluster);
+        }
+        return;
+    }
+
+    // Only start a new cluster where the source has loaded, i.e. in view; elsewhere it comes with the next load.
+    const coordinate = ol.proj.fromLonLat([sighting.longitude, sighting.latitude], map.getView().getProjection());
+    if (delta > 0 && ol.extent.containsCoordinate(map.getView().calculateExtent(), coordinate)) {
+        const feature = new ol.Feature({
+            geometry: new ol.geom.Point(coordinate),
+            'Animal': sighting.animal,
+            'Sightings': delta,
+            'animal_id': sighting.animal_id,
+            'pin_path': sighting.pin_path,
+            'layer_name': 'Animal Sightings'
+        });
+        feature.setId(`${zoom}/${sighting.animal_id}/${cellX}/${cellY}`);
+        clusterSource.addFeature(feature);
+    }
+}
+
+// Steps fetched ahead of the one being shown during playback, and the number of fetched steps kept.
+const PLAYBACK_PREFETCH = 3;
+const PLAYBACK_CACHE_SIZE = 60;
+const PLAYBACK_INTERVAL_MS = 1000;
+
+function addPlaybackControl(map, sightingsLayer, style, popupLayers) {
+    const element = document.createElement('div');
+    element.className = 'sighting-playback ol-unselectable ol-control';
+    element.innerHTML = `
+        <button type="button" class="playback-toggle" title="Play sightings over time">&#9654;</button>
+        <select class="playback-step form-select-sm" title="Step">
+            <option value="day">Day</option>
+            <option value="hour">Hour</option>
+        </select>
+        <input type="range" class="playback-slider" min="0" max="0" value="0" disabled>
+        <span class="playback-label"></span>
+        <button type="button" class="playback-close" title="Back to all sightings" hidden>&#10005;</button>
+    `;
+    map.addControl(new ol.control.Control({element: element}));
+    const toggle = element.querySelector('.playback-toggle');
+    const stepSelect = element.querySelector('.playback-step');
+    const slider = element.querySelector('.playback-slider');
+    const label = element.querySelector('.playback-label');
+    const close = element.querySelector('.playback-close');
+
+    const playbackLayer = new ol.layer.Vector({source: new ol.source.Vector(), style: style, visible: false});
+    map.addLayer(playbackLayer);
+    addTilePopup(map, [...popupLayers, playbackLayer]);
+
+    const steps = new Map();
+    let buckets = [];
+    let index = 0;
+    let timer = null;
+
+    const fetchStep = function(i) {
+        const bucket = buckets[i];
+        const key = `${bucket.start}/${bucket.end}`;
+        if (!steps.has(key)) {
+            // The server leaves out sightings at bucket.end, which belong to the next step.
+            const params = new URLSearchParams({start: bucket.start, end: bucket.end});
+            steps.set(key, fetch(`${WILDATLAS_URLS.sightingPlayback}?${params}`)
+                .then(response => response.json())
+                .then(payload => readCompactSightings(payload, map.getView().getProjection())));
+            if (steps.size > PLAYBACK_CACHE_SIZE) {
+                steps.delete(steps.keys().next().value);
+            }
+        }
+        return steps.get(key);
+    };
+
+    const show = function(i) {
+        index = i;
+        slider.value = i;
+        const bucket = buckets[i];
+        label.textContent = `${formatDateToLocal(bucket.start)} (${bucket.count} sightings)`;
+        fetchStep(i).then(features => {
+            if (index === i) {
+                playbackLayer.getSource().clear(true);
+                playbackLayer.getSource().addFeatures(features);
+            }
+        });
+        for (let n = 1; n <= PLAYBACK_PREFETCH && i + n < buckets.length; n++) {
+            fetchStep(i + n);
+        }
+    };
+
+    const loadTimeline = function() {
+        return fetch(`${WILDATLAS_URLS.sightingTimeline}?step=${stepSelect.value}`)
+            .then(response => response.json())
+            .then(timeline => {
+                buckets = timeline.buckets;
+                slider.max = Math.max(buckets.length - 1, 0);
+                slider.disabled = buckets.length === 0;
+                label.textContent = buckets.length ? '' : 'No sightings';
+            });
+    };
+
+    const enter = function() {
+        sightingsLayer.setVisible(false);
+        playbackLayer.setVisible(true);
+        close.hidden = false;
+    };
+
+    const pause = function() {
+        clearInterval(timer);
+        timer = null;
+        toggle.innerHTML = '&#9654;';
+    };
+
+    const play = function() {
+        enter();
+        toggle.innerHTML = '&#10074;&#10074;';
+        show(index);
+        timer = setInterval(() => show((index + 1) % buckets.length), PLAYBACK_INTERVAL_MS);
+    };
+
+    toggle.addEventListener('click', function() {
+        if (timer !== null) {
+            pause();
+        } else if (buckets.length) {
+            play();
+        } else {
+            loadTimeline().then(() => buckets.length && play());
+        }
+    });
+
+    slider.addEventListener('input', function() {
+        pause();
+        enter();
+        show(Number(slider.value));
+    });
+
+    stepSelect.addEventListener('change', function() {
+        const wasPlaying = timer !== null;
+        pause();
+        index = 0;
+        loadTimeline().then(() => {
+            if (wasPlaying && buckets.length) {
+                play();
+            } else if (buckets.length && playbackLayer.getVisible()) {
+                show(0);
+            }
+        });
+    });
+
+    close.addEventListener('click', function() {
+        pause();
+        playbackLayer.setVisible(false);
+        playbackLayer.getSource().clear(true);
+        sightingsLayer.setVisible(true);
+        close.hidden = true;
+    });
+}
+
+function readCompactSightings(payload, projection) {
+    const coordinates = decodeColumn(payload.coordinates, Float32Array);
+    const animalIds = decodeColumn(payload.animal_ids, Uint16Array);
+    const times = decodeColumn(payload.times, BigInt64Array);
+    const ids = decodeColumn(payload.ids, Uint8Array);
+
+    const features = [];
+    for (let i = 0; i < payload.count; i++) {
+        const animal = payload.animals[animalIds[i]];
+        const hex = Array.from(ids.subarray(16 * i, 16 * i + 16), b => b.toString(16).padStart(2, '0')).join('');
+        const id = `${hex.slice(0, 8)}-${hex.slice(8, 12)}-${hex.slice(12, 16)}-${hex.slice(16, 20)}-${hex.slice(20)}`;
+        const feature = new ol.Feature({
+            geometry: compactPoint(coordinates, i, projection),
+            sighting_id: id,
+            animal: animal.name,
+            pin_path: animal.pin_path,
+            date: new Date(Number(times[i]) * 1000).toISOString()
+        });
+        feature.setId(id);
+        features.push(feature);
+    }
+    return features;
+}
+
+function addTilePopup(map, popupLayers) {
+    const container = document.createElement('div');
+    container.className = 'sighting-tile-popup';
+    const popup = new ol.Overlay({element: container, positioning: 'bottom-center', offset: [0, -16]});
+    map.addOverlay(popup);
+
+    map.on('singleclick', function(event) {
+        const feature = map.forEachFeatureAtPixel(event.pixel, f => f, {layerFilter: l => popupLayers.includes(l)});
+        if (!feature) {
+            popup.setPosition(undefined);
+            return;
+        }
+        const ageHours = Math.round((Date.now() - new Date(feature.get('date'))) / 3600000);
+        container.innerHTML = `
+            <strong>${feature.get('animal')}</strong><br>
+            ${formatDateToLocal(feature.get('date'))}<br>
+            ~${ageHours} hours ago
+        `;
+        popup.setPosition(event.coordinate);
+    });
+}
+
 function formatDateToLocal(isoString) {
     const date = new Date(isoString);
     if (isNaN(date)) {
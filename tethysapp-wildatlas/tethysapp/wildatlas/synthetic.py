@@ -0,0 +1,159 @@
+from datetime import datetime, timezone
+import uuid
+
+import numpy as np
+
+from .models import YELLOWSTONE_BBOX
+
+# Hotspots (e.g. a valley or a river crossing) each animal is usually seen around, and their radius in degrees.
+HOTSPOTS_PER_ANIMAL = 6
+HOTSPOT_SPREAD = 0.02
+
+# Share of sightings scattered over the whole area instead of around a hotspot.
+BACKGROUND_SHARE = 0.1
+
+# Share of sightings that follow up an earlier one: the same animal seen again close by shortly after, as when a
+# herd is reported by several visitors.
+FOLLOW_UP_SHARE = 0.3
+FOLLOW_UP_MINUTES = 30
+FOLLOW_UP_SPREAD = 0.002
+
+# (local hour, standard deviation in hours, weight) of the times of day animals are reported; most wildlife is
+# active around dawn and dusk.
+DAILY_PEAKS = ((7, 1.5, 0.45), (19, 1.5, 0.4), (13, 3.0, 0.15))
+
+# Hours from UTC to local time in the park (Mountain Daylight Time).
+LOCAL_UTC_OFFSET = -6
+
+
+def _season_weights(days, end):
+    """
+    Relative number of sightings on each of the days before end: busiest in summer when the park is open and on
+    weekends.
+    """
+    dates = np.datetime64(end.date()) - np.arange(days)
+    day_of_year = (dates - dates.astype('datetime64[Y]')).astype(int)
+    season = 0.25 + np.exp(-0.5 * ((day_of_year - 200) / 45.0) ** 2)
+    weekday = (dates.astype('datetime64[D]').astype(int) + 3) % 7
+    weights = season * np.where(weekday >= 5, 1.3, 1.0)
+    return weights / weights.sum()
+
+
+def _minute_weights():
+    minutes = np.arange(24 * 60) / 60.0
+    weights = sum(weight * np.exp(-0.5 * ((minutes - hour) / sd) ** 2) for hour, sd, weight in DAILY_PEAKS)
+    return weights / weights.sum()
+
+
+class SyntheticSightings:
+    """
+    Vectorized generator of realistic sightings for load tests: clustered around per-animal hotspots in space, around
+    dawn, dusk, summer and weekends in time, with bursts of follow-up sightings.
+
+    The seed fixes the hotspots and the stream the sightings drawn from them, so generators with the same seed and
+    different streams add new, distinct sightings to the same landscape.
+    """
+
+    def __init__(self, animal_ids, seed=0, stream=0, days=365, end=None, bbox=YELLOWSTONE_BBOX,
+                 hotspots_per_animal=HOTSPOTS_PER_ANIMAL):
+        if len(animal_ids) == 0:
+            raise ValueError('At least one animal is needed to generate sightings.')
+
+        layout = np.random.default_rng(seed)
+        self.rng = np.random.default_rng([seed, stream])
+        self.animal_ids = np.asarray(animal_ids, dtype=np.int64)
+        self.bbox = bbox
+        self.end = end or datetime.now(timezone.utc)
+        self.day_weights = _season_weights(days, self.end)
+        self.minute_weights = _minute_weights()
+
+        # A few common animals and a long tail of rare ones.
+        popularity = 1.0 / np.arange(1, len(self.animal_ids) + 1)
+        self.animal_weights = layout.permutation(popularity / popularity.sum())
+
+        min_lon, min_lat, max_lon, max_lat = bbox
+        shape = (len(self.animal_ids), hotspots_per_animal)
+        self.hotspot_lon = layout.uniform(min_lon, max_lon, shape)
+        self.hotspot_lat = layout.uniform(min_lat, max_lat, shape)
+        self.hotspot_spread = HOTSPOT_SPREAD * layout.lognormal(0.0, 0.5, shape)
+        self.hotspot_weights = layout.dirichlet(np.ones(hotspots_per_animal), len(self.animal_ids))
+
+    def columns(self, count):
+        """
+        Generate count sightings as arrays: id (count x 16 uuid4 bytes), animal_id, epoch (seconds), latitude and
+        longitude.
+        """
+        rng = self.rng
+        min_lon, min_lat, max_lon, max_lat = self.bbox
+
+        animal = rng.choice(len(self.animal_ids), size=count, p=self.animal_weights)
+
+        # Pick one of the animal's hotspots by inverting the cumulative hotspot weights.
+        cumulative = np.cumsum(self.hotspot_weights[animal], axis=1)
+        hotspot = np.minimum((cumulative < rng.random((count, 1))).sum(axis=1), cumulative.shape[1] - 1)
+        spread = self.hotspot_spread[animal, hotspot]
+        longitude = self.hotspot_lon[animal, hotspot] + rng.normal(0.0, 1.0, count) * spread
+        latitude = self.hotspot_lat[animal, hotspot] + rng.normal(0.0, 1.0, count) * spread
+
+        background = rng.random(count) < BACKGROUND_SHARE
+        longitude[background] = rng.uniform(min_lon, max_lon, background.sum())
+        latitude[background] = rng.uniform(min_lat, max_lat, background.sum())
+
+        day = rng.choice(len(self.day_weights), size=count, p=self.day_weights)
+        minute = rng.choice(len(self.minute_weights), size=count, p=self.minute_weights)
+        midnight = self.end.replace(hour=0, minute=0, second=0, microsecond=0).timestamp()
+        epoch = midnight - day * 86400.0 + (minute - LOCAL_UTC_OFFSET * 60) * 60.0 + rng.uniform(0, 60, count)
+
+        # Follow-ups copy an earlier sighting of the batch, shifted a little in space and later in time.
+        follow_up = np.flatnonzero(rng.random(count) < FOLLOW_UP_SHARE)
+        follow_up = follow_up[follow_up > 0]
+        source = (rng.random(len(follow_up)) * follow_up).astype(np.int64)
+        animal[follow_up] = animal[source]
+        longitude[follow_up] = longitude[source] + rng.normal(0.0, FOLLOW_UP_SPREAD, len(follow_up))
+        latitude[follow_up] = latitude[source] + rng.normal(0.0, FOLLOW_UP_SPREAD, len(follow_up))
+        epoch[follow_up] = epoch[source] + rng.exponential(FOLLOW_UP_MINUTES * 60.0, len(follow_up))
+
+        # Times past end move back by whole days, keeping their time of day.
+        end = self.end.timestamp()
+        epoch -= np.maximum(np.ceil((epoch - end) / 86400.0), 0) * 86400.0
+
+        ids = np.frombuffer(rng.bytes(16 * count), dtype=np.uint8).reshape(count, 16).copy()
+        # Mark the random bytes as version 4, RFC 4122 variant UUIDs.
+        ids[:, 6] = (ids[:, 6] & 0x0f) | 0x40
+        ids[:, 8] = (ids[:, 8] & 0x3f) | 0x80
+
+        return {
+            'id': ids,
+            'animal_id': self.animal_ids[animal],
+            'epoch': np.minimum(epoch, end),
+            'latitude': np.round(np.clip(latitude, min_lat, max_lat), 6),
+            'longitude': np.round(np.clip(longitude, min_lon, max_lon), 6),
+        }
+
+    def rows(self, count):
+        """
+        Generate count sightings as dicts ready to insert into the sightings table.
+        """
+        columns = self.columns(count)
+        return [
+            {
+                'id': uuid.UUID(bytes=id_bytes),
+                'animal_id': animal_id,
+                'date_time': datetime.fromtimestamp(epoch, timezone.utc),
+                'latitude': latitude,
+                'longitude': longitude,
+            }
+            for id_bytes, animal_id, epoch, latitude, longitude in zip(
+                map(bytes, columns['id']), columns['animal_id'].tolist(), columns['epoch'].tolist(),
+                columns['latitude'].tolist(), columns['longitude'].tolist()
+            )
+        ]
+
+    def batches(self, count, batch_size=10000):
+        """
+        Generate count sightings as lists of at most batch_size rows, so large volumes never sit in memory at once.
+        """
+        while count > 0:
+            size = min(batch_size, count)
+            yield self.rows(size)
+            count -= size
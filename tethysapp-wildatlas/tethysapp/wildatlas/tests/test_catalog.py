@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta, timezone
+
+from tethys_sdk.testing import TethysTestCase
+
+from ..app import App
+from ..controllers import process_sighting_form
+from ..db import get_engine, request_session, session_scope
+from ..models import Animal
+
+
+class AnimalCatalogTestCase(TethysTestCase):
+    """
+    The in-process catalog of registered animals.
+    """
+
+    def set_up(self):
+        self.create_test_persistent_stores_for_app(App)
+
+    def tear_down(self):
+        # Don't leave animals from this database in the catalog for the next test.
+        Animal.invalidate_catalog()
+        # The test database can't be dropped while the pool holds connections to it.
+        request_session.remove()
+        get_engine().dispose()
+        self.destroy_test_persistent_stores_for_app(App)
+
+    def add_animal(self, name):
+        with session_scope() as session:
+            session.add(Animal(name=name, logo_path=f'{name}.png', pin_path=f'{name}-pin.png'))
+            session.commit()
+
+    def test_catalog_lists_every_animal_by_name(self):
+        catalog = Animal.catalog()
+
+        with session_scope() as session:
+            animals = session.query(Animal).order_by(Animal.name).all()
+        self.assertEqual(
+            list(catalog.items()),
+            [(animal.id, (animal.id, animal.name, animal.logo_path, animal.pin_path)) for animal in animals]
+        )
+
+    def test_catalog_is_loaded_once_until_invalidated(self):
+        catalog = Animal.catalog()
+        self.add_animal('Aardvark')
+
+        self.assertIs(Animal.catalog(), catalog)
+
+        Animal.invalidate_catalog()
+
+        self.assertIn('Aardvark', [animal.name for animal in Animal.catalog().values()])
+
+    def test_form_rejects_animals_not_in_the_catalog(self):
+        date_time = (datetime.now(timezone.utc) - timedelta(hours=1)).isoformat()
+        post_data = {'date_time': date_time, 'latitude': '44.6', 'longitude': '-110.5'}
+
+        valid, _, _ = process_sighting_form({**post_data, 'animalId': str(next(iter(Animal.catalog())))})
+        self.assertTrue(valid)
+
+        valid, _, errors = process_sighting_form({**post_data, 'animalId': str(max(Animal.catalog()) + 1)})
+        self.assertFalse(valid)
+        self.assertTrue(errors)
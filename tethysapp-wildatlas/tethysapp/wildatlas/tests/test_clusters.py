@@ -0,0 +1,73 @@
+import base64
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from tethys_sdk.testing import TethysTestCase
+
+from ..app import App
+from ..db import get_engine, request_session
+from ..models import Animal, Sighting
+
+# Outside the park, so the first-time random sightings never land nearby. Kept clear of cell edges.
+LATITUDE, LONGITUDE = 44.0, -111.45
+
+BBOX = (LONGITUDE - 0.1, LATITUDE - 0.1, LONGITUDE + 0.1, LATITUDE + 0.3)
+
+
+class SightingClustersTestCase(TethysTestCase):
+    """
+    Grid clustering of sightings in the database and the clusters endpoint.
+    """
+
+    def set_up(self):
+        self.create_test_persistent_stores_for_app(App)
+        self.client = self.get_test_client()
+        self.user = self.create_test_user(username='clusters', password='secret')
+        self.client.force_login(self.user)
+
+        self.animal_id = next(iter(Animal.catalog()))
+        date_time = datetime.now(timezone.utc) - timedelta(hours=1)
+        Sighting.bulk_add([
+            {'animal_id': self.animal_id, 'date_time': date_time, 'latitude': latitude, 'longitude': LONGITUDE}
+            for latitude in (LATITUDE + 0.01, LATITUDE + 0.02, LATITUDE + 0.15)
+        ], dedup=False)
+
+    def tear_down(self):
+        # The test database can't be dropped while the pool holds connections to it.
+        request_session.remove()
+        get_engine().dispose()
+        self.destroy_test_persistent_stores_for_app(App)
+
+    def clusters(self, **params):
+        return self.client.get(App.reverse('sighting_clusters'), {'bbox': ','.join(map(str, BBOX)), **params})
+
+    def test_sightings_are_counted_per_cell(self):
+        clusters = sorted(Sighting.clusters(0.1, bbox=BBOX), key=lambda cluster: cluster.cell_y)
+
+        self.assertEqual([(cluster.cell_x, cluster.cell_y, cluster.count) for cluster in clusters],
+                         [(-1115, 440, 2), (-1115, 441, 1)])
+        self.assertAlmostEqual(clusters[0].latitude, LATITUDE + 0.015)
+        self.assertAlmostEqual(clusters[0].longitude, LONGITUDE)
+
+    def test_geojson_clusters(self):
+        response = self.clusters(zoom=10)
+
+        self.assertEqual(response.status_code, 200)
+        features = response.json()['features']
+        self.assertEqual(sorted(feature['properties']['Sightings'] for feature in features), [1, 2])
+        self.assertTrue(all(feature['properties']['animal_id'] == self.animal_id for feature in features))
+        self.assertTrue(all(feature['id'].startswith(f'10/{self.animal_id}/') for feature in features))
+
+    def test_compact_clusters(self):
+        response = self.clusters(zoom=10, format='compact')
+
+        self.assertEqual(response.status_code, 200)
+        payload = response.json()
+        self.assertEqual(payload['count'], 2)
+        counts = np.frombuffer(base64.b64decode(payload['counts']), dtype='<u4')
+        self.assertEqual(sorted(counts.tolist()), [1, 2])
+
+    def test_invalid_zoom_is_rejected(self):
+        for zoom in ('', 'ten', -1, 100):
+            with self.subTest(zoom=zoom):
+                self.assertEqual(self.clusters(zoom=zoom).status_code, 400)
@@ -0,0 +1,27 @@
+import base64
+from collections import namedtuple
+import uuid
+
+import numpy as np
+from tethys_sdk.testing import TethysTestCase
+
+from ..compact import compact_sightings
+
+CatalogAnimal = namedtuple('CatalogAnimal', ['name', 'logo_path', 'pin_path'])
+ANIMALS = {1: CatalogAnimal('Bison', 'bison.png', 'bison-pin.png')}
+
+
+class CompactSightingsTestCase(TethysTestCase):
+    """
+    The compact columnar encoding of sightings.
+    """
+
+    def test_times_before_1970_and_after_2106_survive(self):
+        times = [-86400, 0, 1752503400, 2 ** 32 + 1]
+        rows = [(uuid.uuid4(), epoch, 44.6, -110.5, 1) for epoch in times]
+
+        payload = compact_sightings(rows, ANIMALS)
+
+        self.assertEqual(payload['count'], 4)
+        self.assertEqual(np.frombuffer(base64.b64decode(payload['times']), dtype='<i8').tolist(), times)
+        self.assertEqual(payload['animals'][1]['name'], 'Bison')
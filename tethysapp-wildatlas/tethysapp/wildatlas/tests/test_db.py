@@ -0,0 +1,108 @@
+import sqlite3
+import threading
+
+from django.core.signals import request_finished
+from sqlalchemy import select
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from tethys_sdk.testing import TethysTestCase
+
+from ..app import App
+from ..db import (
+    InstrumentedQueuePool, get_engine, get_pool_status, pool_metrics, request_session, session_scope, unit_of_work
+)
+from ..models import Animal
+
+
+class InstrumentedQueuePoolTestCase(TethysTestCase):
+    """
+    Checkout counters of the connection pool.
+    """
+
+    def test_blocked_checkouts_are_counted(self):
+        pool = InstrumentedQueuePool(lambda: sqlite3.connect(':memory:'), pool_size=1, max_overflow=0, timeout=0.01)
+        before = pool_metrics.as_dict()
+
+        connection = pool.connect()
+        with self.assertRaises(PoolTimeoutError):
+            pool.connect()
+        connection.close()
+        pool.connect().close()
+
+        after = pool_metrics.as_dict()
+        self.assertEqual(after['checkouts'] - before['checkouts'], 2)
+        self.assertEqual(after['waits'] - before['waits'], 1)
+        self.assertEqual(after['timeouts'] - before['timeouts'], 1)
+
+
+class SessionScopeTestCase(TethysTestCase):
+    """
+    The per-thread request session against the test persistent store.
+    """
+
+    def set_up(self):
+        self.create_test_persistent_stores_for_app(App)
+
+    def tear_down(self):
+        # The test database can't be dropped while the pool holds connections to it.
+        request_session.remove()
+        get_engine().dispose()
+        self.destroy_test_persistent_stores_for_app(App)
+
+    def test_scopes_on_one_thread_share_a_session(self):
+        with session_scope() as first:
+            pass
+        with session_scope() as second:
+            pass
+
+        sessions = []
+        thread = threading.Thread(target=lambda: sessions.append(request_session()))
+        thread.start()
+        thread.join()
+
+        self.assertIs(first, second)
+        self.assertIsNot(sessions[0], first)
+
+    def test_finished_request_removes_the_session(self):
+        with session_scope() as session:
+            session.execute(select(Animal.id)).all()
+
+        request_finished.send(sender=self.__class__)
+
+        with session_scope() as next_session:
+            self.assertIsNot(next_session, session)
+
+    def test_unit_of_work_removes_its_session(self):
+        with unit_of_work() as session:
+            session.execute(select(Animal.id)).all()
+
+        self.assertIsNot(request_session(), session)
+        self.assertEqual(get_pool_status()['checked_out'], 0)
+
+    def test_failed_block_is_rolled_back(self):
+        with self.assertRaises(RuntimeError):
+            with session_scope() as session:
+                session.add(Animal(name='Aardvark', logo_path='aardvark.png', pin_path='aardvark-pin.png'))
+                session.flush()
+                raise RuntimeError('boom')
+
+        with session_scope() as session:
+            self.assertIsNone(session.execute(select(Animal).filter_by(name='Aardvark')).scalar())
+
+    def test_pool_status_counts_the_held_connection(self):
+        with session_scope() as session:
+            session.execute(select(Animal.id)).all()
+            status = get_pool_status()
+
+        self.assertEqual(status['checked_out'], 1)
+        self.assertEqual(status['size'], App.get_custom_setting('db_pool_size'))
+        self.assertEqual(status['max_overflow'], App.get_custom_setting('db_max_overflow'))
+        self.assertIn('timeouts', status)
+
+    def test_pool_endpoint_reports_the_status(self):
+        client = self.get_test_client()
+        client.force_login(self.create_test_user(username='pool', password='secret'))
+
+        response = client.get(App.reverse('pool_status'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.json()), set(get_pool_status()))
@@ -0,0 +1,63 @@
+from datetime import datetime, timedelta, timezone
+
+from tethys_sdk.testing import TethysTestCase
+
+from ..dedup import Tolerance, distance, merge_rows
+
+START = datetime(2025, 7, 14, 14, 30, tzinfo=timezone.utc)
+TOLERANCE = Tolerance(distance=100, window=timedelta(minutes=10))
+
+
+def report(animal_id, minutes, latitude=44.6, longitude=-110.5):
+    return {
+        'animal_id': animal_id, 'date_time': START + timedelta(minutes=minutes),
+        'latitude': latitude, 'longitude': longitude
+    }
+
+
+class MergeReportsTestCase(TethysTestCase):
+    """
+    Merging of repeated reports within one batch.
+    """
+
+    def test_distance(self):
+        # A thousandth of a degree of latitude is about 111 metres.
+        self.assertAlmostEqual(distance(44.6, -110.5, 44.601, -110.5), 111.2, places=1)
+        self.assertEqual(distance(44.6, -110.5, 44.6, -110.5), 0)
+
+    def test_nearby_reports_of_the_same_animal_are_merged_into_the_first(self):
+        survivors = merge_rows([report(1, 5, 44.6003), report(1, 0), report(1, 8, 44.5996)], TOLERANCE)
+
+        self.assertEqual(len(survivors), 1)
+        self.assertEqual(survivors[0]['date_time'], START)
+        self.assertEqual(survivors[0]['observations'], 3)
+
+    def test_reports_outside_the_tolerance_are_kept(self):
+        survivors = merge_rows([
+            report(1, 0),
+            report(2, 1),
+            report(1, 11),
+            report(1, 2, latitude=44.602),
+        ], TOLERANCE)
+
+        self.assertEqual(len(survivors), 4)
+        self.assertTrue(all(survivor['observations'] == 1 for survivor in survivors))
+
+    def test_existing_observation_counts_are_added(self):
+        first = {**report(1, 0), 'observations': 2}
+        second = {**report(1, 1), 'observations': 3}
+
+        survivors = merge_rows([first, second], TOLERANCE)
+
+        self.assertEqual(survivors[0]['observations'], 5)
+        # The caller's rows are left as they were.
+        self.assertEqual(first['observations'], 2)
+
+    def test_merged_rows_are_mapped_to_their_survivor(self):
+        rows = [{**report(1, 0), 'id': 'a'}, {**report(1, 1), 'id': 'b'}, {**report(2, 1), 'id': 'c'}]
+        merged = {}
+
+        survivors = merge_rows(rows, TOLERANCE, merged)
+
+        self.assertEqual([survivor['id'] for survivor in survivors], ['a', 'c'])
+        self.assertEqual(merged, {'b': 'a'})
@@ -0,0 +1,88 @@
+from datetime import datetime, timedelta, timezone
+import json
+
+from django.test import override_settings
+from rest_framework.authtoken.models import Token
+from tethys_sdk.testing import TethysTestCase
+
+from ..app import App
+from ..db import get_engine, request_session, session_scope
+from ..models import Animal, Sighting, SightingArchive
+
+# Outside the park, so the first-time random sightings never land nearby.
+LATITUDE, LONGITUDE = 44.0, -111.5
+BBOX = [LONGITUDE - 0.1, LATITUDE - 0.1, LONGITUDE + 0.1, LATITUDE + 0.1]
+
+
+@override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+class BulkDeleteControllerTestCase(TethysTestCase):
+    """
+    The bulk delete and restore endpoints end to end against the test persistent store.
+    """
+
+    def set_up(self):
+        self.create_test_persistent_stores_for_app(App)
+        self.client = self.get_test_client()
+        self.user = self.create_test_user(username='deleter', password='secret')
+        self.client.force_login(self.user)
+        token, _ = Token.objects.get_or_create(user=self.user)
+        self.headers = {'HTTP_AUTHORIZATION': f'Token {token.key}'}
+
+        animal_id = next(iter(Animal.catalog()))
+        date_time = datetime.now(timezone.utc) - timedelta(hours=1)
+        Sighting.bulk_add([
+            {'animal_id': animal_id, 'date_time': date_time, 'latitude': LATITUDE, 'longitude': LONGITUDE},
+            {'animal_id': animal_id, 'date_time': date_time, 'latitude': LATITUDE + 0.05, 'longitude': LONGITUDE},
+            {'animal_id': animal_id, 'date_time': date_time, 'latitude': LATITUDE + 1, 'longitude': LONGITUDE},
+        ], dedup=False)
+
+    def tear_down(self):
+        # The test database can't be dropped while the pool holds connections to it.
+        request_session.remove()
+        get_engine().dispose()
+        self.destroy_test_persistent_stores_for_app(App)
+
+    def post(self, name, data):
+        return self.client.post(App.reverse(name), json.dumps(data), content_type='application/json', **self.headers)
+
+    def ids_near(self, model):
+        with session_scope() as session:
+            rows = session.query(model.id).filter(model.latitude.between(LATITUDE - 2, LATITUDE + 2))
+            return {row.id for row in rows}
+
+    def test_bbox_list_deletes_the_sightings_inside_it(self):
+        response = self.post('wildatlas_sighting_bulk_delete', {'bbox': BBOX, 'archive': False})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'deleted': 2, 'archived': False})
+        self.assertEqual(len(self.ids_near(Sighting)), 1)
+
+    def test_bbox_string_deletes_the_sightings_inside_it(self):
+        response = self.post('wildatlas_sighting_bulk_delete', {'bbox': ','.join(map(str, BBOX)), 'archive': False})
+
+        self.assertEqual(response.json()['deleted'], 2)
+
+    def test_invalid_bbox_is_rejected(self):
+        for bbox in ([LONGITUDE, LATITUDE], {'west': LONGITUDE}, 42, 'a,b,c,d'):
+            with self.subTest(bbox=bbox):
+                response = self.post('wildatlas_sighting_bulk_delete', {'bbox': bbox})
+
+                self.assertEqual(response.status_code, 400)
+        self.assertEqual(len(self.ids_near(Sighting)), 3)
+
+    def test_archived_sightings_can_be_restored(self):
+        self.post('wildatlas_sighting_bulk_delete', {'bbox': BBOX, 'archive': True})
+        archived = self.ids_near(SightingArchive)
+        self.assertEqual(len(archived), 2)
+
+        response = self.post('wildatlas_sighting_restore', {'ids': [str(sighting_id) for sighting_id in archived]})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'restored': 2})
+        self.assertEqual(self.ids_near(SightingArchive), set())
+        self.assertTrue(archived <= self.ids_near(Sighting))
+
+    def test_restore_needs_ids(self):
+        response = self.post('wildatlas_sighting_restore', {'ids': 'not-an-id'})
+
+        self.assertEqual(response.status_code, 400)
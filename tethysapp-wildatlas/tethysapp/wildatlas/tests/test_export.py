@@ -0,0 +1,89 @@
+import csv
+from datetime import datetime, timedelta, timezone
+import io
+import json
+
+from tethys_sdk.testing import TethysTestCase
+
+from ..app import App
+from ..db import get_engine, request_session
+from ..models import Animal, Sighting
+
+# Outside the park, so the first-time random sightings never land nearby.
+LATITUDE, LONGITUDE = 44.0, -111.5
+
+# Long before the first-time random sightings, so only the sightings added here fall in the window.
+START = datetime(2001, 6, 1, tzinfo=timezone.utc)
+
+
+class ExportSightingsTestCase(TethysTestCase):
+    """
+    The streamed sighting exports against the test persistent store.
+    """
+
+    def set_up(self):
+        self.create_test_persistent_stores_for_app(App)
+        self.client = self.get_test_client()
+        self.user = self.create_test_user(username='exporter', password='secret')
+        self.client.force_login(self.user)
+
+        self.animal_id = next(iter(Animal.catalog()))
+        self.name = Animal.catalog()[self.animal_id].name
+        Sighting.bulk_add([
+            {'animal_id': self.animal_id, 'date_time': START + timedelta(hours=hours), 'latitude': LATITUDE,
+             'longitude': LONGITUDE + hours / 100}
+            for hours in (2, 0, 1)
+        ], dedup=False)
+
+    def tear_down(self):
+        # The test database can't be dropped while the pool holds connections to it.
+        request_session.remove()
+        get_engine().dispose()
+        self.destroy_test_persistent_stores_for_app(App)
+
+    def export(self, file_format):
+        response = self.client.get(
+            App.reverse('export_sightings', kwargs={'file_format': file_format}),
+            {'start': START.isoformat(), 'end': (START + timedelta(days=1)).isoformat()}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Disposition'], f'attachment; filename="sightings.{file_format}"')
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv_export_streams_oldest_first(self):
+        rows = list(csv.DictReader(io.StringIO(self.export('csv'))))
+
+        self.assertEqual([float(row['longitude']) for row in rows], [LONGITUDE, LONGITUDE + 0.01, LONGITUDE + 0.02])
+        self.assertEqual({row['animal'] for row in rows}, {self.name})
+        self.assertEqual(datetime.fromisoformat(rows[0]['date_time']), START)
+
+    def test_geojson_export_is_a_feature_collection(self):
+        collection = json.loads(self.export('geojson'))
+
+        self.assertEqual(collection['type'], 'FeatureCollection')
+        self.assertEqual(len(collection['features']), 3)
+        self.assertEqual(collection['features'][0]['geometry']['coordinates'], [LONGITUDE, LATITUDE])
+        self.assertEqual(collection['features'][0]['properties']['animal'], self.name)
+
+    def test_ndjson_export_has_a_feature_per_line(self):
+        features = [json.loads(line) for line in self.export('ndjson').splitlines()]
+
+        self.assertEqual(len(features), 3)
+        self.assertTrue(all(feature['type'] == 'Feature' for feature in features))
+        self.assertEqual([feature['geometry']['coordinates'][0] for feature in features],
+                         [LONGITUDE, LONGITUDE + 0.01, LONGITUDE + 0.02])
+
+    def test_empty_export_is_still_valid(self):
+        response = self.client.get(
+            App.reverse('export_sightings', kwargs={'file_format': 'geojson'}), {'end': '2000-01-01'}
+        )
+
+        self.assertEqual(
+            json.loads(b''.join(response.streaming_content)), {'type': 'FeatureCollection', 'features': []}
+        )
+
+    def test_unknown_format_is_not_found(self):
+        response = self.client.get(App.reverse('export_sightings', kwargs={'file_format': 'xlsx'}))
+
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,134 @@
+import base64
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from tethys_sdk.testing import TethysTestCase
+
+from ..app import App
+from ..controllers import parse_sighting_filters
+from ..db import get_engine, request_session
+from ..models import Animal, Sighting
+
+# Outside the park, so the first-time random sightings never land nearby.
+LATITUDE, LONGITUDE = 44.0, -111.5
+
+BBOX = f'{LONGITUDE - 0.1},{LATITUDE - 0.1},{LONGITUDE + 0.1},{LATITUDE + 0.1}'
+
+
+class ParseSightingFiltersTestCase(TethysTestCase):
+    """
+    Parsing of the filters shared by the sighting query endpoints.
+    """
+
+    def test_bbox_and_window_are_parsed(self):
+        filters, error = parse_sighting_filters({
+            'bbox': '-111.6,43.9,-111.4,44.1', 'start': '2025-07-01', 'end': '2025-07-02', 'animal_id': '3'
+        })
+
+        self.assertIsNone(error)
+        self.assertEqual(filters['bbox'], (-111.6, 43.9, -111.4, 44.1))
+        self.assertEqual(filters['start'], datetime(2025, 7, 1, tzinfo=timezone.utc))
+        self.assertEqual(filters['end'], datetime(2025, 7, 3, tzinfo=timezone.utc) - timedelta(microseconds=1))
+        self.assertEqual(filters['animal_id'], 3)
+
+    def test_missing_filters_are_none(self):
+        self.assertEqual(
+            parse_sighting_filters({}), ({'bbox': None, 'start': None, 'end': None, 'animal_id': None}, None)
+        )
+
+    def test_invalid_filters_are_reported(self):
+        for query_data in ({'bbox': '1,2,3'}, {'bbox': 'a,b,c,d'}, {'start': 'yesterday'}, {'animal_id': 'bison'}):
+            with self.subTest(query_data=query_data):
+                self.assertIsNotNone(parse_sighting_filters(query_data)[1])
+
+
+class SightingFeaturesTestCase(TethysTestCase):
+    """
+    The viewport and time window sightings query against the test persistent store.
+    """
+
+    def set_up(self):
+        self.create_test_persistent_stores_for_app(App)
+        self.client = self.get_test_client()
+        self.user = self.create_test_user(username='features', password='secret')
+        self.client.force_login(self.user)
+
+        self.animal_id = next(iter(Animal.catalog()))
+        self.now = datetime.now(timezone.utc)
+        Sighting.bulk_add([
+            {'animal_id': self.animal_id, 'date_time': date_time, 'latitude': latitude, 'longitude': LONGITUDE}
+            for date_time, latitude in (
+                (self.now - timedelta(hours=1), LATITUDE),
+                (self.now - timedelta(days=5), LATITUDE + 0.05),
+                (self.now - timedelta(days=120), LATITUDE),
+                (self.now - timedelta(hours=1), LATITUDE + 1),
+            )
+        ], dedup=False)
+
+    def tear_down(self):
+        # The test database can't be dropped while the pool holds connections to it.
+        request_session.remove()
+        get_engine().dispose()
+        self.destroy_test_persistent_stores_for_app(App)
+
+    def features(self, **params):
+        response = self.client.get(App.reverse('sighting_features'), {'bbox': BBOX, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_only_recent_sightings_in_the_bbox_are_returned(self):
+        collection = self.features()
+
+        self.assertEqual(collection['type'], 'FeatureCollection')
+        self.assertEqual(
+            sorted(feature['geometry']['coordinates'][1] for feature in collection['features']),
+            [LATITUDE, LATITUDE + 0.05]
+        )
+
+    def test_time_window_filters_sightings(self):
+        collection = self.features(
+            start=(self.now - timedelta(days=6)).isoformat(), end=(self.now - timedelta(days=4)).isoformat()
+        )
+
+        self.assertEqual([feature['geometry']['coordinates'] for feature in collection['features']],
+                         [[LONGITUDE, LATITUDE + 0.05]])
+
+    def test_explicit_start_reaches_past_the_default_window(self):
+        collection = self.features(start=(self.now - timedelta(days=200)).isoformat())
+
+        self.assertEqual(len(collection['features']), 3)
+
+    def test_compact_format_matches_the_features(self):
+        payload = self.features(format='compact')
+
+        self.assertEqual(payload['count'], 2)
+        times = np.frombuffer(base64.b64decode(payload['times']), dtype='<i8')
+        self.assertEqual(sorted(times.tolist()), sorted(
+            int(date_time.timestamp()) for date_time in (self.now - timedelta(hours=1), self.now - timedelta(days=5))
+        ))
+
+    def test_invalid_bbox_is_rejected(self):
+        response = self.client.get(App.reverse('sighting_features'), {'bbox': '1,2,3'})
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_filter_and_filter_rows_select_the_same_sightings(self):
+        bbox = (LONGITUDE - 0.1, LATITUDE - 0.1, LONGITUDE + 0.1, LATITUDE + 0.1)
+
+        sightings = Sighting.filter(bbox=bbox)
+        rows = Sighting.filter_rows(bbox=bbox)
+
+        self.assertEqual(len(sightings), 2)
+        self.assertEqual({sighting.id for sighting in sightings}, {row.id for row in rows})
+
+    def test_extent_needs_two_sightings(self):
+        # Long before the first-time random sightings, so only these count.
+        day = datetime(2001, 6, 1, tzinfo=timezone.utc)
+        window = (day, day + timedelta(days=1))
+        Sighting.add(self.animal_id, day, LATITUDE, LONGITUDE, dedup=False)
+
+        self.assertIsNone(Sighting.extent(*window))
+
+        Sighting.add(self.animal_id, day + timedelta(hours=1), LATITUDE + 0.2, LONGITUDE + 0.3, dedup=False)
+
+        self.assertEqual(Sighting.extent(*window), [LONGITUDE, LATITUDE + 0.2, LONGITUDE + 0.3, LATITUDE])
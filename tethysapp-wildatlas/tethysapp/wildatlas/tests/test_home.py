@@ -0,0 +1,28 @@
+from tethys_sdk.testing import TethysTestCase
+
+from ..controllers import HomeMap
+
+
+class DensityLayerTestCase(TethysTestCase):
+    """
+    The heatmap tile layers of the home map.
+    """
+
+    def test_density_layer_is_a_hidden_xyz_layer(self):
+        layer = HomeMap.build_density_layer('density-1', 'Bison', '/apps/wildatlas/heatmap/{z}/{x}/{y}/?animal_id=1')
+
+        self.assertEqual(layer.source, 'XYZ')
+        self.assertEqual(layer.options, {'url': '/apps/wildatlas/heatmap/{z}/{x}/{y}/?animal_id=1'})
+        self.assertFalse(layer.layer_options['visible'])
+        self.assertEqual(layer.legend_title, 'Bison')
+        self.assertEqual(layer.data['layer_id'], 'density-1')
+        self.assertEqual(layer.data['layer_variable'], 'density')
+
+    def test_density_layer_hides_the_same_popup_properties_as_other_layers(self):
+        layer = HomeMap.build_density_layer('density-all', 'All Animals', '/apps/wildatlas/heatmap/{z}/{x}/{y}/')
+        geojson_layer = HomeMap.build_geojson_layer(
+            geojson={'type': 'FeatureCollection', 'features': []}, layer_name='sightings', layer_title='Sightings',
+            layer_variable='sightings'
+        )
+
+        self.assertEqual(layer.data['excluded_properties'], geojson_layer.data['excluded_properties'])
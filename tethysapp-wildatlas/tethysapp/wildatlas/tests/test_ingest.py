@@ -0,0 +1,97 @@
+from datetime import datetime, timezone
+import io
+import json
+
+from tethys_sdk.testing import TethysTestCase
+
+from ..ingest import clean_sighting, read_geojson_rows
+
+NOW = datetime(2025, 7, 14, 18, 0, tzinfo=timezone.utc)
+ANIMALS = {1: 'Bison', 2: 'Elk'}
+
+
+def feature(date_time='2025-07-14T08:30:00-06:00', animal_id=1, coordinates=(-110.5, 44.6)):
+    return {
+        'type': 'Feature',
+        'geometry': {'type': 'Point', 'coordinates': list(coordinates)},
+        'properties': {'date_time': date_time, 'animal_id': animal_id},
+    }
+
+
+class CleanSightingTestCase(TethysTestCase):
+    """
+    Validation of the fields of one imported sighting.
+    """
+
+    def test_valid_sighting_is_parsed(self):
+        cleaned_data, errors = clean_sighting('2025-07-14T08:30:00-06:00', '2', '44.6', '-110.5', ANIMALS, NOW)
+
+        self.assertEqual(errors, [])
+        self.assertEqual(cleaned_data, {
+            'date_time': datetime(2025, 7, 14, 14, 30, tzinfo=timezone.utc),
+            'animal_id': 2,
+            'latitude': 44.6,
+            'longitude': -110.5,
+        })
+
+    def test_future_date_and_unknown_animal_are_rejected(self):
+        _, errors = clean_sighting('2025-07-15T00:00:00Z', 3, 44.6, -110.5, ANIMALS, NOW)
+
+        self.assertEqual(errors, ['Date/time cannot be in the future.', 'Unknown animal ID.'])
+
+    def test_missing_and_malformed_fields_are_reported(self):
+        _, errors = clean_sighting(None, 'bison', 'north', -110.5, ANIMALS, NOW)
+
+        self.assertEqual(errors, [
+            'Invalid or missing date/time.',
+            'Invalid or missing animal ID.',
+            'Invalid or missing latitude/longitude.',
+        ])
+
+    def test_out_of_range_coordinates_are_rejected(self):
+        _, errors = clean_sighting('2025-07-14T08:30:00Z', 1, 91, -181, ANIMALS, NOW)
+
+        self.assertEqual(errors, ['Latitude must be between -90 and 90.', 'Longitude must be between -180 and 180.'])
+
+
+class ReadGeoJSONRowsTestCase(TethysTestCase):
+    """
+    Reading sightings from GeoJSON uploads.
+    """
+
+    def test_feature_collection(self):
+        collection = {'type': 'FeatureCollection', 'features': [feature(), feature(animal_id=2)]}
+
+        rows = list(read_geojson_rows(io.StringIO(json.dumps(collection, indent=2))))
+
+        self.assertEqual(rows, [
+            {'date_time': '2025-07-14T08:30:00-06:00', 'animal_id': 1, 'longitude': -110.5, 'latitude': 44.6},
+            {'date_time': '2025-07-14T08:30:00-06:00', 'animal_id': 2, 'longitude': -110.5, 'latitude': 44.6},
+        ])
+
+    def test_newline_delimited_features(self):
+        lines = '\n'.join(json.dumps(feature(animal_id=animal_id)) for animal_id in (1, 2, 1)) + '\n\n'
+
+        rows = list(read_geojson_rows(io.StringIO(lines)))
+
+        self.assertEqual([row['animal_id'] for row in rows], [1, 2, 1])
+        self.assertEqual(rows[0]['latitude'], 44.6)
+
+    def test_missing_geometry_leaves_the_coordinates_empty(self):
+        collection = {'type': 'FeatureCollection', 'features': [{**feature(), 'geometry': None}]}
+
+        rows = list(read_geojson_rows(io.StringIO(json.dumps(collection))))
+
+        self.assertIsNone(rows[0]['latitude'])
+        self.assertIsNone(rows[0]['longitude'])
+
+    def test_non_object_json_is_rejected(self):
+        for document in ([feature()], 42, {'type': 'FeatureCollection', 'features': 'none'}):
+            with self.subTest(document=document), self.assertRaises(ValueError):
+                list(read_geojson_rows(io.StringIO(json.dumps(document))))
+
+    def test_non_object_feature_is_rejected(self):
+        collection = {'type': 'FeatureCollection', 'features': [feature(), [-110.5, 44.6]]}
+
+        with self.assertRaises(ValueError):
+            list(read_geojson_rows(io.StringIO(json.dumps(collection))))
@@ -0,0 +1,112 @@
+from datetime import datetime, timedelta, timezone
+
+from django.test import override_settings
+from tethys_sdk.testing import TethysTestCase
+
+from ..app import App
+from ..db import get_engine, request_session
+from ..models import Animal, Sighting, SightingDailyStat
+
+
+@override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+class ListSightingsConditionalTestCase(TethysTestCase):
+    """
+    Conditional GETs of the sightings list page.
+    """
+
+    def set_up(self):
+        self.create_test_persistent_stores_for_app(App)
+        self.client = self.get_test_client()
+        self.user = self.create_test_user(username='lister', password='secret')
+        self.client.force_login(self.user)
+        self.url = App.reverse('list_sightings')
+        # The first visit sets the CSRF cookie the page's ETag depends on.
+        self.client.get(self.url)
+
+    def tear_down(self):
+        # The test database can't be dropped while the pool holds connections to it.
+        request_session.remove()
+        get_engine().dispose()
+        self.destroy_test_persistent_stores_for_app(App)
+
+    def test_unchanged_page_is_not_modified(self):
+        etag = self.client.get(self.url)['ETag']
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_changed_sightings_render_the_page_again(self):
+        etag = self.client.get(self.url)['ETag']
+        Sighting.add(next(iter(Animal.catalog())), datetime.now(timezone.utc) - timedelta(hours=1), 44.6, -110.5)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_new_session_renders_the_page_again(self):
+        etag = self.client.get(self.url)['ETag']
+        # Logging in again replaces the session and the CSRF token the page embeds.
+        self.client.logout()
+        self.client.force_login(self.user)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+
+
+@override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+class ListSightingsTotalTestCase(TethysTestCase):
+    """
+    The total number of sightings shown above the list.
+    """
+
+    def set_up(self):
+        self.create_test_persistent_stores_for_app(App)
+        self.animal_id = next(iter(Animal.catalog()))
+        self.day = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=3)
+        Sighting.bulk_add([
+            {'animal_id': self.animal_id, 'date_time': self.day + timedelta(hours=hours), 'latitude': 44.0,
+             'longitude': -111.5 + hours / 100}
+            for hours in (0, 6, 23.5, 24, 30, 47.9, 48, 60)
+        ], dedup=False)
+
+    def tear_down(self):
+        # The test database can't be dropped while the pool holds connections to it.
+        request_session.remove()
+        get_engine().dispose()
+        self.destroy_test_persistent_stores_for_app(App)
+
+    def test_total_matches_a_count_of_the_sightings(self):
+        day, hour = self.day, timedelta(hours=1)
+        windows = [
+            (None, None),
+            (day, None),
+            (None, day + 2 * 24 * hour - timedelta(microseconds=1)),
+            (day, day + 24 * hour - timedelta(microseconds=1)),
+            (day + 6 * hour, day + 30 * hour),
+            (day + 5 * hour, day + 7 * hour),
+            (day + 24 * hour, day + 24 * hour),
+            (day + 12 * hour, day + 60 * hour),
+        ]
+        for start, end in windows:
+            for animal_id in (None, self.animal_id):
+                with self.subTest(start=start, end=end, animal_id=animal_id):
+                    self.assertEqual(
+                        SightingDailyStat.total(animal_id, start, end), Sighting.count(animal_id, start, end)
+                    )
+
+    def test_list_page_shows_the_filtered_total(self):
+        client = self.get_test_client()
+        client.force_login(self.create_test_user(username='counter', password='secret'))
+
+        response = client.get(App.reverse('list_sightings'), {
+            'animal_id': self.animal_id, 'start': self.day.date().isoformat(), 'end': self.day.date().isoformat()
+        })
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['total'], Sighting.count(
+            self.animal_id, self.day, self.day + timedelta(days=1) - timedelta(microseconds=1)
+        ))
+        self.assertGreaterEqual(response.context['total'], 3)
@@ -0,0 +1,69 @@
+import asyncio
+from datetime import datetime, timezone
+import uuid
+
+from asgiref.sync import sync_to_async
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.models import AnonymousUser, User
+from django.test import override_settings
+from tethys_sdk.testing import TethysTestCase
+
+from ..consumers import SightingUpdatesConsumer
+from ..live import publish, sighting_message
+from ..models import AnimalInfo
+
+SUBSCRIBERS = 300
+
+UPDATES_PATH = '/apps/wildatlas/sighting/updates/ws/'
+
+
+@override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+class SightingUpdatesFanOutTestCase(TethysTestCase):
+    """
+    Fan-out of sighting updates to many connected maps through the in-memory channel layer.
+    """
+
+    async def connect_subscribers(self, count):
+        communicators = []
+        for index in range(count):
+            communicator = WebsocketCommunicator(SightingUpdatesConsumer.as_asgi(), UPDATES_PATH)
+            communicator.scope['user'] = User(username=f'viewer{index}')
+            connected, _ = await communicator.connect()
+            self.assertTrue(connected)
+            communicators.append(communicator)
+        return communicators
+
+    async def test_added_event_reaches_every_subscriber(self):
+        communicators = await self.connect_subscribers(SUBSCRIBERS)
+        message = sighting_message(
+            'added', uuid.uuid4(), AnimalInfo(1, 'Bison', 'logo.svg', 'pin.svg'),
+            datetime(2025, 7, 14, 14, 30, tzinfo=timezone.utc), 44.6, -110.5
+        )
+
+        await sync_to_async(publish)(message)
+
+        received = await asyncio.gather(*(communicator.receive_json_from(timeout=5) for communicator in communicators))
+        self.assertEqual(len(received), SUBSCRIBERS)
+        self.assertTrue(all(payload == message for payload in received))
+
+        await asyncio.gather(*(communicator.disconnect() for communicator in communicators))
+
+    async def test_disconnected_subscribers_stop_receiving(self):
+        communicators = await self.connect_subscribers(SUBSCRIBERS)
+        leaving, staying = communicators[:SUBSCRIBERS // 2], communicators[SUBSCRIBERS // 2:]
+        await asyncio.gather(*(communicator.disconnect() for communicator in leaving))
+
+        await sync_to_async(publish)({'event': 'refresh'})
+
+        received = await asyncio.gather(*(communicator.receive_json_from(timeout=5) for communicator in staying))
+        self.assertTrue(all(payload == {'event': 'refresh'} for payload in received))
+        nothing = await asyncio.gather(*(communicator.receive_nothing() for communicator in staying))
+        self.assertTrue(all(nothing))
+
+        await asyncio.gather(*(communicator.disconnect() for communicator in staying))
+
+    async def test_anonymous_user_is_not_subscribed(self):
+        communicator = WebsocketCommunicator(SightingUpdatesConsumer.as_asgi(), UPDATES_PATH)
+        communicator.scope['user'] = AnonymousUser()
+        connected, _ = await communicator.connect()
+        self.assertFalse(connected)
@@ -0,0 +1,83 @@
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory
+from tethys_sdk.testing import TethysTestCase
+
+from ..metrics import (
+    N_PLUS_ONE, N_PLUS_ONE_THRESHOLD, REQUESTS, RESPONSE_SIZE, SLOW_REQUESTS, record_sql, render_metrics, span,
+    trace_request
+)
+
+
+class RequestMetricsTestCase(TethysTestCase):
+    """
+    Request traces: SQL counts, N+1 detection, payload sizes, the slow-request log and the metrics text.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.request = RequestFactory().get('/apps/wildatlas/sighting/features/?bbox=1,2,3,4')
+
+    def test_repeated_statement_is_flagged_as_n_plus_one(self):
+        with self.assertLogs('tethysapp.wildatlas.metrics', level='WARNING') as logs:
+            with trace_request('test_n_plus_one', self.request, threshold=0) as trace:
+                record_sql('SELECT * FROM sightings WHERE id = %(id)s', 0.001)
+                for _ in range(N_PLUS_ONE_THRESHOLD):
+                    record_sql('SELECT * FROM animals WHERE id = %(id)s', 0.001)
+                trace.response = HttpResponse('ok')
+
+        self.assertEqual(trace.sql_count, N_PLUS_ONE_THRESHOLD + 1)
+        self.assertEqual(trace.repeated_statements(), [('SELECT * FROM animals WHERE id = %(id)s', 10)])
+        self.assertEqual(N_PLUS_ONE.value('test_n_plus_one'), 1)
+        self.assertIn('FROM animals', logs.output[0])
+
+    def test_distinct_statements_are_not_flagged(self):
+        with trace_request('test_no_n_plus_one', self.request, threshold=0) as trace:
+            for table in ('sightings', 'animals', 'data_versions'):
+                record_sql(f'SELECT * FROM {table}', 0.001)
+            trace.response = HttpResponse('ok')
+
+        self.assertEqual(trace.sql_count, 3)
+        self.assertEqual(N_PLUS_ONE.value('test_no_n_plus_one'), 0)
+
+    def test_payload_size_is_recorded_for_buffered_responses_only(self):
+        with trace_request('test_payload', self.request, threshold=0) as trace:
+            trace.response = HttpResponse(b'x' * 2048)
+        with trace_request('test_payload', self.request, threshold=0) as trace:
+            trace.response = StreamingHttpResponse(iter([b'x' * 2048]))
+
+        self.assertEqual(REQUESTS.value('test_payload', 200), 2)
+        self.assertEqual(RESPONSE_SIZE.count('test_payload'), 1)
+
+    def test_failed_request_is_counted_as_server_error(self):
+        with self.assertRaises(ValueError):
+            with trace_request('test_failure', self.request, threshold=0):
+                raise ValueError('boom')
+
+        self.assertEqual(REQUESTS.value('test_failure', 500), 1)
+
+    def test_slow_request_is_logged_with_its_breakdown(self):
+        with self.assertLogs('tethysapp.wildatlas.metrics', level='WARNING') as logs:
+            # Any request takes at least a microsecond, so a tiny threshold makes it slow.
+            with trace_request('test_slow', self.request, threshold=0.001) as trace:
+                with span('query'):
+                    record_sql('SELECT 1', 0.25)
+                trace.response = HttpResponse('ok')
+
+        self.assertEqual(SLOW_REQUESTS.value('test_slow'), 1)
+        self.assertIn('1 SQL statements in 250 ms', logs.output[0])
+        self.assertIn('query=', logs.output[0])
+        self.assertIn('/sighting/features/?bbox=1,2,3,4', logs.output[0])
+
+    def test_metrics_text_format(self):
+        with trace_request('test_render', self.request, threshold=0) as trace:
+            record_sql('SELECT 1', 0.002)
+            trace.response = HttpResponse('ok')
+
+        text = render_metrics()
+
+        self.assertIn('# TYPE wildatlas_request_duration_seconds histogram', text)
+        self.assertIn('wildatlas_requests_total{controller="test_render",status="200"} 1', text)
+        self.assertIn('wildatlas_request_duration_seconds_count{controller="test_render"} 1', text)
+        self.assertIn('wildatlas_request_duration_seconds_bucket{controller="test_render",le="+Inf"} 1', text)
+        self.assertIn('wildatlas_sql_statements_total{controller="test_render"} 1', text)
+        self.assertNotIn('wildatlas_db_pool_size', text)
@@ -0,0 +1,48 @@
+from datetime import datetime, timedelta, timezone
+
+from tethys_sdk.testing import TethysTestCase
+
+from ..app import App
+from ..db import get_engine, request_session
+from ..models import Animal, Sighting
+
+# Outside the park, so the first-time random sightings never land nearby.
+LATITUDE, LONGITUDE = 44.0, -111.5
+
+
+class SightingNearControllerTestCase(TethysTestCase):
+    """
+    The proximity search endpoint end to end against the test persistent store.
+    """
+
+    def set_up(self):
+        self.create_test_persistent_stores_for_app(App)
+        self.client = self.get_test_client()
+        self.user = self.create_test_user(username='near', password='secret')
+        self.client.force_login(self.user)
+
+    def tear_down(self):
+        # The test database can't be dropped while the pool holds connections to it.
+        request_session.remove()
+        get_engine().dispose()
+        self.destroy_test_persistent_stores_for_app(App)
+
+    def test_nearby_sighting_is_returned_with_its_distance(self):
+        animal_id = next(iter(Animal.catalog()))
+        Sighting.add(animal_id, datetime.now(timezone.utc) - timedelta(hours=1), LATITUDE + 0.0005, LONGITUDE)
+
+        response = self.client.get(
+            App.reverse('sighting_near'), {'lat': LATITUDE, 'lon': LONGITUDE, 'radius': 1000}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        sightings = response.json()['sightings']
+        self.assertEqual(len(sightings), 1)
+        self.assertEqual(sightings[0]['animal_id'], animal_id)
+        self.assertEqual(sightings[0]['observations'], 1)
+        self.assertAlmostEqual(sightings[0]['distance'], 55.6, delta=1)
+
+    def test_invalid_point_is_rejected(self):
+        response = self.client.get(App.reverse('sighting_near'), {'lat': 91, 'lon': LONGITUDE})
+
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta, timezone
+import uuid
+
+from tethys_sdk.testing import TethysTestCase
+
+from ..app import App
+from ..controllers import decode_cursor, encode_cursor, parse_filter_time
+from ..db import get_engine, request_session
+from ..models import Animal, Sighting
+
+# Outside the park, so the first-time random sightings never land nearby.
+LATITUDE, LONGITUDE = 44.0, -111.5
+
+# Long before the first-time random sightings, so only the sightings added here fall in the window.
+START = datetime(2001, 6, 1, tzinfo=timezone.utc)
+END = START + timedelta(days=1)
+
+
+class CursorTestCase(TethysTestCase):
+    """
+    Encoding of list cursors and parsing of the time filters.
+    """
+
+    def test_cursor_round_trips(self):
+        cursor = (datetime(2025, 7, 14, 13, 30, 0, 123456, tzinfo=timezone.utc), uuid.uuid4())
+
+        self.assertEqual(decode_cursor(encode_cursor(cursor)), cursor)
+
+    def test_date_filters_cover_whole_utc_days(self):
+        self.assertEqual(parse_filter_time('2025-07-14'), datetime(2025, 7, 14, tzinfo=timezone.utc))
+        self.assertEqual(
+            parse_filter_time('2025-07-14', end=True),
+            datetime(2025, 7, 15, tzinfo=timezone.utc) - timedelta(microseconds=1)
+        )
+
+    def test_times_without_an_offset_are_utc(self):
+        self.assertEqual(parse_filter_time('2025-07-14T13:30:00'), datetime(2025, 7, 14, 13, 30, tzinfo=timezone.utc))
+        self.assertEqual(
+            parse_filter_time('2025-07-14T13:30:00-06:00'), datetime(2025, 7, 14, 19, 30, tzinfo=timezone.utc)
+        )
+
+
+class SightingPageTestCase(TethysTestCase):
+    """
+    Keyset pagination of sightings against the test persistent store.
+    """
+
+    def set_up(self):
+        self.create_test_persistent_stores_for_app(App)
+        self.client = self.get_test_client()
+        self.user = self.create_test_user(username='pager', password='secret')
+        self.client.force_login(self.user)
+
+        animal_id = next(iter(Animal.catalog()))
+        # Pairs of sightings at the same time, so pages have to break ties on id.
+        Sighting.bulk_add([
+            {'animal_id': animal_id, 'date_time': START + timedelta(hours=hours // 2), 'latitude': LATITUDE,
+             'longitude': LONGITUDE + hours / 100}
+            for hours in range(7)
+        ], dedup=False)
+
+    def tear_down(self):
+        # The test database can't be dropped while the pool holds connections to it.
+        request_session.remove()
+        get_engine().dispose()
+        self.destroy_test_persistent_stores_for_app(App)
+
+    def test_pages_walk_every_sighting_newest_first(self):
+        pages, cursor = [], None
+        while True:
+            sightings, cursor = Sighting.page(3, cursor, start=START, end=END)
+            pages.append(sightings)
+            if cursor is None:
+                break
+
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        keys = [(sighting.date_time, sighting.id) for page in pages for sighting in page]
+        self.assertEqual(keys, sorted(keys, reverse=True))
+        self.assertEqual(len(set(keys)), 7)
+
+    def test_list_json_links_to_the_next_page(self):
+        url = App.reverse('list_sightings_json')
+        params = {'start': START.isoformat(), 'end': END.isoformat(), 'limit': 4}
+
+        first = self.client.get(url, params).json()
+        second = self.client.get(url, {**params, 'cursor': first['next_cursor']}).json()
+
+        self.assertEqual(len(first['sightings']), 4)
+        self.assertEqual(len(second['sightings']), 3)
+        self.assertIsNone(second['next_cursor'])
+        ids = [row['id'] for row in first['sightings'] + second['sightings']]
+        self.assertEqual(len(set(ids)), 7)
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get(App.reverse('list_sightings_json'), {'cursor': 'not a cursor'})
+
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,78 @@
+import json
+import os
+from pathlib import Path
+import tempfile
+
+from tethys_sdk.testing import TethysTestCase
+
+from ..app import App
+from ..parks import BOUNDARY_LEVELS, get_park_boundary, level_for_zoom, simplify_ring
+
+SQUARE = [[0, 0], [0.5, 0.0001], [1, 0], [1, 1], [0, 1], [0, 0]]
+
+
+class ParkBoundaryTestCase(TethysTestCase):
+    """
+    The cached, simplified park boundaries.
+    """
+
+    def set_up(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / 'park.geojson'
+        self.write({'type': 'Polygon', 'coordinates': [SQUARE]})
+
+    def write(self, geometry, mtime=None):
+        self.path.write_text(json.dumps({
+            'type': 'FeatureCollection',
+            'features': [{'type': 'Feature', 'geometry': geometry, 'properties': {}}]
+        }))
+        if mtime is not None:
+            os.utime(self.path, (mtime, mtime))
+
+    def test_zoom_picks_the_finest_level_reached(self):
+        self.assertEqual([level_for_zoom(zoom) for zoom in (0, 8, 9, 11, 12, 15, 22)], [0, 0, 1, 1, 2, 3, 3])
+
+    def test_ring_is_simplified_within_the_tolerance(self):
+        self.assertEqual(simplify_ring(SQUARE, 0.001), [[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]])
+        self.assertEqual(simplify_ring(SQUARE, 0.00001), SQUARE)
+
+    def test_levels_are_precomputed_and_encoded(self):
+        boundary = get_park_boundary(self.path)
+
+        self.assertEqual(len(boundary.levels), len(BOUNDARY_LEVELS))
+        self.assertEqual(boundary.levels[-1]['features'][0]['geometry']['coordinates'], [SQUARE])
+        self.assertEqual(len(boundary.levels[0]['features'][0]['geometry']['coordinates'][0]), 5)
+        self.assertEqual([json.loads(encoded) for encoded in boundary.encoded_levels], boundary.levels)
+
+    def test_boundary_is_parsed_once_until_the_file_changes(self):
+        boundary = get_park_boundary(self.path)
+
+        self.assertIs(get_park_boundary(self.path), boundary)
+
+        self.write({'type': 'MultiPolygon', 'coordinates': [[SQUARE]]}, mtime=boundary.mtime + 10)
+        reloaded = get_park_boundary(self.path)
+
+        self.assertIsNot(reloaded, boundary)
+        self.assertEqual(reloaded.levels[-1]['features'][0]['geometry']['type'], 'MultiPolygon')
+
+
+class ParkBoundaryControllerTestCase(TethysTestCase):
+    """
+    The park boundary endpoint.
+    """
+
+    def set_up(self):
+        self.client = self.get_test_client()
+        self.user = self.create_test_user(username='parks', password='secret')
+        self.client.force_login(self.user)
+
+    def test_unknown_park_is_not_found(self):
+        response = self.client.get(App.reverse('park_boundary', kwargs={'park_id': 'atlantis'}))
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_invalid_zoom_is_rejected(self):
+        response = self.client.get(App.reverse('park_boundary', kwargs={'park_id': 'yellowstone'}), {'zoom': 'far'})
+
+        self.assertEqual(response.status_code, 400)
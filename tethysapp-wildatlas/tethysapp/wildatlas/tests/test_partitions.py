@@ -0,0 +1,132 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import text
+from tethys_sdk.testing import TethysTestCase
+
+from ..app import App
+from ..db import get_engine, request_session, session_scope
+from ..models import PARTITION_MONTHS_AHEAD, Animal, Sighting
+from ..partitions import (
+    drop_monthly_partitions, ensure_monthly_partitions, is_partitioned, month_start, monthly_partitions, next_month,
+    partition_name
+)
+
+# Outside the park, so the first-time random sightings never land nearby.
+LATITUDE, LONGITUDE = 44.0, -111.5
+
+# Long before the first-time random sightings, so no monthly partition covers it.
+OLD_MONTH = datetime(2001, 6, 1, tzinfo=timezone.utc)
+
+
+class MonthlyPartitionsTestCase(TethysTestCase):
+    """
+    Month arithmetic behind the monthly partitions.
+    """
+
+    def test_month_start_is_taken_in_utc(self):
+        mountain = timezone(timedelta(hours=-6))
+        value = datetime(2025, 6, 30, 20, 0, tzinfo=mountain)
+
+        self.assertEqual(month_start(value), datetime(2025, 7, 1, tzinfo=timezone.utc))
+
+    def test_next_month_rolls_over_the_year(self):
+        self.assertEqual(
+            next_month(datetime(2025, 12, 1, tzinfo=timezone.utc)), datetime(2026, 1, 1, tzinfo=timezone.utc)
+        )
+        self.assertEqual(
+            next_month(datetime(2025, 1, 1, tzinfo=timezone.utc)), datetime(2025, 2, 1, tzinfo=timezone.utc)
+        )
+
+    def test_partition_name(self):
+        self.assertEqual(
+            partition_name('sightings_archive', datetime(2025, 3, 1, tzinfo=timezone.utc)), 'sightings_archive_2025_03'
+        )
+
+
+class SightingPartitionsTestCase(TethysTestCase):
+    """
+    Creating, filling and dropping the monthly sighting partitions against the test persistent store.
+    """
+
+    def set_up(self):
+        self.create_test_persistent_stores_for_app(App)
+        self.animal_id = next(iter(Animal.catalog()))
+
+    def tear_down(self):
+        # The test database can't be dropped while the pool holds connections to it.
+        request_session.remove()
+        get_engine().dispose()
+        self.destroy_test_persistent_stores_for_app(App)
+
+    def add_old_sighting(self, days=0):
+        Sighting.add(self.animal_id, OLD_MONTH + timedelta(days=days, hours=12), LATITUDE, LONGITUDE, dedup=False)
+
+    def count_in(self, table):
+        with session_scope() as session:
+            return session.execute(text(f'SELECT count(*) FROM {table}')).scalar()
+
+    def test_init_partitions_the_months_ahead(self):
+        month = month_start(datetime.now(timezone.utc))
+        expected = [month]
+        for _ in range(PARTITION_MONTHS_AHEAD):
+            month = next_month(month)
+            expected.append(month)
+
+        with session_scope() as session:
+            self.assertTrue(is_partitioned(session, Sighting.__tablename__))
+            self.assertFalse(is_partitioned(session, Animal.__tablename__))
+            months = monthly_partitions(session, Sighting.__tablename__)
+
+        self.assertEqual(months[-len(expected):], expected)
+
+    def test_sighting_outside_every_month_lands_in_the_default_partition(self):
+        self.add_old_sighting()
+
+        self.assertEqual(self.count_in('sightings_default'), 1)
+        self.assertEqual(Sighting.count(start=OLD_MONTH, end=next_month(OLD_MONTH)), 1)
+
+    def test_maintenance_moves_default_rows_into_attached_partitions(self):
+        self.add_old_sighting()
+        self.add_old_sighting(days=31)
+
+        with session_scope() as session:
+            Sighting.maintain_partitions(session)
+            session.commit()
+
+        self.assertEqual(self.count_in('sightings_default'), 0)
+        self.assertEqual(self.count_in(partition_name('sightings', OLD_MONTH)), 1)
+        self.assertEqual(self.count_in(partition_name('sightings', next_month(OLD_MONTH))), 1)
+        with session_scope() as session:
+            self.assertIn(OLD_MONTH, monthly_partitions(session, Sighting.__tablename__))
+        self.assertEqual(Sighting.count(start=OLD_MONTH, end=next_month(next_month(OLD_MONTH))), 2)
+
+    def test_new_month_takes_only_its_rows_from_the_default_partition(self):
+        self.add_old_sighting()
+        self.add_old_sighting(days=31)
+
+        with session_scope() as session:
+            ensure_monthly_partitions(session, Sighting.__tablename__, OLD_MONTH, OLD_MONTH)
+            session.commit()
+
+        self.assertEqual(self.count_in(partition_name('sightings', OLD_MONTH)), 1)
+        self.assertEqual(self.count_in('sightings_default'), 1)
+
+    def test_only_months_ending_before_the_cutoff_are_dropped(self):
+        self.add_old_sighting()
+        with session_scope() as session:
+            ensure_monthly_partitions(session, Sighting.__tablename__, OLD_MONTH, next_month(OLD_MONTH))
+            session.commit()
+
+        with session_scope() as session:
+            self.assertEqual(
+                drop_monthly_partitions(session, Sighting.__tablename__, OLD_MONTH + timedelta(days=15)), []
+            )
+            self.assertEqual(
+                drop_monthly_partitions(session, Sighting.__tablename__, next_month(OLD_MONTH)), [OLD_MONTH]
+            )
+            session.commit()
+            months = monthly_partitions(session, Sighting.__tablename__)
+
+        self.assertNotIn(OLD_MONTH, months)
+        self.assertIn(next_month(OLD_MONTH), months)
+        self.assertEqual(Sighting.count(start=OLD_MONTH, end=next_month(OLD_MONTH)), 0)
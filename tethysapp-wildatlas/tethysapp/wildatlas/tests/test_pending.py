@@ -0,0 +1,112 @@
+from datetime import datetime, timedelta, timezone
+import io
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import override_settings
+from tethys_sdk.testing import TethysTestCase
+
+from ..app import App
+from ..db import get_engine, request_session, session_scope
+from ..dedup import Tolerance
+from ..models import FAILED, WRITTEN, Animal, PendingSighting, Sighting
+
+# Outside the park, so the first-time random sightings never land nearby.
+LATITUDE, LONGITUDE = 44.0, -111.5
+
+TOLERANCE = Tolerance(distance=100, window=timedelta(minutes=10))
+
+
+@override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+class PendingSightingTestCase(TethysTestCase):
+    """
+    The write-behind queue of submitted sightings against the test persistent store.
+    """
+
+    def set_up(self):
+        self.create_test_persistent_stores_for_app(App)
+        self.animal_id = next(iter(Animal.catalog()))
+        self.date_time = datetime.now(timezone.utc) - timedelta(hours=1)
+
+    def tear_down(self):
+        # The test database can't be dropped while the pool holds connections to it.
+        request_session.remove()
+        get_engine().dispose()
+        self.destroy_test_persistent_stores_for_app(App)
+
+    def sighting_ids(self):
+        with session_scope() as session:
+            return session.query(Sighting.id).filter(Sighting.latitude.between(LATITUDE - 1, LATITUDE + 1)).all()
+
+    def test_report_merged_into_a_stored_sighting_reports_its_id(self):
+        Sighting.add(self.animal_id, self.date_time, LATITUDE, LONGITUDE, dedup=False)
+        [(stored_id,)] = self.sighting_ids()
+        pending_id, _ = PendingSighting.enqueue(
+            self.animal_id, self.date_time + timedelta(minutes=2), LATITUDE + 0.0003, LONGITUDE
+        )
+
+        with mock.patch('tethysapp.wildatlas.models.dedup_tolerance', return_value=TOLERANCE):
+            self.assertEqual(PendingSighting.write_batch(10), 1)
+
+        self.assertEqual(PendingSighting.status_of(pending_id), (WRITTEN, stored_id))
+        self.assertEqual(self.sighting_ids(), [(stored_id,)])
+
+    def test_reports_merged_within_a_batch_report_the_stored_sighting(self):
+        Sighting.add(self.animal_id, self.date_time, LATITUDE, LONGITUDE, dedup=False)
+        [(stored_id,)] = self.sighting_ids()
+        first_id, _ = PendingSighting.enqueue(
+            self.animal_id, self.date_time + timedelta(minutes=1), LATITUDE, LONGITUDE
+        )
+        second_id, _ = PendingSighting.enqueue(
+            self.animal_id, self.date_time + timedelta(minutes=3), LATITUDE, LONGITUDE
+        )
+
+        with mock.patch('tethysapp.wildatlas.models.dedup_tolerance', return_value=TOLERANCE):
+            PendingSighting.write_batch(10)
+
+        self.assertEqual(PendingSighting.status_of(first_id), (WRITTEN, stored_id))
+        self.assertEqual(PendingSighting.status_of(second_id), (WRITTEN, stored_id))
+
+    def test_report_written_as_its_own_sighting_keeps_its_id(self):
+        pending_id, _ = PendingSighting.enqueue(self.animal_id, self.date_time, LATITUDE, LONGITUDE)
+
+        with mock.patch('tethysapp.wildatlas.models.dedup_tolerance', return_value=TOLERANCE):
+            PendingSighting.write_batch(10)
+
+        self.assertEqual(PendingSighting.status_of(pending_id), (WRITTEN, pending_id))
+        self.assertEqual(self.sighting_ids(), [(pending_id,)])
+
+    def test_retried_submission_is_queued_once(self):
+        first = PendingSighting.enqueue(self.animal_id, self.date_time, LATITUDE, LONGITUDE, idempotency_key='retry-1')
+        retry = PendingSighting.enqueue(self.animal_id, self.date_time, LATITUDE, LONGITUDE, idempotency_key='retry-1')
+
+        self.assertEqual(first, (first[0], True))
+        self.assertEqual(retry, (first[0], False))
+        with session_scope() as session:
+            self.assertEqual(session.query(PendingSighting).filter_by(idempotency_key='retry-1').count(), 1)
+
+    def test_row_that_cannot_be_written_does_not_block_the_rest(self):
+        bad, _ = PendingSighting.enqueue(self.animal_id, self.date_time, LATITUDE, LONGITUDE)
+        # A sighting already holding the queued row's key makes its insert fail.
+        Sighting.bulk_add([{
+            'id': bad, 'animal_id': self.animal_id, 'date_time': self.date_time,
+            'latitude': LATITUDE, 'longitude': LONGITUDE
+        }], dedup=False)
+        first, _ = PendingSighting.enqueue(self.animal_id, self.date_time, LATITUDE + 0.5, LONGITUDE)
+        good, _ = PendingSighting.enqueue(self.animal_id, self.date_time, LATITUDE - 0.5, LONGITUDE)
+
+        with mock.patch('tethysapp.wildatlas.models.dedup_tolerance', return_value=None):
+            self.assertEqual(PendingSighting.write_batch(10), 2)
+
+        self.assertEqual(PendingSighting.status_of(bad), (FAILED, bad))
+        self.assertEqual(PendingSighting.status_of(first), (WRITTEN, first))
+        self.assertEqual(PendingSighting.status_of(good), (WRITTEN, good))
+        self.assertEqual(PendingSighting.write_batch(10), 0)
+
+    def test_drain_command_writes_the_backlog(self):
+        pending_id, _ = PendingSighting.enqueue(self.animal_id, self.date_time, LATITUDE, LONGITUDE)
+
+        with mock.patch('tethysapp.wildatlas.models.dedup_tolerance', return_value=None):
+            call_command('drain_sightings', stdout=io.StringIO())
+
+        self.assertEqual(PendingSighting.status_of(pending_id), (WRITTEN, pending_id))
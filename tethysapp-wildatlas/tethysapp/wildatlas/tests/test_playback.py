@@ -0,0 +1,49 @@
+from datetime import datetime, timedelta, timezone
+
+from django.test import override_settings
+from tethys_sdk.testing import TethysTestCase
+
+from ..app import App
+from ..db import get_engine, request_session
+from ..models import Animal, Sighting
+
+# Outside the park, so the first-time random sightings never land nearby.
+BBOX = '-111.6,43.9,-111.4,44.1'
+
+
+@override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+class SightingPlaybackControllerTestCase(TethysTestCase):
+    """
+    The time slider playback endpoint end to end against the test persistent store.
+    """
+
+    def set_up(self):
+        self.create_test_persistent_stores_for_app(App)
+        self.client = self.get_test_client()
+        self.user = self.create_test_user(username='player', password='secret')
+        self.client.force_login(self.user)
+        self.boundary = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0) - timedelta(hours=2)
+
+    def tear_down(self):
+        # The test database can't be dropped while the pool holds connections to it.
+        request_session.remove()
+        get_engine().dispose()
+        self.destroy_test_persistent_stores_for_app(App)
+
+    def step(self, start):
+        response = self.client.get(App.reverse('sighting_playback'), {
+            'start': start.isoformat(), 'end': (start + timedelta(hours=1)).isoformat(), 'bbox': BBOX
+        })
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_sighting_on_a_step_boundary_is_in_the_later_step_only(self):
+        Sighting.add(next(iter(Animal.catalog())), self.boundary, 44.0, -111.5, dedup=False)
+
+        self.assertEqual(self.step(self.boundary - timedelta(hours=1))['total'], 0)
+        self.assertEqual(self.step(self.boundary)['total'], 1)
+
+    def test_start_and_end_are_required(self):
+        response = self.client.get(App.reverse('sighting_playback'), {'start': self.boundary.isoformat()})
+
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,87 @@
+from contextlib import redirect_stdout
+import io
+import json
+import subprocess
+import sys
+
+from sqlalchemy import func, select
+from tethys_sdk.testing import TethysTestCase
+
+from ..app import App
+from ..db import get_engine, request_session, session_scope
+from ..models import SIGHTINGS_DATA, Animal, DataVersion, Sighting, _register_valid_animals, init_primary_db
+
+# Modules the app should not need to load before its first request.
+DEFERRED_MODULES = ['numpy', 'dateutil.parser']
+
+CHILD = """
+import json
+import os
+import sys
+
+import django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tethys_portal.settings')
+django.setup()
+
+deferred = json.loads(sys.argv[1])
+loaded_by_portal = [name for name in deferred if name in sys.modules]
+import tethysapp.wildatlas.controllers
+print(json.dumps([name for name in deferred if name in sys.modules and name not in loaded_by_portal]))
+"""
+
+
+class ControllersImportTestCase(TethysTestCase):
+    """
+    What importing the controllers loads when the portal registers the app.
+    """
+
+    def test_heavy_modules_are_loaded_on_first_use(self):
+        completed = subprocess.run(
+            [sys.executable, '-c', CHILD, json.dumps(DEFERRED_MODULES)],
+            capture_output=True, text=True, check=True
+        )
+
+        self.assertEqual(json.loads(completed.stdout.strip().splitlines()[-1]), [])
+
+
+class InitPrimaryDbTestCase(TethysTestCase):
+    """
+    Rerunning the database initialization on restart against the test persistent store.
+    """
+
+    def set_up(self):
+        self.create_test_persistent_stores_for_app(App)
+
+    def tear_down(self):
+        # The test database can't be dropped while the pool holds connections to it.
+        request_session.remove()
+        get_engine().dispose()
+        self.destroy_test_persistent_stores_for_app(App)
+
+    def snapshot(self):
+        with session_scope() as session:
+            animals = session.execute(select(Animal.id, Animal.name, Animal.logo_path, Animal.pin_path)).all()
+            sightings = session.execute(select(func.count(Sighting.id))).scalar()
+            version = session.get(DataVersion, SIGHTINGS_DATA).version
+        request_session.remove()
+        return sorted(animals), sightings, version
+
+    def test_registering_animals_again_changes_nothing(self):
+        before = self.snapshot()
+        output = io.StringIO()
+
+        with redirect_stdout(output):
+            _register_valid_animals()
+
+        self.assertEqual(self.snapshot(), before)
+        self.assertEqual(output.getvalue(), '')
+
+    def test_restart_leaves_the_database_as_it_was(self):
+        before = self.snapshot()
+
+        with redirect_stdout(io.StringIO()):
+            init_primary_db(get_engine(), False)
+            init_primary_db(get_engine(), False)
+
+        self.assertEqual(self.snapshot(), before)
+        self.assertEqual(sorted(Animal.catalog()), [animal.id for animal in before[0]])
@@ -0,0 +1,49 @@
+from datetime import datetime, timezone
+
+import numpy as np
+from tethys_sdk.testing import TethysTestCase
+
+from ..models import YELLOWSTONE_BBOX
+from ..synthetic import SyntheticSightings
+
+END = datetime(2025, 9, 1, tzinfo=timezone.utc)
+
+
+class SyntheticSightingsTestCase(TethysTestCase):
+    """
+    Shape, bounds, reproducibility and clustering of the synthetic sightings used by the benchmarks.
+    """
+
+    def test_columns_stay_inside_the_park_and_window(self):
+        columns = SyntheticSightings([1, 2, 3], seed=4, days=30, end=END).columns(20000)
+
+        min_lon, min_lat, max_lon, max_lat = YELLOWSTONE_BBOX
+        self.assertTrue(np.all((columns['longitude'] >= min_lon) & (columns['longitude'] <= max_lon)))
+        self.assertTrue(np.all((columns['latitude'] >= min_lat) & (columns['latitude'] <= max_lat)))
+        self.assertLessEqual(columns['epoch'].max(), END.timestamp())
+        self.assertGreater(columns['epoch'].min(), END.timestamp() - 31 * 86400)
+        self.assertEqual(set(columns['animal_id'].tolist()), {1, 2, 3})
+        self.assertEqual(columns['id'].shape, (20000, 16))
+
+    def test_same_seed_and_stream_give_the_same_rows(self):
+        first = SyntheticSightings([1, 2], seed=7, end=END).rows(50)
+        second = SyntheticSightings([1, 2], seed=7, end=END).rows(50)
+        other_stream = SyntheticSightings([1, 2], seed=7, stream=50, end=END).rows(50)
+
+        self.assertEqual(first, second)
+        self.assertFalse({row['id'] for row in first} & {row['id'] for row in other_stream})
+        self.assertEqual(first[0]['id'].version, 4)
+
+    def test_sightings_are_clustered(self):
+        columns = SyntheticSightings([1], seed=1, end=END).columns(20000)
+
+        # 20000 uniform points would land in nearly all cells of a 50 x 50 grid; hotspots leave many of them empty.
+        cells_x = np.floor((columns['longitude'] - YELLOWSTONE_BBOX[0]) / 0.5 * 50).astype(int)
+        cells_y = np.floor((columns['latitude'] - YELLOWSTONE_BBOX[1]) / 0.9 * 50).astype(int)
+        occupied = len(set(zip(cells_x.tolist(), cells_y.tolist())))
+        self.assertLess(occupied, 0.8 * 2500)
+
+        # More sightings around dawn than around midnight, local time.
+        local_hours = ((columns['epoch'] / 3600 - 6) % 24).astype(int)
+        hours = np.bincount(local_hours, minlength=24)
+        self.assertGreater(hours[7], 5 * hours[0])
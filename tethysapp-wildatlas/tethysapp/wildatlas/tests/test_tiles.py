@@ -0,0 +1,31 @@
+from tethys_sdk.testing import TethysTestCase
+
+from ..tiles import TileCache, tile_for_point
+
+
+class TileCacheTestCase(TethysTestCase):
+    """
+    Invalidation of cached tiles by local writes and by data version changes from other processes.
+    """
+
+    def test_tile_is_only_served_for_the_version_it_was_rendered_from(self):
+        cache = TileCache()
+        cache.set((12, 1, 2), b'tile', version='7.0')
+
+        self.assertEqual(cache.get((12, 1, 2), '7.0'), b'tile')
+        # Another process wrote a sighting.
+        self.assertIsNone(cache.get((12, 1, 2), '8.0'))
+        self.assertIsNone(cache.get((12, 1, 2), '7.0'))
+
+    def test_local_write_drops_the_tiles_under_the_point(self):
+        cache = TileCache()
+        key = tile_for_point(12, -110.5, 44.6)
+        cache.set(key, b'tile', version='7.0')
+        generation = cache.generation
+
+        cache.invalidate_point(-110.5, 44.6)
+
+        self.assertIsNone(cache.get(key, '7.0'))
+        # A tile rendered from data read before the write is not cached.
+        cache.set(key, b'stale', generation=generation, version='7.0')
+        self.assertIsNone(cache.get(key, '7.0'))
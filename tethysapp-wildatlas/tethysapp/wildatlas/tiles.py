@@ -0,0 +1,103 @@
+from collections import OrderedDict
+import math
+import threading
+import time
+
+# Tiles are rendered up to this zoom level; the map over-zooms the deepest tiles beyond it.
+MAX_TILE_ZOOM = 16
+
+# Cached tiles also expire after this many seconds, since the default time window slides forward.
+TILE_CACHE_TTL = 3600
+
+TILE_CACHE_SIZE = 2048
+
+# Fraction of a tile's width included around it so pins near the edge are not clipped (matches ST_AsMVTGeom).
+TILE_BUFFER = 1 / 16
+
+
+def tile_bounds(z, x, y):
+    """
+    Get the (min_lon, min_lat, max_lon, max_lat) bounds of an XYZ web mercator tile.
+    """
+    n = 2 ** z
+
+    def tile_lat(tile_y):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * tile_y / n))))
+
+    return (x / n * 360.0 - 180.0, tile_lat(y + 1), (x + 1) / n * 360.0 - 180.0, tile_lat(y))
+
+
+def buffered_tile_bounds(z, x, y):
+    min_lon, min_lat, max_lon, max_lat = tile_bounds(z, x, y)
+    dx = (max_lon - min_lon) * TILE_BUFFER
+    dy = (max_lat - min_lat) * TILE_BUFFER
+    return min_lon - dx, min_lat - dy, max_lon + dx, max_lat + dy
+
+
+def tile_for_point(z, longitude, latitude):
+    """
+    Get the (z, x, y) of the XYZ web mercator tile containing a point.
+    """
+    n = 2 ** z
+    lat = math.radians(max(min(latitude, 85.0511), -85.0511))
+    x = int((longitude + 180.0) / 360.0 * n)
+    y = int((1 - math.asinh(math.tan(lat)) / math.pi) / 2 * n)
+    return z, min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+class TileCache:
+    """
+    Thread-safe, process-level LRU cache of encoded tiles keyed on (z, x, y). Each tile remembers the data version it
+    was rendered from and is only served for that version, so writes made by other processes are picked up too;
+    invalidate_point and clear drop tiles of this process's own writes straight away.
+    """
+
+    def __init__(self, max_size=TILE_CACHE_SIZE, ttl=TILE_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._tiles = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped on every invalidation so tiles rendered from data read before a write are not cached.
+        self.generation = 0
+
+    def get(self, key, version=None):
+        with self._lock:
+            entry = self._tiles.get(key)
+            if entry is None:
+                return None
+            created, tile_version, tile = entry
+            if time.monotonic() - created > self.ttl or tile_version != version:
+                del self._tiles[key]
+                return None
+            self._tiles.move_to_end(key)
+            return tile
+
+    def set(self, key, tile, generation=None, version=None):
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._tiles[key] = (time.monotonic(), version, tile)
+            self._tiles.move_to_end(key)
+            while len(self._tiles) > self.max_size:
+                self._tiles.popitem(last=False)
+
+    def invalidate_point(self, longitude, latitude):
+        """
+        Drop every cached tile, at every zoom level, whose buffered bounds contain the given point.
+        """
+        with self._lock:
+            self.generation += 1
+            for z in range(MAX_TILE_ZOOM + 1):
+                # A tile is never taller in degrees than it is wide, so this over-covers the buffer at any latitude.
+                buffer = 360.0 / 2 ** z * TILE_BUFFER
+                for dx in (-buffer, buffer):
+                    for dy in (-buffer, buffer):
+                        self._tiles.pop(tile_for_point(z, longitude + dx, latitude + dy), None)
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._tiles.clear()
+
+
+sighting_tiles = TileCache()
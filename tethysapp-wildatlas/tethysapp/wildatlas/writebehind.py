@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta, timezone
+import logging
+import threading
+import time
+
+from .models import PendingSighting
+
+log = logging.getLogger(__name__)
+
+WRITE_BATCH_SIZE = 500
+
+# How long the writer lets submissions accumulate after being woken, to write them in fewer transactions.
+WRITE_BATCH_DELAY = 0.2
+
+# The writer also polls this often, for submissions queued by other processes or left over from a restart.
+WRITE_POLL_INTERVAL = 5
+
+# Written submissions are kept this long so retries with the same idempotency key are still recognized.
+IDEMPOTENCY_WINDOW = timedelta(days=1)
+
+# Seconds between deletions of written submissions older than IDEMPOTENCY_WINDOW.
+PURGE_INTERVAL = 3600
+
+
+class SightingWriter:
+    """
+    Background thread that moves queued sightings into the sightings table in batches. One runs per process, from
+    the first submission or status check of a pending one; concurrent writers in other processes skip each other's
+    rows. The drain_sightings command writes a backlog left by a restart without waiting for either.
+    """
+
+    def __init__(self, batch_size=WRITE_BATCH_SIZE, batch_delay=WRITE_BATCH_DELAY, poll_interval=WRITE_POLL_INTERVAL):
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self.poll_interval = poll_interval
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._last_purge = None
+
+    def notify(self):
+        """
+        Wake the writer, starting it if this process hasn't yet.
+        """
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='wildatlas-sighting-writer', daemon=True)
+                    self._thread.start()
+        self._wakeup.set()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.poll_interval)
+            time.sleep(self.batch_delay)
+            self._wakeup.clear()
+            try:
+                self.drain()
+            except Exception:
+                log.exception('Could not write queued sightings.')
+
+    def drain(self):
+        """
+        Write queued sightings until the queue is empty. Returns the number written.
+        """
+        written = 0
+        while True:
+            count = PendingSighting.write_batch(self.batch_size)
+            written += count
+            if count < self.batch_size:
+                break
+
+        if self._last_purge is None or time.monotonic() - self._last_purge > PURGE_INTERVAL:
+            PendingSighting.purge_written(datetime.now(timezone.utc) - IDEMPOTENCY_WINDOW)
+            self._last_purge = time.monotonic()
+        return written
+
+
+sighting_writer = SightingWriter()